@@ -0,0 +1,77 @@
+# Mede a vazão de checkout de ponta a ponta (criar_pedido + pagamento) contra o gateway local simulado,
+# com perfis de latência diferentes, usando o DespachantePagamentos (threads) e a fachada asyncio.
+# Uso: python -m benchmarks.benchmark_checkout [pedidos] [trabalhadores]   (padrão: 500 32)
+import asyncio
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ecommerce.carrinho import Carrinho
+from ecommerce.despachante_pagamentos import DespachantePagamentos
+from ecommerce.gateway import GatewayLocalSimulado
+from ecommerce.produto import Produto
+from ecommerce.sistema_async import SistemaEcommerceAsync
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+from ecommerce.sistema_pagamento import SistemaPagamento
+
+PERFIS = {
+    "fixa 20ms": dict(distribuicao="fixa", latencia=0.02),
+    "lognormal 20ms": dict(distribuicao="lognormal", latencia=0.02, sigma=0.7),
+    "picos 20ms/1%x25": dict(distribuicao="picos", latencia=0.02, prob_pico=0.01, fator_pico=25),
+    "lognormal + falhas": dict(distribuicao="lognormal", latencia=0.02, sigma=0.7, taxa_falha=0.05, taxa_timeout=0.01, timeout=0.5),
+}
+
+
+def criar_sistema(perfil: dict, quantidade_pedidos: int) -> SistemaEcommerce:
+    sistema = SistemaEcommerce(sistema_pagamento=SistemaPagamento(gateway=GatewayLocalSimulado(semente=1, **perfil)))
+    sistema.adicionar_produto(Produto(1, "Produto Benchmark", "", 100.0, quantidade_pedidos, "Benchmark"))
+    return sistema
+
+
+def novo_carrinho(sistema: SistemaEcommerce) -> Carrinho:
+    carrinho = Carrinho()
+    carrinho.adicionar_item(sistema.buscar_produto_por_id(1), 1)
+    return carrinho
+
+
+def medir_despachante(perfil: dict, quantidade_pedidos: int, num_trabalhadores: int) -> tuple[float, float]:
+    sistema = criar_sistema(perfil, quantidade_pedidos)
+    inicio = time.perf_counter()
+    with DespachantePagamentos(sistema, num_trabalhadores=num_trabalhadores, capacidade_fila=quantidade_pedidos) as despachante:
+        futuros = []
+        for i in range(quantidade_pedidos):
+            pedido = sistema.criar_pedido(f"cliente_{i}", novo_carrinho(sistema), {"rua": "Rua Benchmark"}, "PIX")
+            futuros.append(despachante.enviar(pedido.id_pedido, {}))
+        aprovados = sum(1 for futuro in futuros if futuro.result())
+    return quantidade_pedidos / (time.perf_counter() - inicio), aprovados / quantidade_pedidos
+
+
+def medir_async(perfil: dict, quantidade_pedidos: int) -> tuple[float, float]:
+    sistema = criar_sistema(perfil, quantidade_pedidos)
+    fachada = SistemaEcommerceAsync(sistema)
+
+    async def checkout(i: int) -> bool:
+        pedido = await fachada.criar_pedido(f"cliente_{i}", novo_carrinho(sistema), {"rua": "Rua Benchmark"}, "PIX")
+        return await fachada.processar_pagamento_pedido(pedido.id_pedido, {}) # timeouts viram FALHA_PAGAMENTO
+
+    async def executar() -> list:
+        return await asyncio.gather(*(checkout(i) for i in range(quantidade_pedidos)))
+
+    inicio = time.perf_counter()
+    resultados = asyncio.run(executar())
+    return quantidade_pedidos / (time.perf_counter() - inicio), sum(resultados) / quantidade_pedidos
+
+
+if __name__ == "__main__":
+    quantidade_pedidos = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    num_trabalhadores = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    print(f"{quantidade_pedidos} checkouts por perfil; despachante com {num_trabalhadores} trabalhadores")
+    for nome, perfil in PERFIS.items():
+        with open(os.devnull, "w") as saida_nula, contextlib.redirect_stdout(saida_nula): # o sistema imprime a cada operação
+            vazao_threads, aprovacao_threads = medir_despachante(perfil, quantidade_pedidos, num_trabalhadores)
+            vazao_async, aprovacao_async = medir_async(perfil, quantidade_pedidos)
+        print(f"{nome:<20} | despachante {vazao_threads:8.0f} checkouts/s ({aprovacao_threads:6.1%} aprovados)"
+              f" | asyncio {vazao_async:8.0f} checkouts/s ({aprovacao_async:6.1%} aprovados)")
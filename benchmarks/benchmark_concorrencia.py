@@ -0,0 +1,52 @@
+# Mede a vazão de criar_pedido (pedidos/s) com checkouts concorrentes, variando o número de threads.
+# Uso: python -m benchmarks.benchmark_concorrencia [pedidos_por_thread] [threads...]   (padrão: 500 1 2 4 8 16)
+import contextlib
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ecommerce.carrinho import Carrinho
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+from benchmarks.benchmark_memoria import criar_produto
+
+QUANTIDADE_PRODUTOS = 1000
+
+
+def medir_vazao(num_threads: int, pedidos_por_thread: int) -> float:
+    with open(os.devnull, "w") as saida_nula, contextlib.redirect_stdout(saida_nula): # o sistema imprime a cada operação
+        sistema = SistemaEcommerce()
+        for i in range(QUANTIDADE_PRODUTOS):
+            produto = criar_produto(i)
+            produto.quantidade_estoque = num_threads * pedidos_por_thread # estoque suficiente: mede só a contenção
+            sistema.adicionar_produto(produto)
+        barreira = threading.Barrier(num_threads + 1)
+
+        def comprar(indice: int):
+            produtos = [sistema.buscar_produto_por_id((indice * 7 + j) % QUANTIDADE_PRODUTOS) for j in range(pedidos_por_thread)]
+            barreira.wait()
+            for j, produto in enumerate(produtos):
+                carrinho = Carrinho()
+                carrinho.adicionar_item(produto, 1)
+                if produtos[j - 1] is not produto: # dois produtos por pedido, em ordens variadas
+                    carrinho.adicionar_item(produtos[j - 1], 1)
+                sistema.criar_pedido(f"cliente_{indice}", carrinho, {"rua": "Rua Benchmark"}, "PIX")
+
+        threads = [threading.Thread(target=comprar, args=(i,)) for i in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        barreira.wait()
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+    return num_threads * pedidos_por_thread / duracao
+
+
+if __name__ == "__main__":
+    pedidos_por_thread = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    numeros_threads = [int(n) for n in sys.argv[2:]] or [1, 2, 4, 8, 16]
+    for num_threads in numeros_threads:
+        print(f"{num_threads:>3} thread(s) | {medir_vazao(num_threads, pedidos_por_thread):10.0f} pedidos/s")
@@ -0,0 +1,107 @@
+# Mede o consumo de memória (bytes por instância) de Produto e Pedido com tracemalloc, e o que o sistema
+# mantém em memória por pedido arquivado (índices e agregados; o índice do arquivo fica em disco).
+# Uso: python -m benchmarks.benchmark_memoria [quantidades...]   (padrão: 100000 1000000)
+import contextlib
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+from typing import Callable, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.pedido import Pedido, StatusPedido
+from ecommerce.arquivo_pedidos import ArquivoPedidos
+
+CATEGORIAS = ["Eletrônicos", "Acessórios", "Periféricos", "Monitores", "Componentes"]
+METODOS_PAGAMENTO = ["PIX", "Cartão de Crédito", "Boleto"]
+
+
+def medir_bytes_por_instancia(fabrica: Callable[[int], object], quantidade: int) -> float:
+    # Cria `quantidade` objetos e retorna a memória alocada dividida pelo número de instâncias
+    gc.collect()
+    tracemalloc.start()
+    try:
+        inicio, _ = tracemalloc.get_traced_memory()
+        objetos: List[object] = [fabrica(i) for i in range(quantidade)]
+        fim, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del objetos
+    return (fim - inicio) / quantidade
+
+
+def criar_produto(i: int) -> Produto:
+    # "".join cria uma nova string a cada chamada (como num import), para que o interning faça diferença
+    categoria = "".join(CATEGORIAS[i % len(CATEGORIAS)])
+    return Produto(i, f"Produto {i}", "", 10.0 + (i % 100), 1 + i % 50, categoria)
+
+
+def bytes_por_produto(quantidade: int) -> float:
+    return medir_bytes_por_instancia(criar_produto, quantidade)
+
+
+def _fabrica_pedidos() -> Callable[[int], Pedido]:
+    produtos = [criar_produto(i) for i in range(10)]
+    carrinhos = []
+    for i in range(10):
+        carrinho = Carrinho()
+        carrinho.adicionar_item(produtos[i], 1)
+        carrinhos.append(carrinho)
+    endereco = {"rua": "Rua Benchmark", "cep": "00000-000"}
+
+    def criar_pedido(i: int) -> Pedido:
+        metodo = "".join(METODOS_PAGAMENTO[i % len(METODOS_PAGAMENTO)])
+        return Pedido(f"cliente_{i % 1000}", carrinhos[i % 10], endereco, metodo)
+    return criar_pedido
+
+
+def bytes_por_pedido(quantidade: int) -> float:
+    criar_pedido = _fabrica_pedidos()
+    with open(os.devnull, "w") as saida_nula, contextlib.redirect_stdout(saida_nula): # Pedido imprime ao ser criado
+        return medir_bytes_por_instancia(criar_pedido, quantidade)
+
+
+def bytes_por_pedido_arquivado(quantidade: int) -> float:
+    # Memória que um SistemaEcommerce recém-aberto mantém por pedido do arquivo: ordem, sequência, índice por
+    # cliente, índice temporal e agregados. É linear no número de pedidos arquivados (os objetos Pedido e o
+    # índice do arquivo não ficam em memória). A diferença entre 2N e N pedidos descarta os custos fixos
+    # (cache de blocos do arquivo, estruturas vazias do sistema)
+    return (_memoria_sistema_com_arquivados(2 * quantidade) - _memoria_sistema_com_arquivados(quantidade)) / quantidade
+
+
+def _memoria_sistema_com_arquivados(quantidade: int) -> int:
+    from ecommerce.sistema_ecommerce import SistemaEcommerce
+    criar_pedido = _fabrica_pedidos()
+    with tempfile.TemporaryDirectory() as diretorio, open(os.devnull, "w") as saida_nula, contextlib.redirect_stdout(saida_nula):
+        arquivo = ArquivoPedidos(diretorio, fsync=False)
+        for inicio in range(0, quantidade, 10_000):
+            pedidos = [criar_pedido(i) for i in range(inicio, min(quantidade, inicio + 10_000))]
+            for pedido in pedidos:
+                pedido.atualizar_status(StatusPedido.CANCELADO)
+            arquivo.arquivar(pedidos)
+        arquivo.fechar()
+        arquivo = ArquivoPedidos(diretorio, fsync=False)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            inicio_memoria, _ = tracemalloc.get_traced_memory()
+            sistema = SistemaEcommerce(arquivo=arquivo)
+            gc.collect()
+            fim_memoria, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del sistema
+        arquivo.fechar()
+    return fim_memoria - inicio_memoria
+
+
+if __name__ == "__main__":
+    quantidades = [int(q) for q in sys.argv[1:]] or [10 ** 5, 10 ** 6]
+    for quantidade in quantidades:
+        print(f"{quantidade:>9} instâncias | Produto: {bytes_por_produto(quantidade):8.1f} B/instância"
+              f" | Pedido: {bytes_por_pedido(quantidade):8.1f} B/instância"
+              f" | Pedido arquivado: {bytes_por_pedido_arquivado(quantidade):8.1f} B/pedido")
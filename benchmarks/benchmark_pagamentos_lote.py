@@ -0,0 +1,57 @@
+# Compara a vazão de SistemaPagamento.processar_lote com a de chamadas individuais a processar_pix /
+# processar_cartao_credito, contra o gateway local simulado (latência fixa por chamada).
+# Uso: python -m benchmarks.benchmark_pagamentos_lote [pagamentos] [latencia_ms]   (padrão: 500 2)
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ecommerce.gateway import GatewayLocalSimulado
+from ecommerce.sistema_pagamento import SistemaPagamento
+
+
+class GatewaySemLote(GatewayLocalSimulado):
+    # Mesmo gateway sem autorizar_lote/verificar_fraude_lote: processar_lote usa chamadas individuais concorrentes
+    autorizar_lote = None
+    verificar_fraude_lote = None
+
+
+def criar_solicitacoes(quantidade: int) -> list:
+    return [{"metodo": "PIX", "valor": 50.0 + i} if i % 2 else
+            {"metodo": "Cartão de Crédito", "valor": 50.0 + i, "num_parcelas": 1 + i % 12, "dados_cartao": {}}
+            for i in range(quantidade)]
+
+
+def medir_individual(solicitacoes: list, latencia: float) -> float:
+    pagamento = SistemaPagamento(gateway=GatewayLocalSimulado(latencia=latencia, semente=1))
+    inicio = time.perf_counter()
+    for solicitacao in solicitacoes:
+        if solicitacao["metodo"] == "PIX":
+            pagamento.processar_pix(solicitacao["valor"])
+        else:
+            pagamento.processar_cartao_credito(solicitacao["valor"], solicitacao["num_parcelas"], solicitacao["dados_cartao"])
+    return len(solicitacoes) / (time.perf_counter() - inicio)
+
+
+def medir_lote(solicitacoes: list, latencia: float, gateway_classe, **parametros) -> float:
+    pagamento = SistemaPagamento(gateway=gateway_classe(latencia=latencia, semente=1))
+    inicio = time.perf_counter()
+    pagamento.processar_lote(solicitacoes, **parametros)
+    return len(solicitacoes) / (time.perf_counter() - inicio)
+
+
+if __name__ == "__main__":
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latencia = (float(sys.argv[2]) if len(sys.argv) > 2 else 2.0) / 1000
+    solicitacoes = criar_solicitacoes(quantidade)
+    with open(os.devnull, "w") as saida_nula, contextlib.redirect_stdout(saida_nula): # o sistema imprime a cada operação
+        medicoes = [
+            ("chamadas individuais", medir_individual(solicitacoes, latencia)),
+            ("lote, 16 chamadas concorrentes", medir_lote(solicitacoes, latencia, GatewaySemLote, max_concorrencia=16)),
+            ("lote, autorizar_lote de 100", medir_lote(solicitacoes, latencia, GatewayLocalSimulado, tamanho_lote=100)),
+        ]
+    print(f"{quantidade} pagamentos, gateway com {latencia * 1000:.1f} ms por chamada")
+    for nome, vazao in medicoes:
+        print(f"{nome:<32} | {vazao:10.0f} pagamentos/s | {vazao / medicoes[0][1]:6.1f}x")
@@ -0,0 +1,68 @@
+# Compara o SistemaEcommerce em memória (dicionários) com o repositório SQLite (em memória e em arquivo).
+# Uso: python -m benchmarks.benchmark_repositorio [produtos] [pedidos]   (padrão: 10000 2000)
+import contextlib
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ecommerce.carrinho import Carrinho
+from ecommerce.repositorio_sqlite import RepositorioSQLite
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+from benchmarks.benchmark_memoria import criar_produto
+
+
+def escrever_catalogo(caminho: str, quantidade_produtos: int):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        arquivo.write("id_produto,nome,descricao,preco,quantidade_estoque,categoria\n")
+        for i in range(quantidade_produtos):
+            produto = criar_produto(i)
+            arquivo.write(f"{produto.id_produto},{produto.nome},,{produto.preco},{produto.quantidade_estoque},{produto.categoria}\n")
+
+
+def medir(funcao: Callable[[], object]) -> float:
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def executar_cenario(fabrica_sistema: Callable[[], SistemaEcommerce], caminho_catalogo: str, quantidade_produtos: int, quantidade_pedidos: int) -> Dict[str, float]:
+    tempos: Dict[str, float] = {}
+    with open(os.devnull, "w") as saida_nula, contextlib.redirect_stdout(saida_nula): # o sistema imprime a cada operação
+        sistema = fabrica_sistema()
+        tempos["carga_catalogo"] = medir(lambda: sistema.importar_catalogo(caminho_catalogo))
+        produtos = [sistema.buscar_produto_por_id(i) for i in range(quantidade_produtos)]
+
+        ids_pedidos = []
+        def criar_pedidos():
+            for i in range(quantidade_pedidos):
+                carrinho = Carrinho()
+                carrinho.adicionar_item(produtos[i % quantidade_produtos], 1)
+                ids_pedidos.append(sistema.criar_pedido(f"cliente_{i % 100}", carrinho, {"rua": "Rua Benchmark"}, "PIX").id_pedido)
+
+        tempos["criar_pedido"] = medir(criar_pedidos) / quantidade_pedidos
+        tempos["buscar_pedido_por_id"] = medir(lambda: [sistema.buscar_pedido_por_id(id_pedido) for id_pedido in ids_pedidos * 10]) / (10 * quantidade_pedidos)
+        tempos["atualizar_estoque"] = medir(lambda: [produto.atualizar_estoque(1) for produto in produtos[:quantidade_pedidos]]) / quantidade_pedidos
+    return tempos
+
+
+if __name__ == "__main__":
+    quantidade_produtos = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    quantidade_pedidos = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_catalogo = os.path.join(diretorio, "catalogo.csv")
+        escrever_catalogo(caminho_catalogo, quantidade_produtos)
+        cenarios = {
+            "dicionários": lambda: SistemaEcommerce(),
+            "SQLite (:memory:)": lambda: SistemaEcommerce(repositorio=RepositorioSQLite()),
+            "SQLite (arquivo)": lambda: SistemaEcommerce(repositorio=RepositorioSQLite(os.path.join(diretorio, "benchmark.db"))),
+        }
+        for nome, fabrica in cenarios.items():
+            tempos = executar_cenario(fabrica, caminho_catalogo, quantidade_produtos, quantidade_pedidos)
+            print(f"{nome:>18} | carga do catálogo: {tempos['carga_catalogo'] * 1e3:8.1f} ms"
+                  f" | criar_pedido: {tempos['criar_pedido'] * 1e6:7.1f} µs"
+                  f" | buscar_pedido_por_id: {tempos['buscar_pedido_por_id'] * 1e6:5.2f} µs"
+                  f" | atualizar_estoque: {tempos['atualizar_estoque'] * 1e6:6.1f} µs")
@@ -0,0 +1,166 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .pedido import Pedido
+from .produto import Produto
+
+
+class ArquivoPedidos:
+    """Armazenamento frio, somente de acréscimo, para pedidos que não mudam mais (ENTREGUE/CANCELADO).
+
+    Os pedidos são gravados em blocos de até `pedidos_por_bloco` registros, cada bloco compactado com
+    zlib e acrescentado ao segmento atual (`segmento_NNNNN.dat`, com rotação ao passar de
+    `bytes_por_segmento`). O índice id_pedido -> (segmento, offset, tamanho, posição no bloco) fica em
+    disco, numa tabela SQLite (`indice.db`): a memória usada pelo arquivo não cresce com o número de
+    pedidos arquivados (só o cache de páginas do SQLite e os `blocos_em_cache` blocos descompactados).
+    Leituras consultam o índice e descompactam só o bloco do pedido.
+    """
+
+    ARQUIVO_INDICE = "indice.db"
+
+    def __init__(self, diretorio: str, pedidos_por_bloco: int = 512, bytes_por_segmento: int = 64 * 1024 * 1024,
+                 blocos_em_cache: int = 8, fsync: bool = True):
+        if pedidos_por_bloco <= 0:
+            raise ValueError("pedidos_por_bloco deve ser positivo.")
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.pedidos_por_bloco = pedidos_por_bloco
+        self.bytes_por_segmento = bytes_por_segmento
+        self.blocos_em_cache = blocos_em_cache
+        self.fsync = fsync
+        self._trava = threading.Lock()
+        self._cache_blocos: "OrderedDict[Tuple[int, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._indice = sqlite3.connect(os.path.join(diretorio, self.ARQUIVO_INDICE), isolation_level=None, check_same_thread=False)
+        self._indice.execute(f"PRAGMA synchronous={'FULL' if fsync else 'OFF'}")
+        self._indice.execute("CREATE TABLE IF NOT EXISTS indice (id_pedido TEXT PRIMARY KEY, segmento INTEGER NOT NULL, "
+                             "offset INTEGER NOT NULL, tamanho INTEGER NOT NULL, posicao INTEGER NOT NULL)")
+        self._indice.execute("CREATE INDEX IF NOT EXISTS idx_indice_bloco ON indice (segmento, offset)")
+        self._segmento_atual = self._indice.execute("SELECT MAX(segmento) FROM indice").fetchone()[0] or 1
+
+    def _caminho_segmento(self, segmento: int) -> str:
+        return os.path.join(self.diretorio, f"segmento_{segmento:05d}.dat")
+
+    def _localizar(self, id_pedido: str) -> Optional[Tuple[int, int, int, int]]: # chamado com a trava adquirida
+        return self._indice.execute("SELECT segmento, offset, tamanho, posicao FROM indice WHERE id_pedido = ?", (id_pedido,)).fetchone()
+
+    # --- Escrita ---
+
+    def arquivar(self, pedidos: Iterable[Pedido]) -> List[str]:
+        # Grava os pedidos e retorna os ids arquivados; o índice só é atualizado depois de os blocos estarem em disco
+        with self._trava:
+            arquivados: List[str] = []
+            entradas_indice: List[Dict[str, Any]] = []
+            caminho = self._caminho_segmento(self._segmento_atual)
+            if os.path.exists(caminho) and os.path.getsize(caminho) >= self.bytes_por_segmento:
+                self._segmento_atual += 1
+                caminho = self._caminho_segmento(self._segmento_atual)
+            with open(caminho, "ab") as segmento:
+                bloco: List[Dict[str, Any]] = []
+                for pedido in pedidos:
+                    if self._localizar(pedido.id_pedido) is not None:
+                        continue
+                    bloco.append(pedido.para_dados())
+                    if len(bloco) == self.pedidos_por_bloco:
+                        entradas_indice.append(self._gravar_bloco(segmento, bloco))
+                        bloco = []
+                if bloco:
+                    entradas_indice.append(self._gravar_bloco(segmento, bloco))
+                segmento.flush()
+                if self.fsync:
+                    os.fsync(segmento.fileno())
+            # Uma única transação do SQLite, depois de os blocos estarem em disco: o índice nunca aponta para dados ausentes
+            with self._indice:
+                self._indice.execute("BEGIN")
+                for entrada in entradas_indice:
+                    self._indice.executemany("INSERT INTO indice VALUES (?, ?, ?, ?, ?)",
+                                             ((id_pedido, entrada["segmento"], entrada["offset"], entrada["tamanho"], posicao)
+                                              for posicao, id_pedido in enumerate(entrada["ids"])))
+                    arquivados.extend(entrada["ids"])
+            return arquivados
+
+    def _gravar_bloco(self, segmento, bloco: List[Dict[str, Any]]) -> Dict[str, Any]:
+        compactado = zlib.compress(json.dumps(bloco, separators=(",", ":")).encode("utf-8"))
+        offset = segmento.tell()
+        segmento.write(compactado)
+        return {"segmento": self._segmento_atual, "offset": offset, "tamanho": len(compactado),
+                "ids": [dados["id_pedido"] for dados in bloco]}
+
+    def remover(self, id_pedido: str) -> bool:
+        # O registro continua no segmento; só o índice deixa de apontar para ele
+        with self._trava:
+            return self._indice.execute("DELETE FROM indice WHERE id_pedido = ?", (id_pedido,)).rowcount > 0
+
+    # --- Leitura ---
+
+    def _ler_bloco(self, segmento: int, offset: int, tamanho: int) -> List[Dict[str, Any]]: # chamado com a trava adquirida
+        chave = (segmento, offset)
+        bloco = self._cache_blocos.get(chave)
+        if bloco is not None:
+            self._cache_blocos.move_to_end(chave)
+            return bloco
+        with open(self._caminho_segmento(segmento), "rb") as arquivo:
+            arquivo.seek(offset)
+            bloco = json.loads(zlib.decompress(arquivo.read(tamanho)))
+        self._cache_blocos[chave] = bloco
+        if len(self._cache_blocos) > self.blocos_em_cache:
+            self._cache_blocos.popitem(last=False)
+        return bloco
+
+    def buscar_dados(self, id_pedido: str) -> Optional[Dict[str, Any]]:
+        with self._trava:
+            localizacao = self._localizar(id_pedido)
+            if localizacao is None:
+                return None
+            segmento, offset, tamanho, posicao = localizacao
+            return self._ler_bloco(segmento, offset, tamanho)[posicao]
+
+    def ler_dados(self, localizacao: Tuple[int, int, int, int]) -> Dict[str, Any]:
+        # Lê um pedido por uma localização obtida antes (ex.: guardada num snapshot); os segmentos nunca são reescritos
+        segmento, offset, tamanho, posicao = localizacao
+        with self._trava:
+            return self._ler_bloco(segmento, offset, tamanho)[posicao]
+
+    def iterar_localizacoes(self, tamanho_bloco: int = 1000) -> Iterator[Tuple[str, Tuple[int, int, int, int]]]:
+        # (id_pedido, localização) de todos os pedidos arquivados, lidos do índice em blocos
+        ultimo = ""
+        while True:
+            with self._trava:
+                linhas = self._indice.execute("SELECT id_pedido, segmento, offset, tamanho, posicao FROM indice WHERE id_pedido > ? "
+                                              "ORDER BY id_pedido LIMIT ?", (ultimo, tamanho_bloco)).fetchall()
+            if not linhas:
+                return
+            for id_pedido, *localizacao in linhas:
+                yield id_pedido, tuple(localizacao)
+            ultimo = linhas[-1][0]
+
+    def buscar(self, id_pedido: str, produtos: Dict[int, Produto]) -> Optional[Pedido]:
+        dados = self.buscar_dados(id_pedido)
+        return Pedido.restaurar(dados, produtos) if dados is not None else None
+
+    def iterar_dados(self) -> Iterator[Dict[str, Any]]:
+        # Todos os pedidos arquivados na ordem em que foram gravados, lendo cada bloco uma única vez
+        with self._trava:
+            blocos = self._indice.execute("SELECT DISTINCT segmento, offset, tamanho FROM indice ORDER BY segmento, offset").fetchall()
+        for segmento, offset, tamanho in blocos: # só a lista de blocos fica em memória, não um item por pedido
+            with self._trava:
+                bloco = self._ler_bloco(segmento, offset, tamanho)
+                posicoes = [posicao for (posicao,) in self._indice.execute(
+                    "SELECT posicao FROM indice WHERE segmento = ? AND offset = ? ORDER BY posicao", (segmento, offset))]
+            for posicao in posicoes: # pedidos removidos continuam no bloco, mas não no índice
+                yield bloco[posicao]
+
+    def fechar(self):
+        with self._trava:
+            self._indice.close()
+
+    def __contains__(self, id_pedido) -> bool:
+        with self._trava:
+            return self._localizar(id_pedido) is not None
+
+    def __len__(self) -> int:
+        with self._trava:
+            return self._indice.execute("SELECT COUNT(*) FROM indice").fetchone()[0]
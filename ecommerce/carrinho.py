@@ -1,24 +1,36 @@
+import uuid
 from .produto import Produto  
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .reservas import GerenciadorReservas
 
 class Carrinho:
    
-    def __init__(self):
+    def __init__(self, reservas: Optional["GerenciadorReservas"] = None):
         self.itens: Dict[Produto, int] = {} #carrinho como um dicionário vazio, a chave é o produto e o valor é a quantidade
+        # Com um gerenciador de reservas, cada item do carrinho segura o estoque por um tempo limitado
+        self.reservas = reservas
+        self.id_carrinho = str(uuid.uuid4())
+
+    def _reservar(self, produto: Produto, quantidade_total: int) -> bool:
+        if self.reservas is None:
+            return produto.verificar_disponibilidade(quantidade_total)
+        return self.reservas.reservar(self.id_carrinho, produto, quantidade_total)
 
     def adicionar_item(self, produto: Produto, quantidade: int = 1):     
 
         
         if quantidade <= 0: #Verifica se há estoque suficiente antes de adicionar.
             raise ValueError("A quantidade a ser adicionada deve ser positiva.")        
-        if not produto.verificar_disponibilidade(quantidade): # Verifica a disponibilidade do produto no estoque
+        if produto not in self.itens and not self._reservar(produto, quantidade): # Verifica a disponibilidade do produto no estoque
             raise ValueError(f"Estoque insuficiente para adicionar {quantidade} unidade(s) de {produto.nome}.")
 
         # Adiciona ou atualiza a quantidade do produto no carrinho
         if produto in self.itens:
             # Verifica se a quantidade total (existente + nova) excede o estoque
             quantidade_total_desejada = self.itens[produto] + quantidade
-            if not produto.verificar_disponibilidade(quantidade_total_desejada):
+            if not self._reservar(produto, quantidade_total_desejada):
                  raise ValueError(f"Estoque insuficiente para adicionar mais {quantidade} unidade(s) de {produto.nome}. Total desejado: {quantidade_total_desejada}, Estoque: {produto.quantidade_estoque}")
             self.itens[produto] += quantidade
         else:
@@ -34,9 +46,14 @@ class Carrinho:
 
         if self.itens[produto] > quantidade:
             self.itens[produto] -= quantidade
+            # Se o estoque caiu abaixo da nova quantidade, a reserva é liberada (o checkout revalida)
+            if self.reservas is not None and not self.reservas.reservar(self.id_carrinho, produto, self.itens[produto]):
+                self.reservas.liberar(self.id_carrinho, produto.id_produto)
         else:
             # Se a quantidade a remover for maior ou igual, remove o produto
             del self.itens[produto]
+            if self.reservas is not None:
+                self.reservas.liberar(self.id_carrinho, produto.id_produto)
 
     def atualizar_quantidade(self, produto: Produto, nova_quantidade: int):
         # Verifica se a nova quantidade é válida
@@ -49,8 +66,10 @@ class Carrinho:
         if nova_quantidade == 0:
             # Remove o produto se a nova quantidade for zero
             del self.itens[produto]
+            if self.reservas is not None:
+                self.reservas.liberar(self.id_carrinho, produto.id_produto)
         else:
-            if not produto.verificar_disponibilidade(nova_quantidade):
+            if not self._reservar(produto, nova_quantidade):
                 raise ValueError(f"Estoque insuficiente para atualizar para {nova_quantidade} unidade(s) de {produto.nome}.")
             # Atualiza a quantidade do produto no carrinho
             self.itens[produto] = nova_quantidade
@@ -71,6 +90,8 @@ class Carrinho:
 
     def limpar_carrinho(self): # Esvazia o carrinho
         self.itens = {} 
+        if self.reservas is not None:
+            self.reservas.liberar(self.id_carrinho)
 
     def obter_itens(self) -> Dict[Produto, int]:
         return self.itens
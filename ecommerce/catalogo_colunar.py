@@ -0,0 +1,139 @@
+from array import array
+from typing import Dict, Iterable, List, Optional
+from .produto import Produto
+
+try: # NumPy é opcional: com ele as agregações são vetorizadas sobre as mesmas colunas
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class CatalogoColunar:
+    """Cópia colunar do catálogo (ids, preços, estoques e códigos de categoria) para varreduras analíticas.
+
+    As colunas são arrays contíguos (array.array). Com NumPy instalado as agregações usam
+    np.frombuffer sobre esses arrays, sem cópia; sem NumPy usam as funções nativas do Python.
+    """
+
+    def __init__(self):
+        self._ids = array("q")
+        self._precos = array("d")
+        self._estoques = array("q")
+        self._categorias = array("q") # código da categoria, ver _nomes_categorias
+        self._linhas: Dict[int, int] = {} # id_produto -> linha nas colunas
+        self._codigos_categorias: Dict[str, int] = {}
+        self._nomes_categorias: List[str] = []
+
+    def _codigo_categoria(self, categoria: str) -> int:
+        codigo = self._codigos_categorias.get(categoria)
+        if codigo is None:
+            codigo = self._codigos_categorias[categoria] = len(self._nomes_categorias)
+            self._nomes_categorias.append(categoria)
+        return codigo
+
+    # --- Sincronização com o catálogo ---
+
+    def adicionar(self, produto: Produto):
+        if produto.id_produto in self._linhas:
+            raise ValueError(f"Produto com ID {produto.id_produto} já existe no catálogo colunar.")
+        valores = (produto.id_produto, produto.preco, produto.quantidade_estoque, self._codigo_categoria(produto.categoria))
+        colunas = (self._ids, self._precos, self._estoques, self._categorias)
+        # Um append pode falhar no meio (valor fora do typecode, ou BufferError com uma visão NumPy viva):
+        # desfaz as colunas já estendidas e só registra a linha depois que todas receberam o valor
+        estendidas = []
+        try:
+            for coluna, valor in zip(colunas, valores):
+                coluna.append(valor)
+                estendidas.append(coluna)
+        except Exception:
+            for coluna in estendidas:
+                coluna.pop()
+            raise
+        self._linhas[produto.id_produto] = len(self._ids) - 1
+
+    def adicionar_lote(self, produtos: Iterable[Produto]):
+        for produto in produtos:
+            self.adicionar(produto)
+
+    def remover(self, produto: Produto):
+        # Move a última linha para a posição removida, mantendo as colunas sem buracos
+        linha = self._linhas.pop(produto.id_produto, None)
+        if linha is None:
+            return
+        ultima = len(self._ids) - 1
+        if linha != ultima:
+            for coluna in (self._ids, self._precos, self._estoques, self._categorias):
+                coluna[linha] = coluna[ultima]
+            self._linhas[self._ids[linha]] = linha
+        for coluna in (self._ids, self._precos, self._estoques, self._categorias):
+            coluna.pop()
+
+    def atualizar(self, produto: Produto):
+        linha = self._linhas.get(produto.id_produto)
+        if linha is None:
+            return
+        self._precos[linha] = produto.preco
+        self._estoques[linha] = produto.quantidade_estoque
+        self._categorias[linha] = self._codigo_categoria(produto.categoria)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # --- Agregações ---
+
+    @staticmethod
+    def _vetor(coluna: array):
+        # Visão NumPy sem cópia sobre a coluna; os typecodes "q" e "d" são aceitos como dtype
+        return np.frombuffer(coluna, dtype=coluna.typecode) if coluna else np.empty(0, dtype=coluna.typecode)
+
+    def _somar_por_categoria(self, valores) -> List[float]:
+        # Soma `valores` (sequência alinhada às linhas, ou None para contar linhas) por código de categoria
+        if np is not None:
+            return np.bincount(self._vetor(self._categorias), weights=valores, minlength=len(self._nomes_categorias)).tolist()
+        somas = [0] * len(self._nomes_categorias)
+        if valores is None:
+            for codigo in self._categorias:
+                somas[codigo] += 1
+        else:
+            for codigo, valor in zip(self._categorias, valores):
+                somas[codigo] += valor
+        return somas
+
+    def _agrupar(self, somas: List[float], conversao) -> Dict:
+        return {categoria: conversao(somas[codigo]) for codigo, categoria in enumerate(self._nomes_categorias) if somas[codigo]}
+
+    def estoque_total(self) -> int:
+        if np is not None:
+            return int(self._vetor(self._estoques).sum())
+        return sum(self._estoques)
+
+    def valor_total_estoque(self) -> float: # soma de preço * quantidade em estoque
+        if np is not None:
+            return float(np.dot(self._vetor(self._precos), self._vetor(self._estoques)))
+        return sum(preco * estoque for preco, estoque in zip(self._precos, self._estoques))
+
+    def quantidade_sem_estoque(self) -> int:
+        if np is not None:
+            return int(np.count_nonzero(self._vetor(self._estoques) == 0))
+        return self._estoques.tolist().count(0)
+
+    def preco_medio(self) -> float:
+        if not self._precos:
+            return 0.0
+        if np is not None:
+            return float(self._vetor(self._precos).mean())
+        return sum(self._precos) / len(self._precos)
+
+    def produtos_por_categoria(self) -> Dict[str, int]:
+        return self._agrupar(self._somar_por_categoria(None), int)
+
+    def estoque_por_categoria(self) -> Dict[str, int]:
+        valores = self._vetor(self._estoques) if np is not None else self._estoques
+        return self._agrupar(self._somar_por_categoria(valores), int)
+
+    def valor_estoque_por_categoria(self) -> Dict[str, float]:
+        if np is not None:
+            valores = self._vetor(self._precos) * self._vetor(self._estoques)
+        else:
+            valores = [preco * estoque for preco, estoque in zip(self._precos, self._estoques)]
+        return self._agrupar(self._somar_por_categoria(valores), float)
@@ -0,0 +1,172 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+from .pedido import StatusPedido
+from .sistema_ecommerce import SistemaEcommerce
+
+STATUS_PAGAVEIS = (StatusPedido.PENDENTE, StatusPedido.FALHA_PAGAMENTO)
+
+
+class DespachantePagamentos:
+    """Processa pagamentos de pedidos em segundo plano com um pool de threads e uma fila limitada.
+
+    `enviar` só valida e enfileira o pedido, então o checkout não espera o gateway. Os trabalhadores
+    retiram os pedidos da fila e chamam SistemaEcommerce.processar_pagamento_pedido (que leva o pedido
+    por PROCESSANDO_PAGAMENTO até PAGO ou FALHA_PAGAMENTO). Com a fila cheia, `enviar` devolve None:
+    é o sinal de contrapressão para o chamador tentar mais tarde ou recusar a requisição.
+    """
+
+    def __init__(self, sistema: SistemaEcommerce, num_trabalhadores: int = 4, capacidade_fila: int = 1000,
+                 amostras_latencia: int = 1000):
+        if num_trabalhadores <= 0:
+            raise ValueError("num_trabalhadores deve ser positivo.")
+        if capacidade_fila <= 0:
+            raise ValueError("capacidade_fila deve ser positiva.")
+        self.sistema = sistema
+        self.num_trabalhadores = num_trabalhadores
+        self.capacidade_fila = capacidade_fila
+        self._fila: "queue.Queue" = queue.Queue(maxsize=capacidade_fila)
+        self._trabalhadores = []
+        self._trava = threading.Lock()
+        self._em_andamento: set = set() # pedidos na fila ou sendo processados (evita pagamento em dobro)
+        # Métricas
+        self.enviados = 0
+        self.rejeitados = 0
+        self.aprovados = 0
+        self.recusados = 0
+        self._soma_espera = 0.0
+        self._soma_processamento = 0.0
+        self._esperas: deque = deque(maxlen=amostras_latencia) # amostras recentes para percentis
+        self._processamentos: deque = deque(maxlen=amostras_latencia)
+
+    # --- Ciclo de vida ---
+
+    def iniciar(self):
+        if self._trabalhadores:
+            return
+        for i in range(self.num_trabalhadores):
+            trabalhador = threading.Thread(target=self._trabalhar, name=f"pagamentos-{i}", daemon=True)
+            trabalhador.start()
+            self._trabalhadores.append(trabalhador)
+
+    def parar(self, timeout: Optional[float] = None):
+        # Processa o que já está na fila e encerra os trabalhadores
+        for _ in self._trabalhadores:
+            self._fila.put(None)
+        for trabalhador in self._trabalhadores:
+            trabalhador.join(timeout)
+        self._trabalhadores = []
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *excecao):
+        self.parar()
+
+    # --- Envio ---
+
+    def enviar(self, id_pedido: str, dados_pagamento: Dict[str, Any], timeout: float = 0,
+               chave_idempotencia: Optional[str] = None) -> Optional[Future]:
+        # Enfileira o pagamento e retorna um Future com o resultado (bool); None se a fila estiver cheia.
+        # Com timeout > 0, espera até esse tempo por uma vaga antes de desistir.
+        # Com chave_idempotencia, a chave é reservada já no envio: repetições devolvem o mesmo Future,
+        # esteja o pagamento na fila, em processamento ou concluído.
+        if chave_idempotencia is None:
+            futuro: Future = Future()
+        else:
+            futuro, novo = self.sistema.idempotencia.reservar(chave_idempotencia, id_pedido)
+            if not novo:
+                return futuro
+        try:
+            self._validar_envio(id_pedido)
+            self._fila.put((id_pedido, dados_pagamento, chave_idempotencia, futuro, time.perf_counter()), block=timeout > 0, timeout=timeout or None)
+        except queue.Full as e:
+            with self._trava:
+                self._em_andamento.discard(id_pedido)
+                self.rejeitados += 1
+            self._liberar_chave(chave_idempotencia, futuro, e)
+            return None
+        except ValueError as e:
+            self._liberar_chave(chave_idempotencia, futuro, e)
+            raise
+        with self._trava:
+            self.enviados += 1
+        return futuro
+
+    def _validar_envio(self, id_pedido: str):
+        pedido = self.sistema.buscar_pedido_por_id(id_pedido)
+        if not pedido:
+            raise ValueError(f"Pedido com ID {id_pedido} não encontrado.")
+        if pedido.status not in STATUS_PAGAVEIS:
+            raise ValueError(f"Pedido {id_pedido} não está pendente de pagamento (Status: {pedido.status.name}).")
+        with self._trava:
+            if id_pedido in self._em_andamento:
+                raise ValueError(f"Pagamento do pedido {id_pedido} já está em processamento.")
+            self._em_andamento.add(id_pedido)
+
+    def _liberar_chave(self, chave_idempotencia: Optional[str], futuro: Future, erro: BaseException):
+        # Envio não aceito: a chave volta a ficar livre e quem já aguardava o Future recebe o erro
+        if chave_idempotencia is not None:
+            self.sistema.idempotencia.falhar(chave_idempotencia, futuro, erro)
+
+    # --- Trabalhadores ---
+
+    def _trabalhar(self):
+        while True:
+            tarefa = self._fila.get()
+            if tarefa is None:
+                return
+            id_pedido, dados_pagamento, chave_idempotencia, futuro, enfileirado_em = tarefa
+            inicio = time.perf_counter()
+            try: # a chave já foi reservada no envio: o pagamento roda direto e conclui o Future da reserva
+                sucesso = self.sistema.processar_pagamento_pedido(id_pedido, dados_pagamento)
+            except Exception as e: # processar_pagamento_pedido já trata falhas do gateway; isto é defensivo
+                sucesso = None
+                if chave_idempotencia is not None:
+                    self.sistema.idempotencia.falhar(chave_idempotencia, futuro, e)
+                else:
+                    futuro.set_exception(e)
+            fim = time.perf_counter()
+            with self._trava:
+                self._em_andamento.discard(id_pedido)
+                self._soma_espera += inicio - enfileirado_em
+                self._soma_processamento += fim - inicio
+                self._esperas.append(inicio - enfileirado_em)
+                self._processamentos.append(fim - inicio)
+                if sucesso:
+                    self.aprovados += 1
+                else:
+                    self.recusados += 1
+            if sucesso is not None:
+                futuro.set_result(sucesso)
+
+    # --- Métricas ---
+
+    @staticmethod
+    def _percentil(amostras, percentual: float) -> float:
+        if not amostras:
+            return 0.0
+        ordenadas = sorted(amostras)
+        return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * percentual))]
+
+    def metricas(self) -> Dict[str, Any]:
+        # Tempos em segundos; médias sobre todos os pagamentos, percentis sobre as amostras recentes
+        with self._trava:
+            processados = self.aprovados + self.recusados
+            return {
+                "profundidade_fila": self._fila.qsize(),
+                "capacidade_fila": self.capacidade_fila,
+                "em_andamento": len(self._em_andamento),
+                "enviados": self.enviados,
+                "rejeitados": self.rejeitados,
+                "aprovados": self.aprovados,
+                "recusados": self.recusados,
+                "espera_media": self._soma_espera / processados if processados else 0.0,
+                "espera_p95": self._percentil(self._esperas, 0.95),
+                "latencia_media": self._soma_processamento / processados if processados else 0.0,
+                "latencia_p95": self._percentil(self._processamentos, 0.95),
+            }
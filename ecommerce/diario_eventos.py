@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class DiarioEventos:
+    """Diário append-only (JSON Lines) com commit em grupo e snapshots compactos.
+
+    Cada evento recebe um número de sequência crescente. Os eventos ficam num buffer em memória e
+    são gravados com um único write + fsync quando o buffer atinge `eventos_por_lote` ou quando
+    `intervalo_fsync` segundos se passaram desde a última gravação (commit em grupo). Se nenhum evento
+    novo chegar, um temporizador grava o buffer ao fim do intervalo, então um evento nunca fica mais
+    que `intervalo_fsync` segundos só em memória. Um snapshot
+    grava o estado completo com a sequência do último evento incluído e trunca o diário, então a
+    recuperação lê o snapshot mais recente e reaplica só a cauda do diário.
+
+    Eventos ainda no buffer se perdem numa queda do processo; chame descarregar() quando precisar
+    de durabilidade imediata (ex.: antes de confirmar algo para o cliente).
+    """
+
+    ARQUIVO_DIARIO = "diario.jsonl"
+    ARQUIVO_SNAPSHOT = "snapshot.json"
+
+    def __init__(self, diretorio: str, eventos_por_lote: int = 256, intervalo_fsync: float = 0.05,
+                 eventos_por_snapshot: Optional[int] = 100_000, fsync: bool = True):
+        if eventos_por_lote <= 0:
+            raise ValueError("eventos_por_lote deve ser positivo.")
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.eventos_por_lote = eventos_por_lote
+        self.intervalo_fsync = intervalo_fsync
+        self.eventos_por_snapshot = eventos_por_snapshot # None desativa snapshots automáticos
+        self.fsync = fsync
+
+        self._caminho_diario = os.path.join(diretorio, self.ARQUIVO_DIARIO)
+        self._caminho_snapshot = os.path.join(diretorio, self.ARQUIVO_SNAPSHOT)
+        self._trava = threading.Lock()
+        self._buffer: List[str] = []
+        self._ultima_gravacao = time.monotonic()
+        self._temporizador: Optional[threading.Timer] = None # grava o buffer se nenhum evento novo chegar a tempo
+        self._eventos_desde_snapshot = 0
+        self._descartar_linha_incompleta()
+        self._sequencia = self._ultima_sequencia_em_disco()
+        self._arquivo = open(self._caminho_diario, "a", encoding="utf-8")
+
+    # --- Escrita ---
+
+    def registrar(self, tipo: str, dados: Dict[str, Any]) -> int:
+        # Custo típico: um json.dumps e um append; o fsync é amortizado pelo lote
+        with self._trava:
+            self._sequencia += 1
+            self._buffer.append(json.dumps({"seq": self._sequencia, "tipo": tipo, "dados": dados}, separators=(",", ":")))
+            self._eventos_desde_snapshot += 1
+            restante = self._ultima_gravacao + self.intervalo_fsync - time.monotonic()
+            if len(self._buffer) >= self.eventos_por_lote or restante <= 0:
+                self._gravar_buffer()
+            elif self._temporizador is None:
+                self._temporizador = threading.Timer(restante, self._gravar_por_tempo)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+            return self._sequencia
+
+    def _gravar_por_tempo(self): # roda na thread do temporizador
+        with self._trava:
+            if self._temporizador is threading.current_thread(): # não foi cancelado nem substituído
+                self._temporizador = None
+                if not self._arquivo.closed:
+                    self._gravar_buffer()
+
+    def _gravar_buffer(self): # chamado com a trava adquirida
+        if self._temporizador is not None: # a gravação já cobre o que o temporizador esperava
+            self._temporizador.cancel()
+            self._temporizador = None
+        if self._buffer:
+            self._arquivo.write("\n".join(self._buffer) + "\n")
+            self._buffer.clear()
+            self._arquivo.flush()
+            if self.fsync:
+                os.fsync(self._arquivo.fileno())
+        self._ultima_gravacao = time.monotonic()
+
+    def descarregar(self): # força a gravação (write + fsync) dos eventos pendentes
+        with self._trava:
+            self._gravar_buffer()
+
+    def precisa_snapshot(self) -> bool:
+        return self.eventos_por_snapshot is not None and self._eventos_desde_snapshot >= self.eventos_por_snapshot
+
+    def salvar_snapshot(self, gerar_estado: Callable[[], Dict[str, Any]]):
+        # Grava o estado de forma atômica (arquivo temporário + os.replace) e então trunca o diário.
+        # Se o processo cair entre as duas etapas, a recuperação ignora os eventos já cobertos pelo snapshot.
+        # gerar_estado roda com a trava do diário: nenhum evento entra entre a leitura do estado e a
+        # sequência gravada no snapshot, então o truncamento não descarta eventos que o estado não cobre.
+        with self._trava:
+            self._gravar_buffer()
+            estado = gerar_estado()
+            caminho_temporario = self._caminho_snapshot + ".tmp"
+            with open(caminho_temporario, "w", encoding="utf-8") as arquivo:
+                json.dump({"seq": self._sequencia, "estado": estado}, arquivo, separators=(",", ":"))
+                arquivo.flush()
+                if self.fsync:
+                    os.fsync(arquivo.fileno())
+            os.replace(caminho_temporario, self._caminho_snapshot)
+            self._arquivo.close()
+            self._arquivo = open(self._caminho_diario, "w", encoding="utf-8")
+            self._eventos_desde_snapshot = 0
+
+    def fechar(self):
+        with self._trava:
+            self._gravar_buffer()
+            self._arquivo.close()
+
+    # --- Leitura / recuperação ---
+
+    def _ler_snapshot(self) -> Tuple[int, Optional[Dict[str, Any]]]:
+        if not os.path.exists(self._caminho_snapshot):
+            return 0, None
+        with open(self._caminho_snapshot, encoding="utf-8") as arquivo:
+            conteudo = json.load(arquivo)
+        return conteudo["seq"], conteudo["estado"]
+
+    def _ler_eventos(self) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(self._caminho_diario):
+            return
+        with open(self._caminho_diario, encoding="utf-8") as arquivo:
+            for linha in arquivo:
+                if not linha.strip():
+                    continue
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError: # última linha incompleta (queda durante a escrita)
+                    return
+
+    def _descartar_linha_incompleta(self):
+        # Uma queda no meio de um write deixa a última linha sem "\n"; ela é truncada antes de novos appends
+        if not os.path.exists(self._caminho_diario):
+            return
+        with open(self._caminho_diario, "rb+") as arquivo:
+            tamanho = arquivo.seek(0, os.SEEK_END)
+            if tamanho == 0:
+                return
+            arquivo.seek(tamanho - 1)
+            if arquivo.read(1) == b"\n":
+                return
+            posicao = tamanho - 1
+            while posicao > 0: # procura o último "\n" de trás para frente, em blocos
+                inicio = max(0, posicao - 4096)
+                arquivo.seek(inicio)
+                fim_linha = arquivo.read(posicao - inicio).rfind(b"\n")
+                if fim_linha != -1:
+                    arquivo.truncate(inicio + fim_linha + 1)
+                    return
+                posicao = inicio
+            arquivo.truncate(0)
+
+    def _ultima_sequencia_em_disco(self) -> int:
+        sequencia, _ = self._ler_snapshot()
+        for evento in self._ler_eventos():
+            sequencia = max(sequencia, evento["seq"])
+        return sequencia
+
+    def carregar(self) -> Tuple[Optional[Dict[str, Any]], Iterator[Dict[str, Any]]]:
+        # Retorna (estado do snapshot ou None, eventos posteriores ao snapshot em ordem)
+        sequencia_snapshot, estado = self._ler_snapshot()
+        eventos = (evento for evento in self._ler_eventos() if evento["seq"] > sequencia_snapshot)
+        return estado, eventos
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+
+class JanelaDeslizante:
+    """Quantidade e soma de valores por chave nos últimos `janela` segundos.
+
+    A janela é dividida em `baldes` intervalos fixos num vetor circular, com os totais mantidos à
+    parte: registrar e consultar custam O(1) amortizado (cada balde é zerado uma vez por volta) e a
+    precisão é de um balde (janela / baldes). A memória é limitada: no máximo `max_chaves` chaves,
+    descartando as usadas há mais tempo (LRU), cada uma com dois vetores de `baldes` posições.
+    """
+
+    def __init__(self, janela: float = 600.0, baldes: int = 10, max_chaves: int = 100_000):
+        if janela <= 0 or baldes <= 0 or max_chaves <= 0:
+            raise ValueError("janela, baldes e max_chaves devem ser positivos.")
+        self.janela = janela
+        self.baldes = baldes
+        self.max_chaves = max_chaves
+        self._largura = janela / baldes
+        # chave -> [balde atual, quantidade total, valor total, quantidades por balde, valores por balde]
+        self._contadores: "OrderedDict[Hashable, list]" = OrderedDict()
+
+    def _avancar(self, contador: list, balde: int):
+        # Zera os baldes que saíram da janela desde o último registro da chave
+        passos = balde - contador[0]
+        if passos <= 0:
+            return
+        quantidades, valores = contador[3], contador[4]
+        if passos >= self.baldes:
+            quantidades[:] = [0] * self.baldes
+            valores[:] = [0.0] * self.baldes
+            contador[1], contador[2] = 0, 0.0
+        else:
+            for passo in range(1, passos + 1):
+                posicao = (contador[0] + passo) % self.baldes
+                contador[1] -= quantidades[posicao]
+                contador[2] -= valores[posicao]
+                quantidades[posicao] = 0
+                valores[posicao] = 0.0
+        contador[0] = balde
+
+    def registrar(self, chave: Hashable, valor: float, agora: float) -> Tuple[int, float]:
+        # Soma a transação à janela da chave e retorna (quantidade, valor) na janela, já incluindo esta
+        balde = int(agora // self._largura)
+        contador = self._contadores.get(chave)
+        if contador is None:
+            contador = self._contadores[chave] = [balde, 0, 0.0, [0] * self.baldes, [0.0] * self.baldes]
+            if len(self._contadores) > self.max_chaves:
+                self._contadores.popitem(last=False)
+        else:
+            self._contadores.move_to_end(chave)
+            self._avancar(contador, balde)
+        posicao = balde % self.baldes
+        contador[3][posicao] += 1
+        contador[4][posicao] += valor
+        contador[1] += 1
+        contador[2] += valor
+        return contador[1], contador[2]
+
+    def consultar(self, chave: Hashable, agora: float) -> Tuple[int, float]:
+        contador = self._contadores.get(chave)
+        if contador is None:
+            return 0, 0.0
+        self._avancar(contador, int(agora // self._largura))
+        return contador[1], contador[2]
+
+    def __len__(self) -> int:
+        return len(self._contadores)
+
+
+class MotorFraude:
+    """Pontuação de fraude por regras, com contadores de velocidade por cliente e por cartão.
+
+    Cada pagamento soma pontos pelas regras que dispara e é bloqueado quando a pontuação atinge
+    `limiar_bloqueio`. Regras:
+      - valor a partir de `valor_alto` (+40) ou de `valor_maximo` (+100);
+      - mais de `parcelas_usuais` parcelas (+30) ou parcela menor que `parcela_minima` (+20);
+      - velocidade na janela (`janela` segundos) por cliente e por cartão: mais transações que
+        `max_transacoes_cliente`/`max_transacoes_cartao` (+70) ou valor acumulado acima de
+        `max_valor_cliente`/`max_valor_cartao` (+40).
+
+    `dados_pagamento` traz "valor" e "metodo" e, quando conhecidos, "num_parcelas", "id_cliente",
+    "token_cartao" (token ou impressão digital do cartão emitido pelo gateway) e "cartao" (número
+    completo). A velocidade por cartão usa o token quando há um; senão, o número completo passado por
+    um BLAKE2b com `chave_hash` (só o resumo fica guardado). Números mascarados ("**** **** **** 1234")
+    não identificam o cartão e ficam fora dessa regra. Com vários processos, passe a mesma `chave_hash`
+    a todos; o padrão é uma chave aleatória por processo. Tentativas bloqueadas também contam na
+    velocidade, para pegar sequências de testes de cartão.
+    """
+
+    def __init__(self, limiar_bloqueio: int = 70, valor_alto: float = 10_000.0, valor_maximo: float = 50_000.0,
+                 parcelas_usuais: int = 12, parcela_minima: float = 5.0, janela: float = 600.0,
+                 max_transacoes_cliente: int = 20, max_valor_cliente: float = 30_000.0,
+                 max_transacoes_cartao: int = 10, max_valor_cartao: float = 20_000.0,
+                 max_chaves: int = 100_000, baldes: int = 10, relogio: Callable[[], float] = time.monotonic,
+                 chave_hash: Optional[bytes] = None):
+        self.limiar_bloqueio = limiar_bloqueio
+        self.valor_alto = valor_alto
+        self.valor_maximo = valor_maximo
+        self.parcelas_usuais = parcelas_usuais
+        self.parcela_minima = parcela_minima
+        self.max_transacoes_cliente = max_transacoes_cliente
+        self.max_valor_cliente = max_valor_cliente
+        self.max_transacoes_cartao = max_transacoes_cartao
+        self.max_valor_cartao = max_valor_cartao
+        self._relogio = relogio
+        self._chave_hash = chave_hash if chave_hash is not None else os.urandom(32)
+        self._trava = threading.Lock()
+        self.por_cliente = JanelaDeslizante(janela, baldes, max_chaves)
+        self.por_cartao = JanelaDeslizante(janela, baldes, max_chaves)
+        self.avaliacoes = 0
+        self.bloqueios = 0
+
+    def _chave_cartao(self, dados_pagamento: dict) -> Optional[bytes]:
+        # Resumo estável do cartão para a janela de velocidade; None se o cartão não pode ser identificado
+        token = dados_pagamento.get("token_cartao")
+        if token:
+            material = b"token:" + str(token).encode("utf-8")
+        else:
+            digitos = str(dados_pagamento.get("cartao") or "").replace(" ", "").replace("-", "")
+            if not (digitos.isdigit() and 12 <= len(digitos) <= 19): # mascarado, truncado ou ausente
+                return None
+            material = b"pan:" + digitos.encode("ascii")
+        return hashlib.blake2b(material, key=self._chave_hash, digest_size=16).digest()
+
+    def avaliar(self, dados_pagamento: dict) -> Tuple[int, List[str]]:
+        # Registra a transação nos contadores e retorna (pontuação, motivos)
+        valor = float(dados_pagamento.get("valor", 0))
+        num_parcelas = dados_pagamento.get("num_parcelas") or 1
+        id_cliente = dados_pagamento.get("id_cliente")
+        chave_cartao = self._chave_cartao(dados_pagamento)
+        pontuacao = 0
+        motivos: List[str] = []
+
+        if valor >= self.valor_maximo:
+            pontuacao += 100
+            motivos.append("valor acima do máximo")
+        elif valor >= self.valor_alto:
+            pontuacao += 40
+            motivos.append("valor alto")
+        if num_parcelas > self.parcelas_usuais:
+            pontuacao += 30
+            motivos.append("parcelas acima do usual")
+        elif num_parcelas > 1 and valor / num_parcelas < self.parcela_minima:
+            pontuacao += 20
+            motivos.append("parcela muito pequena")
+
+        with self._trava:
+            agora = self._relogio()
+            self.avaliacoes += 1
+            if id_cliente is not None:
+                quantidade, total = self.por_cliente.registrar(id_cliente, valor, agora)
+                if quantidade > self.max_transacoes_cliente:
+                    pontuacao += 70
+                    motivos.append("muitas transações do cliente")
+                if total > self.max_valor_cliente:
+                    pontuacao += 40
+                    motivos.append("valor acumulado do cliente")
+            if chave_cartao is not None:
+                quantidade, total = self.por_cartao.registrar(chave_cartao, valor, agora)
+                if quantidade > self.max_transacoes_cartao:
+                    pontuacao += 70
+                    motivos.append("muitas transações do cartão")
+                if total > self.max_valor_cartao:
+                    pontuacao += 40
+                    motivos.append("valor acumulado do cartão")
+            if pontuacao >= self.limiar_bloqueio:
+                self.bloqueios += 1
+        return pontuacao, motivos
+
+    def aprovar(self, dados_pagamento: dict) -> bool: # True se não há suspeita de fraude
+        return self.avaliar(dados_pagamento)[0] < self.limiar_bloqueio
+
+    def metricas(self) -> dict[str, Any]:
+        return {"avaliacoes": self.avaliacoes, "bloqueios": self.bloqueios,
+                "clientes_monitorados": len(self.por_cliente), "cartoes_monitorados": len(self.por_cartao)}
@@ -0,0 +1,163 @@
+import asyncio
+import math
+import random
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Optional, Protocol, runtime_checkable
+
+
+@runtime_checkable
+class GatewayPagamento(Protocol):
+    """Operações que o SistemaPagamento delega ao gateway de pagamento.
+
+    Um gateway pode oferecer também `autorizar_async`, `verificar_fraude_async` e `reembolsar_async`
+    (corrotinas com a mesma assinatura); sem elas, as versões assíncronas do SistemaPagamento chamam
+    as síncronas. Para SistemaPagamento.processar_lote, pode oferecer `autorizar_lote(itens)` e
+    `verificar_fraude_lote(dados_pagamentos)`, que recebem listas e devolvem uma lista de bool.
+
+    Um gateway que deduplica cobranças por chave declara `aceita_chave_idempotencia = True` e recebe
+    `chave_idempotencia=` em autorizar, autorizar_lote e reembolsar (e nas versões assíncronas), a
+    mesma em todas as tentativas: só então a ResilienciaGateway repete essas chamadas após um timeout.
+    """
+
+    def autorizar(self, valor: Decimal, metodo: str) -> bool: ...
+
+    def verificar_fraude(self, dados_pagamento: dict) -> bool: ... # True se não há suspeita de fraude
+
+    def reembolsar(self, id_transacao_original: str, valor: Decimal) -> bool: ...
+
+
+class GatewayAleatorio:
+    """Gateway padrão: respostas instantâneas sorteadas (90% de aprovação, 95% de reembolso).
+
+    A detecção de fraude fica com o MotorFraude do SistemaPagamento; `taxa_fraude` simula uma
+    recusa adicional do antifraude do gateway e é 0 por padrão.
+    """
+
+    def __init__(self, taxa_aprovacao: float = 0.9, taxa_fraude: float = 0.0, taxa_reembolso: float = 0.95,
+                 semente: Optional[int] = None):
+        self.taxa_aprovacao = taxa_aprovacao
+        self.taxa_fraude = taxa_fraude
+        self.taxa_reembolso = taxa_reembolso
+        # Sem semente usa o gerador global do módulo random (quem chama random.seed continua controlando o sorteio)
+        self._aleatorio = random.Random(semente) if semente is not None else random
+
+    def autorizar(self, valor: Decimal, metodo: str) -> bool:
+        return self._aleatorio.random() < self.taxa_aprovacao
+
+    def verificar_fraude(self, dados_pagamento: dict) -> bool:
+        return not self._aleatorio.random() < self.taxa_fraude
+
+    def reembolsar(self, id_transacao_original: str, valor: Decimal) -> bool:
+        return self._aleatorio.random() < self.taxa_reembolso
+
+
+class GatewayLocalSimulado:
+    """Gateway local, sem rede, que simula a latência e as falhas de um gateway real.
+
+    Distribuições de latência (`distribuicao`), com `latencia` em segundos:
+      - "fixa": toda chamada leva `latencia`;
+      - "lognormal": mediana `latencia` e dispersão `sigma` (cauda longa à direita);
+      - "picos": `latencia`, mas com probabilidade `prob_pico` a chamada leva `latencia * fator_pico`.
+
+    Com probabilidade `taxa_timeout` o gateway não responde: a chamada espera `timeout` segundos e
+    levanta TimeoutError. Com probabilidade `taxa_falha` a autorização ou o reembolso é recusado
+    (retorno False) e com `taxa_fraude` a verificação acusa fraude. Com `semente`, a sequência de
+    sorteios é reprodutível (em uma única thread; com várias, a ordem das chamadas também conta).
+    Aceita chaves de idempotência; como nada é cobrado de verdade, a chave não muda a resposta.
+    """
+
+    DISTRIBUICOES = ("fixa", "lognormal", "picos")
+    aceita_chave_idempotencia = True
+
+    def __init__(self, distribuicao: str = "fixa", latencia: float = 0.05, sigma: float = 0.5,
+                 prob_pico: float = 0.01, fator_pico: float = 20.0, taxa_falha: float = 0.0,
+                 taxa_timeout: float = 0.0, taxa_fraude: float = 0.0, timeout: float = 1.0,
+                 semente: Optional[int] = None, dormir: Callable[[float], None] = time.sleep):
+        if distribuicao not in self.DISTRIBUICOES:
+            raise ValueError(f"Distribuição de latência inválida: {distribuicao}. Opções: {', '.join(self.DISTRIBUICOES)}.")
+        if latencia < 0 or timeout < 0:
+            raise ValueError("latencia e timeout não podem ser negativos.")
+        for nome, taxa in (("prob_pico", prob_pico), ("taxa_falha", taxa_falha), ("taxa_timeout", taxa_timeout), ("taxa_fraude", taxa_fraude)):
+            if not 0 <= taxa <= 1:
+                raise ValueError(f"{nome} deve estar entre 0 e 1.")
+        self.distribuicao = distribuicao
+        self.latencia = latencia
+        self.sigma = sigma
+        self.prob_pico = prob_pico
+        self.fator_pico = fator_pico
+        self.taxa_falha = taxa_falha
+        self.taxa_timeout = taxa_timeout
+        self.taxa_fraude = taxa_fraude
+        self.timeout = timeout
+        self._dormir = dormir
+        self._aleatorio = random.Random(semente)
+        self._trava = threading.Lock() # os sorteios de uma chamada saem juntos da sequência da semente
+        self.chamadas = 0
+        self.timeouts = 0
+
+    def _sortear_latencia(self) -> float:
+        if self.distribuicao == "lognormal":
+            return self._aleatorio.lognormvariate(math.log(self.latencia), self.sigma) if self.latencia > 0 else 0.0
+        if self.distribuicao == "picos" and self._aleatorio.random() < self.prob_pico:
+            return self.latencia * self.fator_pico
+        return self.latencia
+
+    def _sortear(self, taxa_negativa: float) -> tuple[float, bool, bool]:
+        # (espera, estourou o timeout, resposta positiva) de uma chamada
+        with self._trava:
+            self.chamadas += 1
+            if self._aleatorio.random() < self.taxa_timeout:
+                self.timeouts += 1
+                return self.timeout, True, False
+            latencia = self._sortear_latencia()
+            return latencia, False, not self._aleatorio.random() < taxa_negativa
+
+    def _responder(self, taxa_negativa: float) -> bool:
+        espera, estourou, resposta = self._sortear(taxa_negativa)
+        self._dormir(espera)
+        if estourou:
+            raise TimeoutError(f"Gateway simulado não respondeu em {self.timeout}s.")
+        return resposta
+
+    async def _responder_async(self, taxa_negativa: float) -> bool:
+        espera, estourou, resposta = self._sortear(taxa_negativa)
+        await asyncio.sleep(espera)
+        if estourou:
+            raise TimeoutError(f"Gateway simulado não respondeu em {self.timeout}s.")
+        return resposta
+
+    def autorizar(self, valor: Decimal, metodo: str, chave_idempotencia: Optional[str] = None) -> bool:
+        return self._responder(self.taxa_falha)
+
+    def verificar_fraude(self, dados_pagamento: dict) -> bool:
+        return self._responder(self.taxa_fraude)
+
+    def reembolsar(self, id_transacao_original: str, valor: Decimal, chave_idempotencia: Optional[str] = None) -> bool:
+        return self._responder(self.taxa_falha)
+
+    def _responder_lote(self, taxa_negativa: float, quantidade: int) -> list[bool]:
+        # Uma chamada para vários itens: uma latência e um sorteio de timeout para o lote, uma resposta por item
+        espera, estourou, _ = self._sortear(0.0)
+        with self._trava:
+            respostas = [not self._aleatorio.random() < taxa_negativa for _ in range(quantidade)]
+        self._dormir(espera)
+        if estourou:
+            raise TimeoutError(f"Gateway simulado não respondeu em {self.timeout}s.")
+        return respostas
+
+    def autorizar_lote(self, itens: list[tuple[Decimal, str]], chave_idempotencia: Optional[str] = None) -> list[bool]: # itens: (valor, metodo)
+        return self._responder_lote(self.taxa_falha, len(itens))
+
+    def verificar_fraude_lote(self, dados_pagamentos: list[dict]) -> list[bool]:
+        return self._responder_lote(self.taxa_fraude, len(dados_pagamentos))
+
+    async def autorizar_async(self, valor: Decimal, metodo: str, chave_idempotencia: Optional[str] = None) -> bool:
+        return await self._responder_async(self.taxa_falha)
+
+    async def verificar_fraude_async(self, dados_pagamento: dict) -> bool:
+        return await self._responder_async(self.taxa_fraude)
+
+    async def reembolsar_async(self, id_transacao_original: str, valor: Decimal, chave_idempotencia: Optional[str] = None) -> bool:
+        return await self._responder_async(self.taxa_falha)
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable, Tuple
+
+
+class CacheIdempotencia:
+    """Resultados de operações indexados por chave de idempotência, com capacidade e TTL limitados.
+
+    A primeira requisição com uma chave executa a operação; repetições devolvem o resultado guardado
+    e duplicatas concorrentes aguardam a execução em andamento em vez de iniciar outra. Cada chave fica
+    associada a uma impressão da requisição (ex.: id do pedido): reutilizar a chave para outra
+    requisição é um erro. Exceções não são guardadas, então uma nova tentativa com a mesma chave
+    executa de novo.
+
+    As entradas ficam em ordem de criação e o TTL é o mesmo para todas, então as vencidas estão
+    sempre no início: a expiração e o descarte por capacidade custam O(1) amortizado por entrada.
+    """
+
+    def __init__(self, capacidade: int = 10_000, ttl: float = 24 * 60 * 60, relogio: Callable[[], float] = time.monotonic):
+        if capacidade <= 0:
+            raise ValueError("A capacidade do cache de idempotência deve ser positiva.")
+        if ttl <= 0:
+            raise ValueError("O TTL do cache de idempotência deve ser positivo.")
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self._relogio = relogio
+        self._trava = threading.Lock()
+        self._entradas: "OrderedDict[Hashable, Tuple[Any, Future, float]]" = OrderedDict() # chave -> (impressão, futuro, expira_em)
+        self.acertos = 0
+        self.execucoes = 0
+
+    def _descartar_antigas(self, agora: float): # chamado com a trava adquirida
+        while self._entradas:
+            chave, (_, futuro, expira_em) = next(iter(self._entradas.items()))
+            vencida = expira_em <= agora
+            if not futuro.done() or not (vencida or len(self._entradas) > self.capacidade):
+                return # entradas em andamento não são descartadas
+            del self._entradas[chave]
+
+    def reservar(self, chave: Hashable, impressao: Any) -> Tuple[Future, bool]:
+        # Retorna (futuro, True) para quem deve executar a operação ou (futuro existente, False) para repetições.
+        # Quem recebe True precisa concluir o futuro (set_result) ou chamar falhar(); executar() já faz isso.
+        with self._trava:
+            agora = self._relogio()
+            self._descartar_antigas(agora)
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[2] > agora:
+                if entrada[0] != impressao:
+                    raise ValueError(f"Chave de idempotência '{chave}' já usada em outra requisição.")
+                self.acertos += 1
+                return entrada[1], False
+            futuro: Future = Future()
+            self._entradas[chave] = (impressao, futuro, agora + self.ttl)
+            self._entradas.move_to_end(chave)
+            self.execucoes += 1
+            return futuro, True
+
+    def falhar(self, chave: Hashable, futuro: Future, erro: BaseException):
+        # Libera a chave para uma nova tentativa e repassa o erro a quem aguardava a execução
+        with self._trava:
+            if self._entradas.get(chave, (None, None))[1] is futuro:
+                del self._entradas[chave]
+        futuro.set_exception(erro)
+
+    def executar(self, chave: Hashable, impressao: Any, operacao: Callable[[], Any]) -> Any:
+        futuro, executar = self.reservar(chave, impressao)
+        if not executar:
+            return futuro.result() # bloqueia até a execução em andamento terminar
+        try:
+            resultado = operacao()
+        except BaseException as e:
+            self.falhar(chave, futuro, e)
+            raise
+        futuro.set_result(resultado)
+        return resultado
+
+    async def executar_async(self, chave: Hashable, impressao: Any, operacao: Callable[[], Awaitable[Any]]) -> Any:
+        # Mesma semântica de executar(); duplicatas aguardam sem bloquear o event loop
+        futuro, executar = self.reservar(chave, impressao)
+        if not executar:
+            return await asyncio.wrap_future(futuro)
+        try:
+            resultado = await operacao()
+        except BaseException as e:
+            self.falhar(chave, futuro, e)
+            raise
+        futuro.set_result(resultado)
+        return resultado
+
+    def __len__(self) -> int:
+        return len(self._entradas)
@@ -0,0 +1,90 @@
+import csv
+import json
+import math
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .produto import Produto
+
+# Pipeline de geradores usado por SistemaEcommerce.importar_catalogo:
+# ler_registros -> converter_registros -> em_lotes. Cada etapa processa uma linha por vez,
+# então a memória usada não depende do tamanho do arquivo.
+
+CAMPOS_OBRIGATORIOS = ("id_produto", "nome", "preco", "quantidade_estoque")
+
+
+def detectar_formato(caminho: str) -> str:
+    extensao = caminho.lower().rsplit(".", 1)[-1]
+    if extensao == "csv":
+        return "csv"
+    if extensao in ("jsonl", "ndjson"):
+        return "jsonl"
+    raise ValueError(f"Não foi possível detectar o formato do arquivo '{caminho}'. Use formato='csv' ou 'jsonl'.")
+
+
+def ler_registros_csv(caminho: str) -> Iterator[Tuple[int, Any]]:
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        leitor = csv.DictReader(arquivo)
+        for registro in leitor:
+            yield leitor.line_num, registro # line_num = linha física onde o registro termina
+
+
+def ler_registros_jsonl(caminho: str) -> Iterator[Tuple[int, Any]]:
+    with open(caminho, encoding="utf-8") as arquivo:
+        for numero_linha, linha in enumerate(arquivo, start=1):
+            if not linha.strip():
+                continue
+            try:
+                yield numero_linha, json.loads(linha)
+            except json.JSONDecodeError as e:
+                yield numero_linha, ValueError(f"JSON inválido: {e.msg}")
+
+
+def ler_registros(caminho: str, formato: Optional[str] = None) -> Iterator[Tuple[int, Any]]:
+    formato = formato or detectar_formato(caminho)
+    if formato == "csv":
+        return ler_registros_csv(caminho)
+    if formato == "jsonl":
+        return ler_registros_jsonl(caminho)
+    raise ValueError(f"Formato de importação não suportado: {formato}.")
+
+
+def converter_registro(registro: Dict[str, Any]) -> Produto:
+    if not isinstance(registro, dict):
+        raise ValueError("Registro deve ser um objeto com os campos do produto.")
+    faltando = [campo for campo in CAMPOS_OBRIGATORIOS if registro.get(campo) in (None, "")]
+    if faltando:
+        raise ValueError(f"Campos obrigatórios ausentes: {', '.join(faltando)}.")
+    try:
+        id_produto = int(registro["id_produto"])
+        preco = float(registro["preco"])
+        quantidade_estoque = int(registro["quantidade_estoque"])
+    except (TypeError, ValueError):
+        raise ValueError("id_produto, preco e quantidade_estoque devem ser numéricos.")
+    if not math.isfinite(preco): # float() aceita "nan", "inf" e "1e400"
+        raise ValueError("preco deve ser um número finito.")
+    # As validações de preço e estoque continuam no construtor do Produto
+    return Produto(id_produto, str(registro["nome"]), str(registro.get("descricao") or ""),
+                   preco, quantidade_estoque, str(registro.get("categoria") or ""))
+
+
+def converter_registros(registros: Iterable[Tuple[int, Any]]) -> Iterator[Tuple[int, Optional[Produto], Optional[str]]]:
+    # Produz (linha, produto, None) para registros válidos e (linha, None, motivo) para rejeitados
+    for numero_linha, registro in registros:
+        if isinstance(registro, Exception):
+            yield numero_linha, None, str(registro)
+            continue
+        try:
+            yield numero_linha, converter_registro(registro), None
+        except ValueError as e:
+            yield numero_linha, None, str(e)
+
+
+def em_lotes(iteravel: Iterable, tamanho_lote: int) -> Iterator[List]:
+    if tamanho_lote <= 0:
+        raise ValueError("O tamanho do lote deve ser positivo.")
+    iterador = iter(iteravel)
+    while True:
+        lote = list(islice(iterador, tamanho_lote))
+        if not lote:
+            return
+        yield lote
@@ -0,0 +1,358 @@
+import re
+import unicodedata
+from datetime import datetime
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+from .produto import Produto
+
+_PADRAO_TOKEN = re.compile(r"\w+")
+
+
+def normalizar_texto(texto: str) -> str: # minúsculas e sem acentos ("Monitôr" -> "monitor")
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def tokenizar(texto: str) -> List[str]:
+    return _PADRAO_TOKEN.findall(normalizar_texto(texto))
+
+
+def mesclar_ordenado(lista: List[Any], novos: List[Any]) -> List[Any]:
+    # Devolve uma nova lista ordenada com `lista` (já ordenada) e `novos` (em qualquer ordem). Só os novos são
+    # ordenados; o Timsort reconhece as duas sequências prontas e as intercala numa passada linear em C.
+    # Quem troca a referência pela nova lista não expõe uma lista pela metade a leitores sem trava.
+    if not novos:
+        return lista
+    novos.sort()
+    if lista and novos[0] < lista[-1]:
+        return sorted(lista + novos)
+    return lista + novos
+
+
+def deve_consolidar(pendentes: List[Any], ordenada: List[Any]) -> bool:
+    # Lotes ficam pendentes até somarem o tamanho da lista ordenada: cada entrada é intercalada O(log n) vezes
+    # ao longo de uma carga, em vez de a lista inteira ser percorrida a cada lote (carga quadrática)
+    return len(pendentes) >= len(ordenada)
+
+
+class IndiceNome:
+    """Índice invertido dos tokens normalizados do nome dos produtos."""
+
+    def __init__(self):
+        self._postagens: Dict[str, Dict[int, Produto]] = {} # token -> {id_produto: produto}
+        self._vocabulario: List[str] = [] # tokens ordenados, permite busca por prefixo com bisect
+        self._nomes_indexados: Dict[int, str] = {} # id_produto -> nome normalizado usado na indexação
+        self._tokens_pendentes: List[str] = [] # tokens novos de adicionar_lote ainda fora do vocabulário
+
+    def adicionar(self, produto: Produto):
+        tokens = tokenizar(produto.nome)
+        self._nomes_indexados[produto.id_produto] = " ".join(tokens)
+        for token in tokens:
+            postagem = self._postagens.get(token)
+            if postagem is None: # token novo entra no vocabulário ordenado
+                postagem = self._postagens[token] = {}
+                insort(self._vocabulario, token)
+            postagem[produto.id_produto] = produto
+
+    def adicionar_lote(self, produtos: Iterable[Produto]):
+        # Carga em massa: os tokens novos esperam em _tokens_pendentes e entram no vocabulário em consolidar().
+        # Até lá as postagens já existem, mas a busca por prefixo ainda não enxerga esses tokens.
+        tokens_novos = self._tokens_pendentes
+        for produto in produtos:
+            tokens = tokenizar(produto.nome)
+            self._nomes_indexados[produto.id_produto] = " ".join(tokens)
+            for token in tokens:
+                postagem = self._postagens.get(token)
+                if postagem is None:
+                    postagem = self._postagens[token] = {}
+                    tokens_novos.append(token)
+                postagem[produto.id_produto] = produto
+        if deve_consolidar(tokens_novos, self._vocabulario):
+            self.consolidar()
+
+    def consolidar(self): # chamado ao fim de uma importação e antes de remoções
+        pendentes, self._tokens_pendentes = self._tokens_pendentes, []
+        self._vocabulario = mesclar_ordenado(self._vocabulario, pendentes)
+
+    def remover(self, produto: Produto):
+        if self._tokens_pendentes:
+            self.consolidar()
+        nome_indexado = self._nomes_indexados.pop(produto.id_produto, None)
+        if nome_indexado is None:
+            return
+        for token in nome_indexado.split():
+            postagem = self._postagens.get(token)
+            if postagem is None:
+                continue
+            postagem.pop(produto.id_produto, None)
+            if not postagem: # remove tokens que ficaram sem produtos
+                del self._postagens[token]
+                posicao = bisect_left(self._vocabulario, token)
+                if posicao < len(self._vocabulario) and self._vocabulario[posicao] == token:
+                    del self._vocabulario[posicao]
+
+    def reindexar(self, produto: Produto): # usado quando o nome do produto muda
+        self.remover(produto)
+        self.adicionar(produto)
+
+    def _postagens_por_prefixo(self, prefixo: str) -> List[Dict[int, Produto]]:
+        # Percorre o vocabulário por posição a partir do prefixo: custa O(log V + k), sem copiar o restante da lista
+        vocabulario = self._vocabulario
+        posicao = bisect_left(vocabulario, prefixo)
+        postagens = []
+        while posicao < len(vocabulario) and vocabulario[posicao].startswith(prefixo):
+            postagens.append(self._postagens[vocabulario[posicao]])
+            posicao += 1
+        return postagens
+
+    def _postagens_por_trecho(self, trecho: str) -> List[Dict[int, Produto]]:
+        # Varre todos os tokens (inclusive os pendentes) atrás do trecho no meio da palavra: O(V), só usado quando
+        # nenhum token começa com o trecho
+        return [postagem for token, postagem in self._postagens.items() if trecho in token]
+
+    def buscar(self, termo_busca: str) -> Optional[List[Produto]]:
+        # Retorna None quando o termo não tem tokens (ex.: string vazia); o chamador decide o que fazer.
+        # Cada token do termo casa com o início de um token do nome ("moni" acha "Monitor"). O primeiro token,
+        # quando não é início de nenhum token, também casa no meio da palavra ("nitor" acha "Monitor"), como a
+        # busca por substring antiga; os seguintes vêm depois de um espaço na frase e precisam ser prefixos.
+        tokens = tokenizar(termo_busca)
+        if not tokens:
+            return None
+
+        # Usa o token mais seletivo para gerar os candidatos, o custo acompanha o número de resultados
+        melhores_postagens = None
+        menor_total = None
+        for posicao, token in enumerate(tokens):
+            postagens = self._postagens_por_prefixo(token)
+            if not postagens and posicao == 0:
+                postagens = self._postagens_por_trecho(token)
+            total = sum(len(p) for p in postagens)
+            if total == 0:
+                return []
+            if menor_total is None or total < menor_total:
+                melhores_postagens, menor_total = postagens, total
+
+        # Confirma a frase completa (tokens normalizados separados por espaço) no nome indexado; pontuação e
+        # espaços repetidos no termo ou no nome não contam, diferente do `in` sobre o nome original
+        frase = " ".join(tokens)
+        resultado: Dict[int, Produto] = {}
+        for postagem in melhores_postagens:
+            for id_produto, produto in postagem.items():
+                if id_produto not in resultado and frase in self._nomes_indexados[id_produto]:
+                    resultado[id_produto] = produto
+        return list(resultado.values())
+
+    def __len__(self) -> int:
+        return len(self._nomes_indexados)
+
+
+# Faixas de preço usadas na faceta "faixa_preco": (limite superior exclusivo, rótulo)
+FAIXAS_PRECO: List[Tuple[float, str]] = [
+    (50.0, "ate_50"),
+    (100.0, "50_a_100"),
+    (500.0, "100_a_500"),
+    (1000.0, "500_a_1000"),
+    (float("inf"), "acima_1000"),
+]
+_LIMITES_FAIXAS = [limite for limite, _ in FAIXAS_PRECO]
+
+
+def faixa_de_preco(preco: float) -> str:
+    # inf e NaN caem depois do último limite; ficam na última faixa em vez de estourar o índice
+    return FAIXAS_PRECO[min(bisect_right(_LIMITES_FAIXAS, preco), len(FAIXAS_PRECO) - 1)][1]
+
+
+class IndiceFacetas:
+    """Índices secundários por categoria, faixa de preço e disponibilidade em estoque."""
+
+    def __init__(self):
+        self._por_faceta: Dict[str, Dict[Any, Dict[int, Produto]]] = {
+            "categoria": {},
+            "faixa_preco": {},
+            "em_estoque": {},
+        }
+        self._chaves: Dict[int, Dict[str, Any]] = {} # id_produto -> valores de faceta indexados
+
+    @staticmethod
+    def _calcular_chaves(produto: Produto) -> Dict[str, Any]:
+        return {
+            "categoria": produto.categoria,
+            "faixa_preco": faixa_de_preco(produto.preco),
+            "em_estoque": produto.quantidade_estoque > 0,
+        }
+
+    def adicionar(self, produto: Produto):
+        chaves = self._calcular_chaves(produto)
+        self._chaves[produto.id_produto] = chaves
+        for faceta, valor in chaves.items():
+            self._por_faceta[faceta].setdefault(valor, {})[produto.id_produto] = produto
+
+    def adicionar_lote(self, produtos: Iterable[Produto]):
+        for produto in produtos:
+            self.adicionar(produto)
+
+    def remover(self, produto: Produto):
+        chaves = self._chaves.pop(produto.id_produto, None)
+        if chaves is None:
+            return
+        for faceta, valor in chaves.items():
+            grupo = self._por_faceta[faceta].get(valor)
+            if grupo is None:
+                continue
+            grupo.pop(produto.id_produto, None)
+            if not grupo:
+                del self._por_faceta[faceta][valor]
+
+    def reindexar(self, produto: Produto):
+        # Alterações que não mudam nenhuma faceta (ex.: estoque de 10 para 9) não custam nada
+        if self._chaves.get(produto.id_produto) == self._calcular_chaves(produto):
+            return
+        self.remover(produto)
+        self.adicionar(produto)
+
+    def produtos_da_categoria(self, categoria: str) -> List[Produto]:
+        return list(self._por_faceta["categoria"].get(categoria, {}).values())
+
+    def buscar(self, **filtros) -> Tuple[List[Produto], Dict[str, Dict[Any, int]]]:
+        # filtros: categoria=..., faixa_preco=..., em_estoque=... (None ou ausente = sem filtro)
+        filtros = {faceta: valor for faceta, valor in filtros.items() if valor is not None}
+        for faceta in filtros:
+            if faceta not in self._por_faceta:
+                raise ValueError(f"Faceta desconhecida: {faceta}.")
+
+        if not filtros: # sem filtros as contagens saem direto do tamanho dos grupos
+            produtos = [p for grupo in self._por_faceta["categoria"].values() for p in grupo.values()]
+            contagens = {faceta: {valor: len(grupo) for valor, grupo in grupos.items()}
+                         for faceta, grupos in self._por_faceta.items()}
+            return produtos, contagens
+
+        # Interseção a partir do menor grupo; o custo acompanha o tamanho do resultado
+        grupos = [self._por_faceta[faceta].get(valor, {}) for faceta, valor in filtros.items()]
+        grupos.sort(key=len)
+        menor, demais = grupos[0], grupos[1:]
+        produtos = [p for id_produto, p in menor.items() if all(id_produto in g for g in demais)]
+
+        contagens: Dict[str, Dict[Any, int]] = {faceta: {} for faceta in self._por_faceta}
+        for produto in produtos:
+            for faceta, valor in self._chaves[produto.id_produto].items():
+                contagens[faceta][valor] = contagens[faceta].get(valor, 0) + 1
+        return produtos, contagens
+
+
+class IndicePrecos:
+    """Listas ordenadas por (preço, id_produto), global e por categoria, para consultas por faixa de preço."""
+
+    def __init__(self):
+        self._ordenado: List[Tuple[float, int]] = []
+        self._por_categoria: Dict[str, List[Tuple[float, int]]] = {}
+        self._produtos: Dict[int, Produto] = {}
+        self._chaves: Dict[int, Tuple[float, str]] = {} # id_produto -> (preço, categoria) indexados
+        self._pendentes: List[Tuple[float, int]] = [] # entradas de adicionar_lote ainda fora das listas ordenadas
+        self._pendentes_por_categoria: Dict[str, List[Tuple[float, int]]] = {}
+
+    def adicionar(self, produto: Produto):
+        entrada = (produto.preco, produto.id_produto)
+        self._produtos[produto.id_produto] = produto
+        self._chaves[produto.id_produto] = (produto.preco, produto.categoria)
+        insort(self._ordenado, entrada)
+        insort(self._por_categoria.setdefault(produto.categoria, []), entrada)
+
+    def adicionar_lote(self, produtos: Iterable[Produto]):
+        # Carga em massa: as entradas esperam nas listas pendentes e são intercaladas em consolidar(),
+        # como no IndiceNome. Até lá as consultas por faixa ainda não enxergam esses produtos.
+        for produto in produtos:
+            entrada = (produto.preco, produto.id_produto)
+            self._produtos[produto.id_produto] = produto
+            self._chaves[produto.id_produto] = (produto.preco, produto.categoria)
+            self._pendentes.append(entrada)
+            self._pendentes_por_categoria.setdefault(produto.categoria, []).append(entrada)
+        if deve_consolidar(self._pendentes, self._ordenado):
+            self.consolidar()
+
+    def consolidar(self): # chamado ao fim de uma importação e antes de remoções
+        pendentes, self._pendentes = self._pendentes, []
+        pendentes_por_categoria, self._pendentes_por_categoria = self._pendentes_por_categoria, {}
+        self._ordenado = mesclar_ordenado(self._ordenado, pendentes)
+        for categoria, entradas in pendentes_por_categoria.items():
+            self._por_categoria[categoria] = mesclar_ordenado(self._por_categoria.get(categoria, []), entradas)
+
+    @staticmethod
+    def _remover_entrada(lista: List[Tuple[float, int]], entrada: Tuple[float, int]):
+        posicao = bisect_left(lista, entrada)
+        if posicao < len(lista) and lista[posicao] == entrada:
+            del lista[posicao]
+
+    def remover(self, produto: Produto):
+        if self._pendentes:
+            self.consolidar()
+        chaves = self._chaves.pop(produto.id_produto, None)
+        if chaves is None:
+            return
+        preco, categoria = chaves
+        entrada = (preco, produto.id_produto)
+        del self._produtos[produto.id_produto]
+        self._remover_entrada(self._ordenado, entrada)
+        lista_categoria = self._por_categoria.get(categoria)
+        if lista_categoria is not None:
+            self._remover_entrada(lista_categoria, entrada)
+            if not lista_categoria:
+                del self._por_categoria[categoria]
+
+    def reindexar(self, produto: Produto):
+        if self._chaves.get(produto.id_produto) == (produto.preco, produto.categoria):
+            return
+        self.remover(produto)
+        self.adicionar(produto)
+
+    def _lista(self, categoria: Optional[str]) -> List[Tuple[float, int]]:
+        if categoria is None:
+            return self._ordenado
+        return self._por_categoria.get(categoria, [])
+
+    def buscar_faixa(self, preco_min: Optional[float] = None, preco_max: Optional[float] = None, categoria: Optional[str] = None,
+                     inicio: int = 0, limite: Optional[int] = None, decrescente: bool = False) -> List[Produto]:
+        # O(log n + k): localiza os limites com bisect e fatia apenas a página pedida
+        lista = self._lista(categoria)
+        esquerda = 0 if preco_min is None else bisect_left(lista, preco_min, key=lambda e: e[0])
+        direita = len(lista) if preco_max is None else bisect_right(lista, preco_max, key=lambda e: e[0])
+        if decrescente:
+            fim = direita - inicio
+            comeco = esquerda if limite is None else max(esquerda, fim - limite)
+            fatia = reversed(lista[comeco:max(comeco, fim)])
+        else:
+            comeco = esquerda + inicio
+            fim = direita if limite is None else min(direita, comeco + limite)
+            fatia = lista[comeco:max(comeco, fim)]
+        return [self._produtos[id_produto] for _, id_produto in fatia]
+
+    def mais_baratos(self, quantidade: int, categoria: Optional[str] = None) -> List[Produto]:
+        return self.buscar_faixa(categoria=categoria, limite=quantidade)
+
+    def mais_caros(self, quantidade: int, categoria: Optional[str] = None) -> List[Produto]:
+        return self.buscar_faixa(categoria=categoria, limite=quantidade, decrescente=True)
+
+
+class IndiceTemporal:
+    """Lista ordenada de (data, id) para consultas por intervalo de tempo em O(log n + k)."""
+
+    def __init__(self):
+        self._entradas: List[Tuple[datetime, str]] = []
+
+    def adicionar(self, data: datetime, identificador: str):
+        # Datas chegam quase sempre em ordem crescente, então o insort costuma inserir no final
+        insort(self._entradas, (data, identificador))
+
+    def remover(self, data: datetime, identificador: str):
+        entrada = (data, identificador)
+        posicao = bisect_left(self._entradas, entrada)
+        if posicao < len(self._entradas) and self._entradas[posicao] == entrada:
+            del self._entradas[posicao]
+
+    def buscar(self, inicio: Optional[datetime] = None, fim: Optional[datetime] = None) -> List[str]:
+        # ids com inicio <= data < fim, em ordem cronológica
+        esquerda = 0 if inicio is None else bisect_left(self._entradas, inicio, key=lambda e: e[0])
+        direita = len(self._entradas) if fim is None else bisect_left(self._entradas, fim, key=lambda e: e[0])
+        return [identificador for _, identificador in self._entradas[esquerda:direita]]
+
+    def __len__(self) -> int:
+        return len(self._entradas)
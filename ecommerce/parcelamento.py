@@ -0,0 +1,68 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Tuple
+
+CENTAVOS = Decimal('0.01')
+UM = Decimal('1.0')
+
+
+class MotorParcelamento:
+    """Cálculo de parcelas (Tabela Price) com os fatores de amortização em cache.
+
+    Para cada (taxa, n) guarda `fator = (1 + taxa) ** n` e `fator - 1`, a parte cara do cálculo.
+    A parcela continua sendo `valor * fator * taxa / (fator - 1)`, com as mesmas operações na mesma
+    ordem de SistemaPagamento.calcular_valor_parcela, então o arredondamento é idêntico, bit a bit.
+    A chave usa a representação exata da taxa (Decimal('0.02') e Decimal('0.020') não se misturam).
+    """
+
+    def __init__(self):
+        self._fatores: Dict[Tuple[tuple, int], Tuple[Decimal, Decimal]] = {} # (taxa, n) -> (fator, fator - 1)
+        self.calculos_fator = 0 # exponenciações feitas (faltas no cache)
+
+    def invalidar(self):
+        self._fatores.clear()
+
+    def _fator(self, taxa: Decimal, num_parcelas: int) -> Tuple[Decimal, Decimal]:
+        chave = (taxa.as_tuple(), num_parcelas)
+        fatores = self._fatores.get(chave)
+        if fatores is None:
+            fator = (UM + taxa) ** Decimal(num_parcelas)
+            fatores = self._fatores[chave] = (fator, fator - UM)
+            self.calculos_fator += 1
+        return fatores
+
+    def _parcela(self, valor: Decimal, num_parcelas: int, taxa: Decimal) -> Decimal:
+        # `valor` já convertido para Decimal; num_parcelas >= 1
+        if num_parcelas == 1:
+            # Pagamento à vista, sem juros
+            return valor.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+        if taxa == 0:
+            # Parcelamento sem juros
+            valor_parcela = valor / Decimal(num_parcelas)
+        else:
+            fator, fator_menos_um = self._fator(taxa, num_parcelas)
+            if fator == UM: # taxa tão pequena que o fator não sai de 1: divide sem juros
+                valor_parcela = valor / Decimal(num_parcelas)
+            else:
+                valor_parcela = valor * fator * taxa / fator_menos_um
+        return valor_parcela.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+    def valor_parcela(self, valor_total, num_parcelas: int, taxa: Decimal) -> Decimal:
+        if num_parcelas <= 0:
+            raise ValueError("O número de parcelas deve ser positivo.")
+        return self._parcela(Decimal(str(valor_total)), num_parcelas, taxa)
+
+    def tabela(self, valores: Iterable, taxa: Decimal, max_parcelas: int = 24) -> List[List[Tuple[int, Decimal, Decimal]]]:
+        # Para cada valor, a lista [(n, valor_parcela, valor_total_pagar)] de 1x até max_parcelas x,
+        # com o total arredondado como em SistemaPagamento.processar_cartao_credito
+        if max_parcelas <= 0:
+            raise ValueError("O número de parcelas deve ser positivo.")
+        quantidades = [(n, Decimal(n)) for n in range(1, max_parcelas + 1)]
+        tabelas = []
+        for valor_total in valores:
+            valor = Decimal(str(valor_total))
+            linha = []
+            for n, n_decimal in quantidades:
+                valor_parcela = self._parcela(valor, n, taxa)
+                linha.append((n, valor_parcela, (valor_parcela * n_decimal).quantize(CENTAVOS, rounding=ROUND_HALF_UP)))
+            tabelas.append(linha)
+        return tabelas
@@ -1,11 +1,47 @@
 import uuid
+from collections.abc import Mapping
 from datetime import datetime
 from enum import Enum, auto
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Tuple
 from decimal import Decimal
-from .produto import Produto
+from .produto import Produto, _internar
 from .carrinho import Carrinho # Usado para obter itens ao criar o pedido
 
+# Valores de frete compartilhados entre pedidos: o frete é limitado a poucos valores (5,00 a 50,00).
+# A chave é a representação exata (Decimal('5.00') e Decimal('5') não se misturam)
+_FRETES: Dict[tuple, Decimal] = {}
+
+
+def _compartilhar_frete(valor: Decimal) -> Decimal:
+    return _FRETES.setdefault(valor.as_tuple(), valor)
+
+
+class ItensPedido(Mapping):
+    """Visão somente leitura {produto: quantidade} sobre os pares guardados no pedido, sem copiá-los."""
+
+    __slots__ = ("_pares",)
+
+    def __init__(self, pares: Tuple[Tuple[Produto, int], ...]):
+        self._pares = pares
+
+    def __getitem__(self, produto: Produto) -> int:
+        for produto_item, quantidade in self._pares: # poucos itens por pedido: a busca linear é barata
+            if produto_item is produto or produto_item == produto:
+                return quantidade
+        raise KeyError(produto)
+
+    def __iter__(self) -> Iterator[Produto]:
+        return (produto for produto, _ in self._pares)
+
+    def __len__(self) -> int:
+        return len(self._pares)
+
+    def items(self): # pares direto da tupla, sem um __getitem__ por item
+        return iter(self._pares)
+
+    def __repr__(self) -> str:
+        return f"ItensPedido({dict(self._pares)!r})"
+
 class StatusPedido(Enum):
     """Enumeração para os possíveis status de um pedido."""
     PENDENTE = auto()       # Pedido criado, aguardando pagamento
@@ -20,6 +56,12 @@ class StatusPedido(Enum):
 
 class Pedido: 
 
+    # __slots__ evita o __dict__ por instância (milhões de pedidos em memória)
+    __slots__ = ("id_pedido", "id_cliente", "_itens", "endereco_entrega", "metodo_pagamento", "valor_frete", "valor_total",
+                 "status", "data_criacao", "data_pagamento", "data_envio", "data_entrega",
+                 "id_transacao_pagamento", "num_parcelas", "valor_parcela", "_ouvintes",
+                 "__weakref__") # mapa de identidade do ArmazemPedidos guarda referências fracas
+
     # Define as transições de status permitidas
     TRANSICOES_PERMITIDAS = {
         StatusPedido.PENDENTE: [StatusPedido.PROCESSANDO_PAGAMENTO, StatusPedido.CANCELADO],
@@ -39,13 +81,14 @@ class Pedido:
         if not carrinho.obter_itens():
             raise ValueError("Não é possível criar um pedido com um carrinho vazio.")
 
+        self._ouvintes = () # callbacks avisados em mudanças de status/pagamento (ex.: agregados de vendas)
         self.id_pedido = str(uuid.uuid4()) # Gera um ID único para o pedido
         self.id_cliente = id_cliente 
 
-        # Copia os itens do carrinho para o pedido para evitar modificações externas
-        self.itens = dict(carrinho.obter_itens())
+        # Copia os itens do carrinho para o pedido para evitar modificações externas (pares (produto, quantidade))
+        self._itens = tuple(carrinho.obter_itens().items())
         self.endereco_entrega = endereco_entrega # Armazena o endereço de entrega
-        self.metodo_pagamento = metodo_pagamento 
+        self.metodo_pagamento = _internar(metodo_pagamento) # poucos valores distintos, compartilha a string
 
         # Cálculos 
         self.valor_frete = self.calcular_frete() #frete
@@ -65,6 +108,23 @@ class Pedido:
 
         print(f"Pedido {self.id_pedido} criado para o cliente {self.id_cliente}. Status: {self.status.name}")
 
+    @property
+    def itens(self) -> ItensPedido:
+        # Guardados como tupla de pares, bem menor que um dict por pedido; expostos como mapeamento somente leitura
+        return ItensPedido(self._itens)
+
+    def adicionar_ouvinte(self, ouvinte): # ouvinte(pedido, campo, valor_anterior), campo em "status" ou "pagamento"
+        if ouvinte not in self._ouvintes:
+            self._ouvintes = self._ouvintes + (ouvinte,)
+
+    def remover_ouvinte(self, ouvinte):
+        if ouvinte in self._ouvintes:
+            self._ouvintes = tuple(o for o in self._ouvintes if o != ouvinte)
+
+    def _notificar(self, campo: str, valor_anterior):
+        for ouvinte in self._ouvintes:
+            ouvinte(self, campo, valor_anterior)
+
     def atualizar_status(self, novo_status: StatusPedido) -> bool: # Atualiza o status do pedido
         if novo_status in self.TRANSICOES_PERMITIDAS.get(self.status, []): # Verifica se a transição é permitida
             status_anterior = self.status # Armazena o status anterior
@@ -81,7 +141,8 @@ class Pedido:
                 self.data_entrega = now
             elif novo_status == StatusPedido.CANCELADO:
                 print(f"Pedido {self.id_pedido} foi cancelado.")
-        
+
+            self._notificar("status", status_anterior)
             return True
         else:
             print(f"Erro: Transição de status inválida de {self.status.name} para {novo_status.name} no pedido {self.id_pedido}.")
@@ -94,17 +155,19 @@ class Pedido:
             print(f"Aviso: Tentativa de registrar pagamento para pedido {self.id_pedido} com status {self.status.name}.") # verifica se o status é válido
             
         if sucesso: 
+            valor_anterior = self.valor_total
             self.id_transacao_pagamento = id_transacao
             self.valor_total = valor_pago # Atualiza o valor total com o valor efetivamente pago
             self.num_parcelas = num_parcelas
             self.valor_parcela = valor_parcela
+            self._notificar("pagamento", valor_anterior) # antes da mudança de status, que já usa o novo valor
             self.atualizar_status(StatusPedido.PAGO)
         else:
             self.atualizar_status(StatusPedido.FALHA_PAGAMENTO)
             print(f"Falha ao registrar pagamento para o pedido {self.id_pedido}. ID da tentativa: {id_transacao}")
 
     def calcular_frete(self) -> Decimal: # Calcula o valor do frete com base no número de itens
-        num_itens_total = sum(self.itens.values()) #quantidades de todos os itens
+        num_itens_total = sum(quantidade for _, quantidade in self._itens) #quantidades de todos os itens
         if num_itens_total == 0: #sem itens, o frete é zero
              return Decimal("0.00")
         
@@ -113,7 +176,8 @@ class Pedido:
         valor_frete_calculado = min(frete, frete_maximo)
 
         print(f"Frete calculado para pedido {self.id_pedido}: R$ {valor_frete_calculado:.2f}")
-        return valor_frete_calculado.quantize(Decimal("0.01"))
+        valor_frete_calculado = valor_frete_calculado.quantize(Decimal("0.01"))
+        return _compartilhar_frete(valor_frete_calculado)
 
     def gerar_nota_fiscal(self) -> str: # Gera uma nota fiscal para o pedido
         if self.status not in [StatusPedido.PAGO, StatusPedido.EM_SEPARACAO, StatusPedido.ENVIADO, StatusPedido.ENTREGUE]: # Verifica se o status permite gerar nota fiscal
@@ -127,7 +191,7 @@ class Pedido:
         nf += f"Endereço Entrega: {self.endereco_entrega}\n"
         nf += f"\n--- Itens ---\n"
         subtotal_itens = Decimal("0.00")
-        for produto, quantidade in self.itens.items():
+        for produto, quantidade in self._itens:
             valor_item_total = Decimal(str(produto.preco)) * Decimal(quantidade)
             nf += f"- {produto.nome} ({quantidade}x R$ {produto.preco:.2f}) = R$ {valor_item_total:.2f}\n"
             subtotal_itens += valor_item_total
@@ -151,7 +215,7 @@ class Pedido:
         return {
             "id_pedido": self.id_pedido,
             "id_cliente": self.id_cliente,
-            "itens": {p.nome: q for p, q in self.itens.items()}, # Simplifica itens para exibição
+            "itens": {p.nome: q for p, q in self._itens}, # Simplifica itens para exibição
             "endereco_entrega": self.endereco_entrega,
             "metodo_pagamento": self.metodo_pagamento,
             "valor_total": float(self.valor_total), 
@@ -166,6 +230,74 @@ class Pedido:
             "valor_parcela": float(self.valor_parcela) if self.valor_parcela else None
         }
 
+    def para_dados(self) -> Dict[str, Any]:
+        # Estado completo em tipos serializáveis (JSON); itens referenciam produtos pelo id (com nome, preço e
+        # categoria para quando o produto não estiver mais no catálogo). Inverso de restaurar()
+        return {
+            "id_pedido": self.id_pedido,
+            "id_cliente": self.id_cliente,
+            "itens": [[produto.id_produto, quantidade, produto.nome, produto.preco, produto.categoria] for produto, quantidade in self._itens],
+            "endereco_entrega": self.endereco_entrega,
+            "metodo_pagamento": self.metodo_pagamento,
+            "valor_frete": str(self.valor_frete),
+            "valor_total": str(self.valor_total),
+            "status": self.status.name,
+            "data_criacao": self.data_criacao.isoformat(),
+            "data_pagamento": self.data_pagamento.isoformat() if self.data_pagamento else None,
+            "data_envio": self.data_envio.isoformat() if self.data_envio else None,
+            "data_entrega": self.data_entrega.isoformat() if self.data_entrega else None,
+            "id_transacao_pagamento": self.id_transacao_pagamento,
+            "num_parcelas": self.num_parcelas,
+            "valor_parcela": str(self.valor_parcela) if self.valor_parcela is not None else None,
+        }
+
+    @classmethod
+    def restaurar(cls, dados: Dict[str, Any], produtos: Dict[int, Produto]) -> "Pedido":
+        # Recria um pedido salvo com para_dados() sem passar pelo construtor (sem carrinho, sem recalcular frete)
+        pedido = cls.__new__(cls)
+        pedido._ouvintes = ()
+        pedido.id_pedido = dados["id_pedido"]
+        pedido.id_cliente = dados["id_cliente"]
+        itens = {}
+        for id_produto, quantidade, *descricao_item in dados["itens"]:
+            produto = produtos.get(id_produto)
+            if produto is None:
+                if not descricao_item:
+                    raise ValueError(f"Produto {id_produto} do pedido {dados['id_pedido']} não encontrado no catálogo.")
+                # Produto já saiu do catálogo (ex.: pedido arquivado): recria com os dados gravados no pedido
+                nome, preco, categoria = descricao_item
+                produto = Produto(id_produto, nome, "", preco, 0, categoria)
+            itens[produto] = quantidade
+        pedido._itens = tuple(itens.items())
+        pedido.endereco_entrega = dados["endereco_entrega"]
+        pedido.metodo_pagamento = _internar(dados["metodo_pagamento"])
+        pedido.valor_frete = _compartilhar_frete(Decimal(dados["valor_frete"]))
+        pedido.valor_total = Decimal(dados["valor_total"])
+        pedido.status = StatusPedido[dados["status"]]
+        pedido.data_criacao = datetime.fromisoformat(dados["data_criacao"])
+        pedido.data_pagamento = datetime.fromisoformat(dados["data_pagamento"]) if dados.get("data_pagamento") else None
+        pedido.data_envio = datetime.fromisoformat(dados["data_envio"]) if dados.get("data_envio") else None
+        pedido.data_entrega = datetime.fromisoformat(dados["data_entrega"]) if dados.get("data_entrega") else None
+        pedido.id_transacao_pagamento = dados.get("id_transacao_pagamento")
+        pedido.num_parcelas = dados.get("num_parcelas")
+        pedido.valor_parcela = Decimal(dados["valor_parcela"]) if dados.get("valor_parcela") is not None else None
+        return pedido
+
+    def _aplicar_status_registrado(self, status: StatusPedido, data_pagamento: datetime | None, data_envio: datetime | None, data_entrega: datetime | None):
+        # Reaplica uma transição já validada (ex.: replay do diário de eventos), preservando as datas originais
+        status_anterior = self.status
+        self.status = status
+        self.data_pagamento, self.data_envio, self.data_entrega = data_pagamento, data_envio, data_entrega
+        self._notificar("status", status_anterior)
+
+    def _aplicar_pagamento_registrado(self, id_transacao: str | None, valor_pago: Decimal, num_parcelas: int | None, valor_parcela: Decimal | None):
+        valor_anterior = self.valor_total
+        self.id_transacao_pagamento = id_transacao
+        self.valor_total = valor_pago
+        self.num_parcelas = num_parcelas
+        self.valor_parcela = valor_parcela
+        self._notificar("pagamento", valor_anterior)
+
     def __str__(self) -> str: #string formatada com os detalhes do pedido.
         return f"Pedido(ID: {self.id_pedido}, Status: {self.status.name}, Total: R$ {self.valor_total:.2f})" # Formata a string de exibição do pedido
 
@@ -1,16 +1,96 @@
+import math
+import sys
+
+
+def _internar(valor): # sys.intern só aceita str exata
+    return sys.intern(valor) if type(valor) is str else valor
+
+
+def _validar_preco(preco: float):
+    if not math.isfinite(preco) or preco <= 0: # NaN e infinito passariam pelo "<= 0" e quebrariam os índices de preço
+        raise ValueError("O preço do produto deve ser positivo.")
+
+
 class Produto:   
+    # __slots__ elimina o __dict__ por instância; relevante com catálogos de centenas de milhares de itens
+    __slots__ = ("id_produto", "_nome", "_descricao", "_preco", "_quantidade_estoque", "_categoria", "_ouvintes")
+
     def __init__(self, id_produto: int, nome: str, descricao: str, preco: float, quantidade_estoque: int, categoria: str): # Construtor da classe Produto
-        if preco <= 0:
-            raise ValueError("O preço do produto deve ser positivo.")
+        _validar_preco(preco)
         if quantidade_estoque < 0:
             raise ValueError("A quantidade em estoque não pode ser negativa.")
 
+        self._ouvintes = () # callbacks avisados quando um atributo indexado muda (ex.: índices do catálogo); tupla vazia é compartilhada
         self.id_produto = id_produto 
-        self.nome = nome
-        self.descricao = descricao
-        self.preco = preco
-        self.quantidade_estoque = quantidade_estoque
-        self.categoria = categoria
+        self._nome = nome
+        self._descricao = descricao
+        self._preco = preco
+        self._quantidade_estoque = quantidade_estoque
+        self._categoria = _internar(categoria) # poucas categorias distintas: uma única string por categoria
+
+    # Atributos usados pelos índices do catálogo (e a descrição, que também é persistida) avisam os ouvintes quando mudam
+    @property
+    def nome(self) -> str:
+        return self._nome
+
+    @nome.setter
+    def nome(self, novo_nome: str):
+        nome_anterior = self._nome
+        self._nome = novo_nome
+        self._notificar("nome", nome_anterior)
+
+    @property
+    def descricao(self) -> str:
+        return self._descricao
+
+    @descricao.setter
+    def descricao(self, nova_descricao: str):
+        descricao_anterior = self._descricao
+        self._descricao = nova_descricao
+        self._notificar("descricao", descricao_anterior)
+
+    @property
+    def preco(self) -> float:
+        return self._preco
+
+    @preco.setter
+    def preco(self, novo_preco: float):
+        _validar_preco(novo_preco) # vale para qualquer caminho de alteração, não só atualizar_produto
+        preco_anterior = self._preco
+        self._preco = novo_preco
+        self._notificar("preco", preco_anterior)
+
+    @property
+    def quantidade_estoque(self) -> int:
+        return self._quantidade_estoque
+
+    @quantidade_estoque.setter
+    def quantidade_estoque(self, nova_quantidade: int):
+        quantidade_anterior = self._quantidade_estoque
+        self._quantidade_estoque = nova_quantidade
+        self._notificar("quantidade_estoque", quantidade_anterior)
+
+    @property
+    def categoria(self) -> str:
+        return self._categoria
+
+    @categoria.setter
+    def categoria(self, nova_categoria: str):
+        categoria_anterior = self._categoria
+        self._categoria = _internar(nova_categoria)
+        self._notificar("categoria", categoria_anterior)
+
+    def adicionar_ouvinte(self, ouvinte): # ouvinte(produto, campo, valor_anterior)
+        if ouvinte not in self._ouvintes:
+            self._ouvintes = self._ouvintes + (ouvinte,)
+
+    def remover_ouvinte(self, ouvinte):
+        if ouvinte in self._ouvintes:
+            self._ouvintes = tuple(o for o in self._ouvintes if o != ouvinte)
+
+    def _notificar(self, campo: str, valor_anterior):
+        for ouvinte in self._ouvintes:
+            ouvinte(self, campo, valor_anterior)
 
     def verificar_disponibilidade(self, quantidade_desejada: int = 1) -> bool: # disponível em estoque       
         if quantidade_desejada <= 0:
@@ -41,4 +121,3 @@ class Produto:
         return (f"Produto(id_produto={self.id_produto}, nome='{self.nome}', "
                 f"descricao='{self.descricao}', preco={self.preco}, "
                 f"quantidade_estoque={self.quantidade_estoque}, categoria='{self.categoria}')")
-
@@ -0,0 +1,146 @@
+import csv
+import gzip
+import io
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, Optional
+from .pedido import Pedido, StatusPedido
+
+# Status considerados venda realizada (pagos ou concluídos)
+STATUS_VENDA = frozenset([StatusPedido.PAGO, StatusPedido.EM_SEPARACAO, StatusPedido.ENVIADO, StatusPedido.ENTREGUE])
+
+
+class AgregadosVendas:
+    """Totais de vendas mantidos incrementalmente pelos eventos dos pedidos, para resumos em O(1)."""
+
+    def __init__(self):
+        self.pedidos_pagos = 0
+        self.total_vendido = Decimal('0.00')
+        self.pedidos_por_status: Dict[StatusPedido, int] = {status: 0 for status in StatusPedido}
+
+    def adicionar_pedido(self, pedido: Pedido):
+        self.pedidos_por_status[pedido.status] += 1
+        if pedido.status in STATUS_VENDA:
+            self.pedidos_pagos += 1
+            self.total_vendido += pedido.valor_total
+
+    def remover_pedido(self, pedido: Pedido):
+        self.pedidos_por_status[pedido.status] -= 1
+        if pedido.status in STATUS_VENDA:
+            self.pedidos_pagos -= 1
+            self.total_vendido -= pedido.valor_total
+
+    def ao_alterar_pedido(self, pedido: Pedido, campo: str, valor_anterior):
+        if campo == "status":
+            status_anterior = valor_anterior
+            self.pedidos_por_status[status_anterior] -= 1
+            self.pedidos_por_status[pedido.status] += 1
+            era_venda, e_venda = status_anterior in STATUS_VENDA, pedido.status in STATUS_VENDA
+            if e_venda and not era_venda:
+                self.pedidos_pagos += 1
+                self.total_vendido += pedido.valor_total
+            elif era_venda and not e_venda:
+                self.pedidos_pagos -= 1
+                self.total_vendido -= pedido.valor_total
+        elif campo == "pagamento" and pedido.status in STATUS_VENDA:
+            # Valor alterado em um pedido que já contava como venda
+            self.total_vendido += pedido.valor_total - valor_anterior
+
+    def resumo(self) -> Dict[str, Any]:
+        return {
+            "pedidos_pagos": self.pedidos_pagos,
+            "total_vendido": self.total_vendido,
+            "pedidos_por_status": {status.name: quantidade for status, quantidade in self.pedidos_por_status.items()},
+        }
+
+
+def formatar_linha_pedido(pedido: Pedido) -> str: # linha do detalhamento de gerar_relatorio_vendas
+    return f"- Pedido: {pedido.id_pedido}, Cliente: {pedido.id_cliente}, Valor: R$ {pedido.valor_total:.2f}, Status: {pedido.status.name}\n"
+
+
+# --- Relatório em streaming ---
+
+COLUNAS_CSV = ["id_pedido", "id_cliente", "status", "valor_total", "metodo_pagamento", "data_criacao", "data_pagamento"]
+
+
+def _normalizar_status(status: Optional[Any]) -> frozenset:
+    if status is None:
+        return STATUS_VENDA
+    if isinstance(status, StatusPedido):
+        return frozenset([status])
+    return frozenset(status)
+
+
+def filtrar_pedidos(pedidos: Iterable[Pedido], status: Optional[Any] = None,
+                    data_inicio: Optional[datetime] = None, data_fim: Optional[datetime] = None) -> Iterator[Pedido]:
+    # status: StatusPedido ou coleção deles (padrão: status de venda); datas filtram data_criacao (fim exclusivo)
+    status_aceitos = _normalizar_status(status)
+    for pedido in pedidos:
+        if pedido.status not in status_aceitos:
+            continue
+        if data_inicio is not None and pedido.data_criacao < data_inicio:
+            continue
+        if data_fim is not None and pedido.data_criacao >= data_fim:
+            continue
+        yield pedido
+
+
+def _linha_csv(valores: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(valores)
+    return buffer.getvalue()
+
+
+def iterar_relatorio_vendas(pedidos: Iterable[Pedido], formato: str = "texto") -> Iterator[str]:
+    # Gera o relatório linha a linha; os totais do rodapé (texto) são acumulados durante a passagem
+    if formato == "csv":
+        yield _linha_csv(COLUNAS_CSV)
+        for pedido in pedidos:
+            yield _linha_csv([
+                pedido.id_pedido, pedido.id_cliente, pedido.status.name, f"{pedido.valor_total:.2f}", pedido.metodo_pagamento,
+                pedido.data_criacao.isoformat(), pedido.data_pagamento.isoformat() if pedido.data_pagamento else "",
+            ])
+    elif formato == "texto":
+        yield "--- Relatório de Vendas ---\n"
+        quantidade = 0
+        total = Decimal('0.00')
+        for pedido in pedidos:
+            quantidade += 1
+            total += pedido.valor_total
+            yield formatar_linha_pedido(pedido)
+        yield f"\nTotal de Pedidos: {quantidade}\n"
+        yield f"Valor Total: R$ {total:.2f}\n"
+        yield "--------------------------\n"
+    else:
+        raise ValueError(f"Formato de relatório não suportado: {formato}. Use 'texto' ou 'csv'.")
+
+
+def escrever_relatorio(linhas: Iterable[str], destino: Any, tamanho_bloco: int = 64 * 1024, encoding: str = "utf-8") -> int:
+    # destino: caminho (".gz" grava comprimido), arquivo texto/binário, GzipFile ou socket (sendall).
+    # As linhas são agrupadas em blocos de ~tamanho_bloco caracteres; retorna o total de caracteres escritos.
+    if isinstance(destino, str):
+        abrir = gzip.open if destino.endswith(".gz") else open
+        with abrir(destino, "wt", encoding=encoding, newline="") as arquivo:
+            return escrever_relatorio(linhas, arquivo, tamanho_bloco, encoding)
+
+    if hasattr(destino, "sendall"): # socket
+        enviar = lambda texto: destino.sendall(texto.encode(encoding))
+    elif isinstance(destino, io.TextIOBase):
+        enviar = destino.write
+    else: # arquivos binários, GzipFile, BytesIO...
+        enviar = lambda texto: destino.write(texto.encode(encoding))
+
+    total = 0
+    bloco = []
+    tamanho_atual = 0
+    for linha in linhas:
+        bloco.append(linha)
+        tamanho_atual += len(linha)
+        if tamanho_atual >= tamanho_bloco:
+            enviar("".join(bloco))
+            total += tamanho_atual
+            bloco, tamanho_atual = [], 0
+    if bloco:
+        enviar("".join(bloco))
+        total += tamanho_atual
+    return total
@@ -0,0 +1,256 @@
+import json
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .produto import Produto
+from .pedido import Pedido, StatusPedido
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS produtos (
+    id_produto INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL,
+    descricao TEXT NOT NULL,
+    preco REAL NOT NULL,
+    quantidade_estoque INTEGER NOT NULL,
+    categoria TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pedidos (
+    id_pedido TEXT PRIMARY KEY,
+    id_cliente TEXT NOT NULL,
+    status TEXT NOT NULL,
+    data_criacao TEXT NOT NULL,
+    dados TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pedidos_cliente ON pedidos (id_cliente, data_criacao);
+CREATE INDEX IF NOT EXISTS idx_pedidos_status ON pedidos (status);
+CREATE INDEX IF NOT EXISTS idx_pedidos_data_criacao ON pedidos (data_criacao);
+"""
+
+# Comandos fixos: o sqlite3 mantém um cache de statements preparados por conexão, então cada
+# texto abaixo é compilado uma única vez e reutilizado com novos parâmetros.
+SQL_INSERIR_PRODUTO = "INSERT OR REPLACE INTO produtos (id_produto, nome, descricao, preco, quantidade_estoque, categoria) VALUES (?, ?, ?, ?, ?, ?)"
+SQL_REMOVER_PRODUTO = "DELETE FROM produtos WHERE id_produto = ?"
+SQL_ATUALIZAR_CAMPO_PRODUTO = {campo: f"UPDATE produtos SET {campo} = ? WHERE id_produto = ?"
+                               for campo in ("nome", "descricao", "preco", "quantidade_estoque", "categoria")}
+SQL_INSERIR_PEDIDO = "INSERT OR REPLACE INTO pedidos (id_pedido, id_cliente, status, data_criacao, dados) VALUES (?, ?, ?, ?, ?)"
+SQL_ATUALIZAR_PEDIDO = "UPDATE pedidos SET status = ?, dados = ? WHERE id_pedido = ?"
+SQL_REMOVER_PEDIDO = "DELETE FROM pedidos WHERE id_pedido = ?"
+SQL_BUSCAR_PEDIDO = "SELECT dados FROM pedidos WHERE id_pedido = ?"
+
+
+class RepositorioSQLite:
+    """Persistência de produtos e pedidos num banco SQLite local.
+
+    Expõe `produtos` e `pedidos` como mapeamentos (mesma interface dos dicionários usados pelo
+    SistemaEcommerce), gravando cada alteração no banco assim que ela acontece. Operações em massa
+    devem ser agrupadas com `transacao()`, que gera um único COMMIT para todas as escritas.
+    """
+
+    def __init__(self, caminho: str = ":memory:", tamanho_cache_pedidos: int = 10_000):
+        self.caminho = caminho
+        self.conexao = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False) # autocommit fora de transacao()
+        if caminho != ":memory:":
+            self.conexao.execute("PRAGMA journal_mode=WAL")
+            self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(ESQUEMA)
+        self.trava = threading.RLock() # a conexão é compartilhada entre threads
+        self._profundidade_transacao = 0
+        self.produtos = ArmazemProdutos(self)
+        self.pedidos = ArmazemPedidos(self, self.produtos, tamanho_cache_pedidos)
+
+    @contextmanager
+    def transacao(self):
+        # Transações aninhadas são absorvidas pela mais externa (um único COMMIT ou ROLLBACK)
+        with self.trava:
+            if self._profundidade_transacao == 0:
+                self.conexao.execute("BEGIN")
+            self._profundidade_transacao += 1
+            try:
+                yield
+            except BaseException:
+                self._profundidade_transacao -= 1
+                if self._profundidade_transacao == 0:
+                    self.conexao.execute("ROLLBACK")
+                raise
+            self._profundidade_transacao -= 1
+            if self._profundidade_transacao == 0:
+                self.conexao.execute("COMMIT")
+
+    def executar(self, sql: str, parametros: Tuple = ()) -> sqlite3.Cursor:
+        with self.trava:
+            return self.conexao.execute(sql, parametros)
+
+    def executar_em_lote(self, sql: str, parametros: Iterable[Tuple]):
+        with self.transacao():
+            self.conexao.executemany(sql, parametros)
+
+    def fechar(self):
+        with self.trava:
+            self.conexao.close()
+
+
+class ArmazemProdutos(MutableMapping):
+    """Catálogo persistido. Todos os produtos ficam em memória (os índices do sistema já os referenciam),
+    então leituras nunca vão ao disco; escritas são repassadas ao banco."""
+
+    def __init__(self, repositorio: RepositorioSQLite):
+        self._repositorio = repositorio
+        self._produtos: Dict[int, Produto] = {}
+        linhas = repositorio.executar("SELECT id_produto, nome, descricao, preco, quantidade_estoque, categoria FROM produtos ORDER BY id_produto")
+        for linha in linhas:
+            produto = Produto(*linha)
+            produto.adicionar_ouvinte(self._persistir_alteracao)
+            self._produtos[produto.id_produto] = produto
+
+    @staticmethod
+    def _linha(produto: Produto) -> Tuple:
+        return (produto.id_produto, produto.nome, produto.descricao, produto.preco, produto.quantidade_estoque, produto.categoria)
+
+    def _persistir_alteracao(self, produto: Produto, campo: str, valor_anterior): # ouvinte do Produto
+        self._repositorio.executar(SQL_ATUALIZAR_CAMPO_PRODUTO[campo], (getattr(produto, campo), produto.id_produto))
+
+    def __getitem__(self, id_produto: int) -> Produto:
+        return self._produtos[id_produto]
+
+    def get(self, id_produto: int, padrao=None):
+        return self._produtos.get(id_produto, padrao)
+
+    def __contains__(self, id_produto) -> bool:
+        return id_produto in self._produtos
+
+    def __setitem__(self, id_produto: int, produto: Produto):
+        self._repositorio.executar(SQL_INSERIR_PRODUTO, self._linha(produto))
+        self._guardar(produto)
+
+    def _guardar(self, produto: Produto):
+        anterior = self._produtos.get(produto.id_produto)
+        if anterior is not None and anterior is not produto:
+            anterior.remover_ouvinte(self._persistir_alteracao)
+        if anterior is not produto:
+            produto.adicionar_ouvinte(self._persistir_alteracao)
+        self._produtos[produto.id_produto] = produto
+
+    def update(self, produtos=(), **_):
+        # Carga em massa: um único executemany dentro de uma transação
+        itens = list(produtos.items() if hasattr(produtos, "items") else produtos)
+        self._repositorio.executar_em_lote(SQL_INSERIR_PRODUTO, (self._linha(produto) for _, produto in itens))
+        for _, produto in itens:
+            self._guardar(produto)
+
+    def __delitem__(self, id_produto: int):
+        produto = self._produtos.pop(id_produto)
+        produto.remover_ouvinte(self._persistir_alteracao)
+        self._repositorio.executar(SQL_REMOVER_PRODUTO, (id_produto,))
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._produtos)
+
+    def __len__(self) -> int:
+        return len(self._produtos)
+
+    def values(self):
+        return self._produtos.values()
+
+
+class ArmazemPedidos(MutableMapping):
+    """Pedidos persistidos, com mapa de identidade e um cache LRU dos pedidos acessados recentemente.
+
+    O mapa de identidade guarda referências fracas: enquanto algum código mantiver um pedido vivo, buscas
+    pelo mesmo id devolvem esse objeto, então nunca há dois objetos gravando a mesma linha. O LRU só
+    mantém referências fortes aos `tamanho_cache` pedidos mais recentes; um pedido que saiu dele e não é
+    mais referenciado por ninguém é liberado e relido do banco na próxima busca.
+    """
+
+    def __init__(self, repositorio: RepositorioSQLite, produtos: MutableMapping, tamanho_cache: int):
+        if tamanho_cache <= 0:
+            raise ValueError("O tamanho do cache de pedidos deve ser positivo.")
+        self._repositorio = repositorio
+        self._produtos = produtos
+        self.tamanho_cache = tamanho_cache
+        self._cache: "OrderedDict[str, Pedido]" = OrderedDict() # LRU: mantém vivos os pedidos recentes
+        self._identidade: "weakref.WeakValueDictionary[str, Pedido]" = weakref.WeakValueDictionary() # todos os pedidos vivos
+        self._trava = threading.RLock() # duas buscas simultâneas pelo mesmo id não podem criar dois objetos
+        self.ao_carregar: Optional[Callable[[Pedido], None]] = None # chamado para cada pedido lido do banco
+        self.leituras_banco = 0
+
+    def _persistir_alteracao(self, pedido: Pedido, campo: str, valor_anterior): # ouvinte do Pedido
+        self._repositorio.executar(SQL_ATUALIZAR_PEDIDO, (pedido.status.name, json.dumps(pedido.para_dados()), pedido.id_pedido))
+
+    def _guardar_no_cache(self, pedido: Pedido): # chamado com a trava adquirida
+        self._identidade[pedido.id_pedido] = pedido
+        self._cache[pedido.id_pedido] = pedido
+        self._cache.move_to_end(pedido.id_pedido)
+        if len(self._cache) > self.tamanho_cache:
+            self._cache.popitem(last=False) # sai do LRU; continua no mapa de identidade enquanto estiver em uso
+
+    def __getitem__(self, id_pedido: str) -> Pedido:
+        with self._trava:
+            pedido = self._identidade.get(id_pedido)
+            if pedido is not None:
+                self._guardar_no_cache(pedido)
+                return pedido
+            linha = self._repositorio.executar(SQL_BUSCAR_PEDIDO, (id_pedido,)).fetchone()
+            if linha is None:
+                raise KeyError(id_pedido)
+            self.leituras_banco += 1
+            pedido = Pedido.restaurar(json.loads(linha[0]), self._produtos)
+            pedido.adicionar_ouvinte(self._persistir_alteracao)
+            if self.ao_carregar is not None:
+                self.ao_carregar(pedido)
+            self._guardar_no_cache(pedido)
+            return pedido
+
+    def __contains__(self, id_pedido) -> bool:
+        return id_pedido in self._identidade or self._repositorio.executar("SELECT 1 FROM pedidos WHERE id_pedido = ?", (id_pedido,)).fetchone() is not None
+
+    def __setitem__(self, id_pedido: str, pedido: Pedido):
+        self._repositorio.executar(SQL_INSERIR_PEDIDO, (pedido.id_pedido, pedido.id_cliente, pedido.status.name,
+                                                        pedido.data_criacao.isoformat(), json.dumps(pedido.para_dados())))
+        pedido.adicionar_ouvinte(self._persistir_alteracao)
+        with self._trava:
+            self._guardar_no_cache(pedido)
+
+    def __delitem__(self, id_pedido: str):
+        with self._trava:
+            self._cache.pop(id_pedido, None)
+            pedido = self._identidade.pop(id_pedido, None)
+        if pedido is not None:
+            pedido.remover_ouvinte(self._persistir_alteracao)
+        if self._repositorio.executar(SQL_REMOVER_PEDIDO, (id_pedido,)).rowcount == 0:
+            raise KeyError(id_pedido)
+
+    def __iter__(self) -> Iterator[str]:
+        for (id_pedido,) in self._repositorio.executar("SELECT id_pedido FROM pedidos ORDER BY data_criacao, rowid").fetchall():
+            yield id_pedido
+
+    def __len__(self) -> int:
+        return self._repositorio.executar("SELECT COUNT(*) FROM pedidos").fetchone()[0]
+
+    def iterar_dados(self, tamanho_bloco: int = 1000) -> Iterator[Dict[str, Any]]:
+        # Dados (para_dados) de todos os pedidos em ordem de criação, lidos em blocos e sem passar pelo cache
+        cursor = self._repositorio.conexao.cursor()
+        with self._repositorio.trava:
+            cursor.execute("SELECT dados FROM pedidos ORDER BY data_criacao, rowid")
+            while True:
+                linhas = cursor.fetchmany(tamanho_bloco)
+                if not linhas:
+                    return
+                for (dados,) in linhas:
+                    yield json.loads(dados)
+
+    def buscar_ids(self, id_cliente: Optional[str] = None, status: Optional[StatusPedido] = None) -> List[str]:
+        # Consulta direta ao banco usando os índices por cliente e status
+        condicoes, parametros = [], []
+        if id_cliente is not None:
+            condicoes.append("id_cliente = ?")
+            parametros.append(id_cliente)
+        if status is not None:
+            condicoes.append("status = ?")
+            parametros.append(status.name)
+        onde = f" WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        linhas = self._repositorio.executar(f"SELECT id_pedido FROM pedidos{onde} ORDER BY data_criacao, rowid", tuple(parametros))
+        return [id_pedido for (id_pedido,) in linhas.fetchall()]
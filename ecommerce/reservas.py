@@ -0,0 +1,127 @@
+import heapq
+import threading
+import time
+from itertools import count
+from typing import Callable, Dict, List, Optional, Tuple
+from .produto import Produto
+
+
+class GerenciadorReservas:
+    """Reservas temporárias de estoque feitas por carrinhos.
+
+    Cada carrinho mantém no máximo uma reserva por produto, com quantidade e prazo de validade (TTL).
+    O estoque disponível de um produto é o estoque físico menos as reservas ativas dos outros carrinhos.
+    As expirações ficam num heap ordenado por prazo: reservas vencidas são retiradas do topo em
+    O(log n) cada, sem percorrer carrinhos. Entradas do heap de reservas já alteradas ou liberadas
+    são descartadas quando chegam ao topo (remoção preguiçosa).
+
+    As reservas são um compromisso de boa-fé: o checkout (SistemaEcommerce.criar_pedido) continua
+    revalidando o estoque sob as travas dos produtos antes de dar baixa.
+    """
+
+    def __init__(self, ttl_padrao: float = 15 * 60, relogio: Callable[[], float] = time.monotonic):
+        if ttl_padrao <= 0:
+            raise ValueError("O TTL das reservas deve ser positivo.")
+        self.ttl_padrao = ttl_padrao
+        self._relogio = relogio
+        self._trava = threading.Lock()
+        self._reservas: Dict[str, Dict[int, Tuple[int, float]]] = {} # id_carrinho -> id_produto -> (quantidade, expira_em)
+        self._reservado_por_produto: Dict[int, int] = {}
+        self._heap: List[Tuple[float, int, str, int]] = [] # (expira_em, desempate, id_carrinho, id_produto)
+        self._desempate = count()
+
+    # --- Manutenção interna (chamada com a trava adquirida) ---
+
+    def _expirar(self, agora: float) -> int:
+        expiradas = 0
+        while self._heap and self._heap[0][0] <= agora:
+            expira_em, _, id_carrinho, id_produto = heapq.heappop(self._heap)
+            reserva = self._reservas.get(id_carrinho, {}).get(id_produto)
+            if reserva is not None and reserva[1] == expira_em: # entrada ainda corresponde à reserva vigente
+                self._remover(id_carrinho, id_produto)
+                expiradas += 1
+        return expiradas
+
+    def _remover(self, id_carrinho: str, id_produto: int) -> int:
+        reservas_carrinho = self._reservas.get(id_carrinho)
+        if not reservas_carrinho or id_produto not in reservas_carrinho:
+            return 0
+        quantidade, _ = reservas_carrinho.pop(id_produto)
+        if not reservas_carrinho:
+            del self._reservas[id_carrinho]
+        restante = self._reservado_por_produto[id_produto] - quantidade
+        if restante:
+            self._reservado_por_produto[id_produto] = restante
+        else:
+            del self._reservado_por_produto[id_produto]
+        return quantidade
+
+    def _reservado_por_outros(self, id_produto: int, id_carrinho: Optional[str]) -> int:
+        proprio = self._reservas.get(id_carrinho, {}).get(id_produto, (0, 0))[0] if id_carrinho is not None else 0
+        return self._reservado_por_produto.get(id_produto, 0) - proprio
+
+    # --- API pública ---
+
+    def reservar(self, id_carrinho: str, produto: Produto, quantidade: int, ttl: Optional[float] = None) -> bool:
+        # Define a reserva do carrinho para o produto como `quantidade` (substitui a anterior e renova o prazo)
+        if quantidade <= 0:
+            raise ValueError("A quantidade reservada deve ser positiva.")
+        with self._trava:
+            agora = self._relogio()
+            self._expirar(agora)
+            if produto.quantidade_estoque - self._reservado_por_outros(produto.id_produto, id_carrinho) < quantidade:
+                return False
+            self._remover(id_carrinho, produto.id_produto)
+            expira_em = agora + (ttl if ttl is not None else self.ttl_padrao)
+            self._reservas.setdefault(id_carrinho, {})[produto.id_produto] = (quantidade, expira_em)
+            self._reservado_por_produto[produto.id_produto] = self._reservado_por_produto.get(produto.id_produto, 0) + quantidade
+            heapq.heappush(self._heap, (expira_em, next(self._desempate), id_carrinho, produto.id_produto))
+            return True
+
+    def liberar(self, id_carrinho: str, id_produto: Optional[int] = None) -> int:
+        # Libera a reserva de um produto ou, sem id_produto, todas as do carrinho; retorna a quantidade liberada
+        with self._trava:
+            if id_produto is not None:
+                return self._remover(id_carrinho, id_produto)
+            return sum(self._remover(id_carrinho, id_reservado) for id_reservado in list(self._reservas.get(id_carrinho, {})))
+
+    def consumir(self, id_carrinho: str) -> Dict[int, int]:
+        # Encerra as reservas do carrinho quando viram pedido; retorna id_produto -> quantidade que estava reservada
+        with self._trava:
+            reservas_carrinho = dict(self._reservas.get(id_carrinho, {}))
+            for id_produto in reservas_carrinho:
+                self._remover(id_carrinho, id_produto)
+            return {id_produto: quantidade for id_produto, (quantidade, _) in reservas_carrinho.items()}
+
+    def renovar(self, id_carrinho: str, ttl: Optional[float] = None) -> int:
+        # Estende o prazo de todas as reservas ativas do carrinho; retorna quantas foram renovadas
+        with self._trava:
+            agora = self._relogio()
+            self._expirar(agora)
+            expira_em = agora + (ttl if ttl is not None else self.ttl_padrao)
+            reservas_carrinho = self._reservas.get(id_carrinho, {})
+            for id_produto, (quantidade, _) in reservas_carrinho.items():
+                reservas_carrinho[id_produto] = (quantidade, expira_em)
+                heapq.heappush(self._heap, (expira_em, next(self._desempate), id_carrinho, id_produto))
+            return len(reservas_carrinho)
+
+    def expirar(self) -> int: # libera as reservas vencidas; também é feito automaticamente a cada consulta
+        with self._trava:
+            return self._expirar(self._relogio())
+
+    def quantidade_reservada(self, id_produto: int, id_carrinho: Optional[str] = None) -> int:
+        # Total reservado do produto; com id_carrinho, apenas a reserva desse carrinho
+        with self._trava:
+            self._expirar(self._relogio())
+            if id_carrinho is not None:
+                return self._reservas.get(id_carrinho, {}).get(id_produto, (0, 0))[0]
+            return self._reservado_por_produto.get(id_produto, 0)
+
+    def disponivel(self, produto: Produto, id_carrinho: Optional[str] = None) -> int:
+        # Estoque físico menos as reservas ativas de outros carrinhos (as do próprio carrinho contam como disponíveis)
+        with self._trava:
+            self._expirar(self._relogio())
+            return max(0, produto.quantidade_estoque - self._reservado_por_outros(produto.id_produto, id_carrinho))
+
+    def __len__(self) -> int: # número de reservas ativas (sem expirar as vencidas)
+        return sum(len(reservas_carrinho) for reservas_carrinho in self._reservas.values())
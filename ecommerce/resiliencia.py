@@ -0,0 +1,243 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as TimeoutFuturo
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+
+class EstadoCircuito(Enum):
+    FECHADO = "Fechado" # chamadas passam normalmente
+    ABERTO = "Aberto" # chamadas falham na hora até o tempo de recuperação passar
+    SEMI_ABERTO = "Semi-aberto" # uma chamada de teste decide se o circuito fecha ou reabre
+
+
+class CircuitoAberto(Exception):
+    """Chamada recusada sem contatar o gateway porque o circuito do método está aberto."""
+
+
+class TimeoutNaFila(TimeoutError):
+    """O prazo acabou antes de a chamada sair do pool de threads: o gateway não foi contatado."""
+
+
+class ResultadoIncerto(TimeoutError):
+    """O prazo acabou com a chamada já em andamento: o gateway pode ou não tê-la processado."""
+
+
+class DisjuntorCircuito:
+    """Disjuntor de um método do gateway (ex.: cartão ou PIX).
+
+    Depois de `limiar_falhas` falhas consecutivas o circuito abre e as chamadas falham na hora, sem
+    somar carga a um gateway que já está com problemas. Passado `tempo_recuperacao`, o circuito fica
+    semi-aberto e deixa passar uma única chamada de teste: sucesso fecha o circuito, falha reabre.
+    """
+
+    def __init__(self, limiar_falhas: int = 5, tempo_recuperacao: float = 30.0, relogio: Callable[[], float] = time.monotonic):
+        if limiar_falhas <= 0:
+            raise ValueError("limiar_falhas deve ser positivo.")
+        if tempo_recuperacao <= 0:
+            raise ValueError("tempo_recuperacao deve ser positivo.")
+        self.limiar_falhas = limiar_falhas
+        self.tempo_recuperacao = tempo_recuperacao
+        self._relogio = relogio
+        self._trava = threading.Lock()
+        self._estado = EstadoCircuito.FECHADO
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+        self.falhas_consecutivas = 0
+        self.aberturas = 0
+
+    @property
+    def estado(self) -> EstadoCircuito:
+        with self._trava:
+            return self._atualizar_estado()
+
+    def _atualizar_estado(self) -> EstadoCircuito: # chamado com a trava adquirida
+        if self._estado == EstadoCircuito.ABERTO and self._relogio() - self._aberto_em >= self.tempo_recuperacao:
+            self._estado = EstadoCircuito.SEMI_ABERTO
+            self._teste_em_andamento = False
+        return self._estado
+
+    def permitir(self) -> bool:
+        # True se a chamada pode seguir para o gateway
+        with self._trava:
+            estado = self._atualizar_estado()
+            if estado == EstadoCircuito.FECHADO:
+                return True
+            if estado == EstadoCircuito.SEMI_ABERTO and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return True
+            return False
+
+    def registrar_sucesso(self):
+        with self._trava:
+            self.falhas_consecutivas = 0
+            self._estado = EstadoCircuito.FECHADO
+            self._teste_em_andamento = False
+
+    def liberar(self):
+        # A chamada terminou sem resultado que diga algo sobre a saúde do gateway (ex.: erro de validação)
+        with self._trava:
+            self._teste_em_andamento = False
+
+    def registrar_falha(self):
+        with self._trava:
+            self.falhas_consecutivas += 1
+            if self._estado == EstadoCircuito.SEMI_ABERTO or self.falhas_consecutivas >= self.limiar_falhas:
+                if self._estado != EstadoCircuito.ABERTO:
+                    self.aberturas += 1
+                self._estado = EstadoCircuito.ABERTO
+                self._aberto_em = self._relogio()
+                self._teste_em_andamento = False
+
+
+class ResilienciaGateway:
+    """Novas tentativas, timeout e disjuntor em volta das chamadas ao gateway de pagamento.
+
+    Só exceções de `excecoes_transitorias` (timeout, erro de conexão) contam como falha: uma recusa do
+    gateway (retorno False) é uma resposta válida, não é repetida e não abre o circuito. Cada chamada
+    tem até `max_tentativas` tentativas, com espera exponencial limitada a `atraso_maximo` e jitter
+    completo (espera sorteada entre 0 e o limite), para que os checkouts não repitam todos ao mesmo tempo.
+
+    Com `timeout`, a chamada síncrona roda num pool de threads. Se o prazo acaba com ela ainda na fila,
+    ela é cancelada (TimeoutNaFila) e pode ser repetida; se já estava em andamento, é abandonada (a thread
+    termina sozinha quando o gateway responder) e o resultado fica incerto (ResultadoIncerto): o gateway
+    pode ter processado a chamada, então ela só é repetida com `idempotente=True` (consulta sem efeito
+    colateral ou chamada com chave de idempotência enviada ao gateway). Cada método de pagamento tem seu
+    próprio disjuntor.
+    """
+
+    def __init__(self, max_tentativas: int = 3, atraso_base: float = 0.1, atraso_maximo: float = 2.0,
+                 timeout: Optional[float] = 5.0, limiar_falhas: int = 5, tempo_recuperacao: float = 30.0,
+                 excecoes_transitorias: Tuple[Type[BaseException], ...] = (TimeoutError, ConnectionError),
+                 relogio: Callable[[], float] = time.monotonic, dormir: Callable[[float], None] = time.sleep,
+                 aleatorio: Optional[random.Random] = None, max_threads: int = 32):
+        if max_tentativas <= 0:
+            raise ValueError("max_tentativas deve ser positivo.")
+        if atraso_base < 0 or atraso_maximo < atraso_base:
+            raise ValueError("Os atrasos devem satisfazer 0 <= atraso_base <= atraso_maximo.")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout deve ser positivo.")
+        self.max_tentativas = max_tentativas
+        self.atraso_base = atraso_base
+        self.atraso_maximo = atraso_maximo
+        self.timeout = timeout
+        self.limiar_falhas = limiar_falhas
+        self.tempo_recuperacao = tempo_recuperacao
+        self.excecoes_transitorias = excecoes_transitorias
+        self._relogio = relogio
+        self._dormir = dormir
+        self._aleatorio = aleatorio if aleatorio else random.Random()
+        self._max_threads = max_threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._trava = threading.Lock()
+        self._disjuntores: Dict[str, DisjuntorCircuito] = {}
+        self._contadores: Dict[str, Dict[str, int]] = {}
+
+    def disjuntor(self, metodo: str) -> DisjuntorCircuito:
+        with self._trava:
+            disjuntor = self._disjuntores.get(metodo)
+            if disjuntor is None:
+                disjuntor = self._disjuntores[metodo] = DisjuntorCircuito(self.limiar_falhas, self.tempo_recuperacao, self._relogio)
+                self._contadores[metodo] = dict.fromkeys(("chamadas", "tentativas", "novas_tentativas", "timeouts", "falhas", "rejeitadas"), 0)
+            return disjuntor
+
+    def _contar(self, metodo: str, contador: str):
+        with self._trava:
+            self._contadores[metodo][contador] += 1
+
+    def _atraso(self, tentativa: int) -> float:
+        # Jitter completo sobre a espera exponencial limitada: uniforme em [0, min(máximo, base * 2^tentativa)]
+        return self._aleatorio.uniform(0, min(self.atraso_maximo, self.atraso_base * (2 ** tentativa)))
+
+    def _antes_da_tentativa(self, metodo: str, disjuntor: DisjuntorCircuito):
+        if not disjuntor.permitir():
+            self._contar(metodo, "rejeitadas")
+            raise CircuitoAberto(f"Gateway de pagamento indisponível para {metodo} (circuito aberto).")
+        self._contar(metodo, "tentativas")
+
+    def _apos_falha(self, metodo: str, disjuntor: DisjuntorCircuito, erro: BaseException, tentativa: int, idempotente: bool) -> bool:
+        # Registra a falha transitória; True se ainda há tentativas e a chamada pode ser repetida
+        timeout = isinstance(erro, TimeoutError)
+        if timeout:
+            self._contar(metodo, "timeouts")
+        disjuntor.registrar_falha()
+        incerto = timeout and not isinstance(erro, TimeoutNaFila) # o gateway pode ter recebido a chamada
+        if tentativa + 1 >= self.max_tentativas or (incerto and not idempotente):
+            self._contar(metodo, "falhas")
+            return False
+        self._contar(metodo, "novas_tentativas")
+        return True
+
+    def _chamar_com_timeout(self, funcao: Callable[..., Any], *args) -> Any:
+        if self.timeout is None:
+            return funcao(*args)
+        with self._trava:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_threads, thread_name_prefix="gateway")
+        futuro = self._executor.submit(funcao, *args)
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TimeoutFuturo:
+            if futuro.cancel(): # ainda na fila: não ocupa uma thread à toa e não chega ao gateway
+                raise TimeoutNaFila(f"Chamada não foi enviada ao gateway em {self.timeout}s (pool ocupado).") from None
+            raise ResultadoIncerto(f"Gateway não respondeu em {self.timeout}s; a chamada pode ter sido processada.") from None
+
+    def executar(self, metodo: str, funcao: Callable[..., Any], *args, idempotente: bool = False) -> Any:
+        disjuntor = self.disjuntor(metodo)
+        self._contar(metodo, "chamadas")
+        for tentativa in range(self.max_tentativas):
+            self._antes_da_tentativa(metodo, disjuntor)
+            try:
+                resultado = self._chamar_com_timeout(funcao, *args)
+            except self.excecoes_transitorias as e:
+                if not self._apos_falha(metodo, disjuntor, e, tentativa, idempotente):
+                    raise
+                self._dormir(self._atraso(tentativa))
+                continue
+            except BaseException:
+                disjuntor.liberar()
+                raise
+            disjuntor.registrar_sucesso()
+            return resultado
+
+    async def executar_async(self, metodo: str, funcao: Callable[..., Awaitable[Any]], *args, idempotente: bool = False) -> Any:
+        # Mesma política de executar(), com timeout e esperas que não bloqueiam o event loop
+        disjuntor = self.disjuntor(metodo)
+        self._contar(metodo, "chamadas")
+        for tentativa in range(self.max_tentativas):
+            self._antes_da_tentativa(metodo, disjuntor)
+            try:
+                try:
+                    resultado = await asyncio.wait_for(funcao(*args), self.timeout)
+                except asyncio.TimeoutError: # a corrotina já tinha começado: wait_for a cancela, mas o gateway pode ter recebido
+                    raise ResultadoIncerto(f"Gateway não respondeu em {self.timeout}s; a chamada pode ter sido processada.") from None
+            except self.excecoes_transitorias as e:
+                if not self._apos_falha(metodo, disjuntor, e, tentativa, idempotente):
+                    raise
+                await asyncio.sleep(self._atraso(tentativa))
+                continue
+            except BaseException:
+                disjuntor.liberar()
+                raise
+            disjuntor.registrar_sucesso()
+            return resultado
+
+    def metricas(self) -> Dict[str, Dict[str, Any]]:
+        # Por método: estado do circuito, falhas consecutivas, aberturas e contadores de chamadas/tentativas
+        with self._trava:
+            disjuntores = dict(self._disjuntores)
+            contadores = {metodo: dict(valores) for metodo, valores in self._contadores.items()}
+        return {
+            metodo: {"estado": disjuntor.estado.value, "falhas_consecutivas": disjuntor.falhas_consecutivas,
+                     "aberturas": disjuntor.aberturas, **contadores[metodo]}
+            for metodo, disjuntor in disjuntores.items()
+        }
+
+    def fechar(self):
+        with self._trava:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,102 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .carrinho import Carrinho
+from .pedido import Pedido, StatusPedido
+from .sistema_ecommerce import SistemaEcommerce
+
+
+class SistemaEcommerceAsync:
+    """Fachada asyncio sobre SistemaEcommerce e SistemaPagamento.
+
+    As chamadas ao gateway (fraude, autorização, reembolso) são aguardadas com as versões _async do
+    SistemaPagamento, então um único event loop mantém milhares de pagamentos em andamento sem uma
+    thread por pagamento. `max_concorrencia` limita quantas chamadas ao gateway ficam em voo ao mesmo
+    tempo; as demais aguardam no semáforo.
+
+    As operações de catálogo e de pedidos (criação, cancelamento) são rápidas e em memória e rodam
+    direto no loop. Com persistência em disco (diário ou repositório SQLite), use
+    `operacoes_em_thread=True` para executá-las no executor padrão e não bloquear o loop.
+    """
+
+    def __init__(self, sistema: Optional[SistemaEcommerce] = None, max_concorrencia: int = 1000,
+                 operacoes_em_thread: bool = False):
+        if max_concorrencia <= 0:
+            raise ValueError("max_concorrencia deve ser positivo.")
+        self.sistema = sistema if sistema else SistemaEcommerce()
+        self.max_concorrencia = max_concorrencia
+        self.operacoes_em_thread = operacoes_em_thread
+        self._semaforo = asyncio.Semaphore(max_concorrencia)
+        self.em_andamento = 0 # chamadas ao gateway em voo neste momento
+        self.pico_em_andamento = 0
+
+    async def _executar(self, funcao, *args):
+        if self.operacoes_em_thread:
+            return await asyncio.to_thread(funcao, *args)
+        return funcao(*args)
+
+    async def _chamar_gateway(self, corrotina):
+        async with self._semaforo:
+            self.em_andamento += 1
+            self.pico_em_andamento = max(self.pico_em_andamento, self.em_andamento)
+            try:
+                return await corrotina
+            finally:
+                self.em_andamento -= 1
+
+    # --- Pedidos ---
+
+    async def criar_pedido(self, id_cliente: str, carrinho: Carrinho, endereco_entrega: Dict[str, str], metodo_pagamento: str) -> Optional[Pedido]:
+        return await self._executar(self.sistema.criar_pedido, id_cliente, carrinho, endereco_entrega, metodo_pagamento)
+
+    async def cancelar_pedido(self, id_pedido: str, reembolsar: bool = True) -> bool:
+        # Cancela e, se o pedido estava pago, solicita o reembolso ao gateway
+        pedido = self.sistema.buscar_pedido_por_id(id_pedido)
+        estava_pago = pedido is not None and pedido.data_pagamento is not None and pedido.id_transacao_pagamento is not None
+        if not await self._executar(self.sistema.cancelar_pedido, id_pedido):
+            return False
+        if reembolsar and estava_pago:
+            return await self.reembolsar_pedido(id_pedido)
+        return True
+
+    # --- Pagamentos ---
+
+    async def processar_pagamento_pedido(self, id_pedido: str, dados_pagamento: Dict[str, Any], chave_idempotencia: Optional[str] = None) -> bool:
+        if chave_idempotencia is not None: # compartilha o cache de idempotência do sistema síncrono
+            return await self.sistema.idempotencia.executar_async(chave_idempotencia, id_pedido,
+                                                                  lambda: self._processar_pagamento_pedido(id_pedido, dados_pagamento))
+        return await self._processar_pagamento_pedido(id_pedido, dados_pagamento)
+
+    async def _processar_pagamento_pedido(self, id_pedido: str, dados_pagamento: Dict[str, Any]) -> bool:
+        # Mesmo fluxo de SistemaEcommerce.processar_pagamento_pedido, aguardando o gateway
+        sistema = self.sistema
+        pedido = sistema._iniciar_pagamento(id_pedido)
+        if not pedido:
+            return False
+        try:
+            requisicao = sistema._requisicao_pagamento(pedido, dados_pagamento)
+            if requisicao is None:
+                return False
+            pagamento = sistema.sistema_pagamento
+            if requisicao[0] == "cartao":
+                chamada = pagamento.processar_cartao_credito_async(float(pedido.valor_total), requisicao[1], requisicao[2], id_cliente=pedido.id_cliente)
+            else:
+                chamada = pagamento.processar_pix_async(float(pedido.valor_total), id_cliente=pedido.id_cliente)
+            resultado = await self._chamar_gateway(chamada)
+            return sistema._concluir_pagamento(pedido, requisicao, resultado)
+        except Exception as e:
+            return sistema._falha_inesperada_pagamento(pedido, e)
+
+    async def processar_pagamentos(self, solicitacoes: Iterable[Tuple[str, Dict[str, Any]]]) -> List[bool]:
+        # Processa vários pagamentos (id_pedido, dados_pagamento) concorrentemente; resultados na ordem de entrada
+        return list(await asyncio.gather(*(self.processar_pagamento_pedido(id_pedido, dados) for id_pedido, dados in solicitacoes)))
+
+    async def reembolsar_pedido(self, id_pedido: str) -> bool:
+        pedido = self.sistema.buscar_pedido_por_id(id_pedido)
+        if not pedido or not pedido.id_transacao_pagamento:
+            print(f"Erro: Pedido {id_pedido} não possui pagamento para reembolsar.")
+            return False
+        if pedido.status != StatusPedido.CANCELADO:
+            print(f"Erro: Pedido {id_pedido} precisa estar cancelado para ser reembolsado (Status: {pedido.status.name}).")
+            return False
+        reembolso = self.sistema.sistema_pagamento.processar_reembolso_async(pedido.id_transacao_pagamento, float(pedido.valor_total))
+        return await self._chamar_gateway(reembolso)
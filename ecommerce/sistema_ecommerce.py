@@ -1,16 +1,78 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, Iterator, Iterable
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager, nullcontext
+import math
+import threading
 from decimal import Decimal
 import uuid
 from .produto import Produto
 from .carrinho import Carrinho
 from .sistema_pagamento import SistemaPagamento
 from .pedido import Pedido, StatusPedido
+from .indices import IndiceNome, IndiceFacetas, IndicePrecos, IndiceTemporal, mesclar_ordenado
+from .catalogo_colunar import CatalogoColunar
+from .diario_eventos import DiarioEventos
+from .repositorio_sqlite import RepositorioSQLite
+from .arquivo_pedidos import ArquivoPedidos
+from .reservas import GerenciadorReservas
+from .resiliencia import ResultadoIncerto
+from .idempotencia import CacheIdempotencia
+from .relatorios import AgregadosVendas, STATUS_VENDA, formatar_linha_pedido, filtrar_pedidos, iterar_relatorio_vendas, escrever_relatorio
+from datetime import datetime, timedelta
+from .importacao_catalogo import ler_registros, converter_registros, em_lotes
 
 class SistemaEcommerce:
-    def __init__(self, sistema_pagamento: Optional[SistemaPagamento] = None):
-        self.produtos: Dict[int, Produto] = {} # cria o catálogo de produtos como um dicionário vazio
-        self.pedidos: Dict[str, Pedido] = {}
+    TAMANHO_BLOCO_ITERACAO = 256 # ids lidos por vez em iterar_produtos
+    # Status sem transições de saída: pedidos nesses status nunca mudam e podem ir para o arquivo
+    STATUS_TERMINAIS = frozenset(status for status, destinos in Pedido.TRANSICOES_PERMITIDAS.items() if not destinos)
+
+    def __init__(self, sistema_pagamento: Optional[SistemaPagamento] = None, catalogo_colunar: bool = False,
+                 diario: Optional[DiarioEventos] = None, repositorio: Optional[RepositorioSQLite] = None,
+                 arquivo: Optional[ArquivoPedidos] = None, reservas: Optional[GerenciadorReservas] = None,
+                 idempotencia: Optional[CacheIdempotencia] = None):
+        if diario is not None and repositorio is not None:
+            raise ValueError("Use o diário de eventos ou o repositório SQLite, não ambos.")
+        # Com um repositório os mapeamentos de produtos e pedidos são persistidos no SQLite
+        self.repositorio = repositorio
+        self.produtos: Dict[int, Produto] = repositorio.produtos if repositorio else {} # cria o catálogo de produtos como um dicionário vazio
+        self.pedidos: Dict[str, Pedido] = repositorio.pedidos if repositorio else {}
+        self._indice_nome = IndiceNome() # índice invertido para buscar_produtos_por_nome
+        self._indice_facetas = IndiceFacetas() # categoria, faixa de preço e disponibilidade
+        self._indice_precos = IndicePrecos() # produtos ordenados por preço (global e por categoria)
+        # Cópia colunar opcional do catálogo para análises (valor de inventário, estoque por categoria...)
+        self.catalogo_colunar: Optional[CatalogoColunar] = CatalogoColunar() if catalogo_colunar else None
+        # Ordenações estáveis usadas na paginação por cursor
+        self._ids_produtos_ordenados: List[int] = []
+        self._ordem_pedidos: List[Optional[str]] = [] # ids na ordem de criação; a posição é a sequência do pedido (None = removido)
+        self._sequencia_pedidos: Dict[str, int] = {} # id_pedido -> posição em _ordem_pedidos
+        self._pedidos_por_cliente: Dict[str, List[str]] = {} # id_cliente -> ids dos pedidos em ordem de criação
+        self._agregados_vendas = AgregadosVendas() # totais de vendas atualizados pelos eventos dos pedidos
+        self._indice_data_criacao = IndiceTemporal() # pedidos ordenados por data_criacao
+        self._indice_data_pagamento = IndiceTemporal() # pedidos ordenados por data_pagamento
         self.sistema_pagamento = sistema_pagamento if sistema_pagamento else SistemaPagamento() 
+        # Resultados de pagamento por chave de idempotência (repetições do cliente não cobram de novo)
+        self.idempotencia = idempotencia if idempotencia else CacheIdempotencia()
+        # Concorrência: uma trava por produto protege verificação + baixa de estoque; a trava dos índices
+        # só cobre a manutenção das estruturas compartilhadas (índices, ordenações e agregados), que é curta
+        self._travas_produtos: Dict[int, threading.Lock] = {}
+        self._trava_indices = threading.RLock()
+        # Profundidade, por thread, das operações que seguram essas travas: o snapshot automático espera
+        # a operação terminar em vez de rodar dentro dela (ver _registrar_evento)
+        self._local = threading.local()
+        self._snapshot_pendente = False
+        # Reservas opcionais de estoque: carrinhos criados por criar_carrinho() seguram o estoque por um TTL
+        self.reservas = reservas
+        # Arquivo opcional de pedidos finalizados: ficam fora de self.pedidos, mas continuam nos índices e agregados
+        self.arquivo = arquivo
+        if arquivo is not None and diario is None: # com diário, os pedidos arquivados voltam pelo snapshot/replay
+            self._indexar_pedidos_arquivados()
+        # Diário de eventos opcional: o estado salvo é recuperado antes de o diário passar a receber eventos
+        self.diario: Optional[DiarioEventos] = None
+        if diario is not None:
+            self._recuperar_do_diario(diario)
+            self.diario = diario
+        if repositorio is not None:
+            self._carregar_do_repositorio()
         print("Sistema de E-commerce inicializado.")
 
     # --- Gerenciamento de Produtos ---
@@ -19,20 +81,197 @@ class SistemaEcommerce:
         if produto.id_produto in self.produtos: # Verifica se o produto já existe no catálogo
             raise ValueError(f"Produto com ID {produto.id_produto} já existe no catálogo.")
         self.produtos[produto.id_produto] = produto # Adiciona o produto ao dicionário de produtos
+        self._indexar_produto(produto)
+        self._registrar_evento("produto_adicionado", produto.obter_informacoes())
         print(f"Produto '{produto.nome}' (ID: {produto.id_produto}) adicionado ao catálogo.")
 
+    def importar_catalogo(self, caminho: str, formato: Optional[str] = None, tamanho_lote: int = 1000, max_rejeicoes_detalhadas: int = 1000) -> Dict[str, Any]:
+        # Importa produtos de um arquivo CSV ou JSONL em streaming. Linhas inválidas são rejeitadas
+        # sem interromper a carga; cada lote é indexado em massa antes de entrar em self.produtos.
+        # As buscas por nome e por faixa de preço enxergam os lotes quando os índices são consolidados
+        # (à medida que os pendentes dobram de tamanho e, sempre, ao final da importação).
+        novos_produtos: List[Produto] = []
+        total_rejeitados = 0
+        rejeicoes: List[Tuple[int, str]] = [] # (número da linha, motivo), limitado a max_rejeicoes_detalhadas
+
+        try:
+            for lote in em_lotes(converter_registros(ler_registros(caminho, formato)), tamanho_lote):
+                validos: Dict[int, Produto] = {}
+                for numero_linha, produto, motivo in lote:
+                    if produto is not None and (produto.id_produto in self.produtos or produto.id_produto in validos):
+                        produto, motivo = None, f"Produto com ID {produto.id_produto} já existe no catálogo."
+                    if produto is None:
+                        total_rejeitados += 1
+                        if len(rejeicoes) < max_rejeicoes_detalhadas:
+                            rejeicoes.append((numero_linha, motivo))
+                        continue
+                    validos[produto.id_produto] = produto
+                produtos_lote = list(validos.values())
+                try: # indexa antes de publicar: um erro não deixa o catálogo com produtos indexados pela metade
+                    self._indexar_produtos_em_lote(produtos_lote)
+                except Exception:
+                    for produto in produtos_lote:
+                        self._desindexar_produto(produto)
+                    raise
+                self.produtos.update(validos)
+                novos_produtos.extend(produtos_lote)
+                for produto in produtos_lote:
+                    self._registrar_evento("produto_adicionado", produto.obter_informacoes())
+        finally: # mesmo numa carga interrompida, o que já foi publicado fica visível nas buscas
+            self._consolidar_indices()
+        print(f"Importação de '{caminho}' concluída: {len(novos_produtos)} produto(s) importado(s), {total_rejeitados} linha(s) rejeitada(s).")
+        return {"importados": len(novos_produtos), "rejeitados": total_rejeitados, "rejeicoes": rejeicoes}
+
+    def remover_produto(self, id_produto: int) -> bool:
+        produto = self.produtos.pop(id_produto, None)
+        if not produto:
+            print(f"Erro: Produto com ID {id_produto} não encontrado no catálogo.")
+            return False
+        self._desindexar_produto(produto)
+        self._registrar_evento("produto_removido", {"id_produto": id_produto})
+        print(f"Produto '{produto.nome}' (ID: {id_produto}) removido do catálogo.")
+        return True
+
+    def atualizar_produto(self, id_produto: int, **campos) -> bool: # ex.: atualizar_produto(1, nome="Novo nome")
+        produto = self.buscar_produto_por_id(id_produto)
+        if not produto:
+            print(f"Erro: Produto com ID {id_produto} não encontrado no catálogo.")
+            return False
+        for campo, valor in campos.items():
+            if campo == "id_produto" or campo not in produto.obter_informacoes():
+                raise ValueError(f"Campo '{campo}' não pode ser atualizado.")
+            if campo == "preco" and (not math.isfinite(valor) or valor <= 0):
+                raise ValueError("O preço do produto deve ser positivo.")
+            if campo == "quantidade_estoque" and valor < 0:
+                raise ValueError("A quantidade em estoque não pode ser negativa.")
+            with self._travar_produtos([id_produto]): # não intercala com a baixa de estoque de um checkout
+                setattr(produto, campo, valor) # os índices são atualizados pelo ouvinte do produto
+        return True
+
+    # --- Índices do Catálogo ---
+
+    def _indexar_produto(self, produto: Produto):
+        with self._trava_indices:
+            insort(self._ids_produtos_ordenados, produto.id_produto)
+            self._indice_nome.adicionar(produto)
+            self._indice_facetas.adicionar(produto)
+            self._indice_precos.adicionar(produto)
+            if self.catalogo_colunar is not None:
+                self.catalogo_colunar.adicionar(produto)
+            produto.adicionar_ouvinte(self._ao_alterar_produto)
+
+    def _indexar_produtos_em_lote(self, produtos: List[Produto]):
+        with self._trava_indices:
+            # Os ids costumam chegar em ordem crescente; aí a mescla só acrescenta no final
+            self._ids_produtos_ordenados = mesclar_ordenado(self._ids_produtos_ordenados, [p.id_produto for p in produtos])
+            self._indice_nome.adicionar_lote(produtos)
+            self._indice_facetas.adicionar_lote(produtos)
+            self._indice_precos.adicionar_lote(produtos)
+            if self.catalogo_colunar is not None:
+                self.catalogo_colunar.adicionar_lote(produtos)
+            for produto in produtos:
+                produto.adicionar_ouvinte(self._ao_alterar_produto)
+
+    def _consolidar_indices(self): # intercala o que os lotes deixaram pendente nos índices ordenados
+        with self._trava_indices:
+            self._indice_nome.consolidar()
+            self._indice_precos.consolidar()
+
+    def _desindexar_produto(self, produto: Produto):
+        with self._trava_indices:
+            produto.remover_ouvinte(self._ao_alterar_produto)
+            posicao = bisect_left(self._ids_produtos_ordenados, produto.id_produto)
+            if posicao < len(self._ids_produtos_ordenados) and self._ids_produtos_ordenados[posicao] == produto.id_produto:
+                del self._ids_produtos_ordenados[posicao]
+            self._indice_nome.remover(produto)
+            self._indice_facetas.remover(produto)
+            self._indice_precos.remover(produto)
+            if self.catalogo_colunar is not None:
+                self.catalogo_colunar.remover(produto)
+
+    def _ao_alterar_produto(self, produto: Produto, campo: str, valor_anterior): # chamado pelo Produto a cada alteração
+        with self._operacao(), self._trava_indices:
+            if campo == "nome":
+                self._indice_nome.reindexar(produto)
+            elif campo in ("categoria", "preco", "quantidade_estoque"):
+                self._indice_facetas.reindexar(produto)
+                if campo != "quantidade_estoque":
+                    self._indice_precos.reindexar(produto)
+                if self.catalogo_colunar is not None:
+                    self.catalogo_colunar.atualizar(produto)
+            self._registrar_evento("produto_alterado", {"id_produto": produto.id_produto, "campo": campo, "valor": getattr(produto, campo)})
+
     def buscar_produto_por_id(self, id_produto: int) -> Optional[Produto]: 
         return self.produtos.get(id_produto)
 
     def listar_produtos(self) -> List[Produto]: 
         return list(self.produtos.values())
 
+    def iterar_produtos(self, apos: Optional[int] = None, limite: Optional[int] = None) -> Iterator[Produto]:
+        # Percorre o catálogo em ordem de id_produto a partir do cursor `apos` (exclusivo).
+        # Lê blocos pequenos e refaz o bisect a partir do último id entregue, então inserções e
+        # remoções concorrentes não causam itens repetidos nem pulados entre os já existentes.
+        entregues = 0
+        ultimo = apos
+        while limite is None or entregues < limite:
+            inicio = 0 if ultimo is None else bisect_right(self._ids_produtos_ordenados, ultimo)
+            bloco = self._ids_produtos_ordenados[inicio:inicio + self.TAMANHO_BLOCO_ITERACAO]
+            if not bloco:
+                return
+            for id_produto in bloco:
+                ultimo = id_produto
+                produto = self.produtos.get(id_produto)
+                if produto is None: # removido depois que o bloco foi lido
+                    continue
+                yield produto
+                entregues += 1
+                if limite is not None and entregues >= limite:
+                    return
+
+    def paginar_produtos(self, cursor: Optional[int] = None, tamanho_pagina: int = 20) -> Tuple[List[Produto], Optional[int]]:
+        # Retorna (página, próximo cursor); o próximo cursor é None na última página
+        if tamanho_pagina <= 0:
+            raise ValueError("O tamanho da página deve ser positivo.")
+        pagina = list(self.iterar_produtos(cursor, tamanho_pagina))
+        if len(pagina) < tamanho_pagina:
+            return pagina, None
+        ultimo = pagina[-1].id_produto
+        tem_mais = bisect_right(self._ids_produtos_ordenados, ultimo) < len(self._ids_produtos_ordenados)
+        return pagina, ultimo if tem_mais else None
+
     def buscar_produtos_por_nome(self, termo_busca: str) -> List[Produto]:
-        termo_busca_lower = termo_busca.lower() 
-        return [p for p in self.produtos.values() if termo_busca_lower in p.nome.lower()] 
+        # Busca sem acentos e sem diferenciar maiúsculas. Os tokens do termo casam com o início das palavras do
+        # nome; só o primeiro pode casar no meio de uma palavra, e apenas quando nenhuma palavra começa com ele
+        # (ver IndiceNome.buscar)
+        resultado = self._indice_nome.buscar(termo_busca)
+        if resultado is None: # termo vazio retorna todo o catálogo, como antes
+            return self.listar_produtos()
+        return resultado
+
+    def listar_produtos_por_categoria(self, categoria: str) -> List[Produto]:
+        return self._indice_facetas.produtos_da_categoria(categoria)
+
+    def buscar_produtos_facetado(self, categoria: Optional[str] = None, faixa_preco: Optional[str] = None, em_estoque: Optional[bool] = None) -> Dict[str, Any]:
+        # Retorna os produtos filtrados e as contagens por faceta (categoria, faixa_preco, em_estoque) do resultado
+        produtos, facetas = self._indice_facetas.buscar(categoria=categoria, faixa_preco=faixa_preco, em_estoque=em_estoque)
+        return {"produtos": produtos, "facetas": facetas}
+
+    def buscar_produtos_por_preco(self, preco_min: Optional[float] = None, preco_max: Optional[float] = None, categoria: Optional[str] = None,
+                                  inicio: int = 0, limite: Optional[int] = None, decrescente: bool = False) -> List[Produto]:
+        # Produtos com preco_min <= preço <= preco_max, ordenados por preço e paginados por inicio/limite
+        return self._indice_precos.buscar_faixa(preco_min, preco_max, categoria, inicio, limite, decrescente)
+
+    def listar_produtos_mais_baratos(self, quantidade: int, categoria: Optional[str] = None) -> List[Produto]:
+        return self._indice_precos.mais_baratos(quantidade, categoria)
+
+    def listar_produtos_mais_caros(self, quantidade: int, categoria: Optional[str] = None) -> List[Produto]:
+        return self._indice_precos.mais_caros(quantidade, categoria)
 
     # --- Gerenciamento de Pedidos ---
 
+    def criar_carrinho(self) -> Carrinho: # carrinho ligado às reservas de estoque do sistema, se houver
+        return Carrinho(reservas=self.reservas)
+
     def criar_pedido(self, id_cliente: str, carrinho: Carrinho, endereco_entrega: Dict[str, str], metodo_pagamento: str) -> Optional[Pedido]: # Cria um pedido a partir de um carrinho
         print(f"\n--- Iniciando criação de pedido para cliente {id_cliente} ---") 
         # 1. Validar estoque para todos os itens do carrinho ANTES de criar o pedido
@@ -41,56 +280,318 @@ class SistemaEcommerce:
             print("Erro: Carrinho está vazio. Não é possível criar pedido.")
             return None
 
-        for produto, quantidade in itens_carrinho.items(): 
-            produto_catalogo = self.buscar_produto_por_id(produto.id_produto) # Busca o produto no catálogo
-            if not produto_catalogo: # Verifica se o produto existe no catálogo
-                print(f"Erro: Produto '{produto.nome}' (ID: {produto.id_produto}) não encontrado no catálogo.")
-                return None 
-            if not produto_catalogo.verificar_disponibilidade(quantidade): # Verifica se o produto está disponível em estoque
-                print(f"Erro: Estoque insuficiente para '{produto.nome}' (ID: {produto.id_produto}). Pedido: {quantidade}, Disponível: {produto_catalogo.quantidade_estoque}.")
-                return None 
-
-        # 2. Criar a instância do Pedido (se estoque OK)
-        try:
-            novo_pedido = Pedido(id_cliente, carrinho, endereco_entrega, metodo_pagamento)
-        except ValueError as e: # Se houver erro na criação do pedido, dados inválidos
-            print(f"Erro ao instanciar Pedido: {e}")
-            return None
-
-        # 3. Decrementar o estoque dos produtos
-        try:
-            for produto, quantidade in itens_carrinho.items():
-                produto_catalogo = self.buscar_produto_por_id(produto.id_produto)
-                if produto_catalogo:
-                    produto_catalogo.atualizar_estoque(-quantidade) # Remove do estoque
-                    print(f"Estoque do produto '{produto_catalogo.nome}' atualizado para {produto_catalogo.quantidade_estoque}.")
-                else:
-                     print(f"AVISO: Produto {produto.id_produto} não encontrado durante a baixa de estoque!")
-        except ValueError as e: # Se houver erro ao atualizar o estoque, estoque negativo)
-            print(f"Erro CRÍTICO ao atualizar estoque para o pedido {novo_pedido.id_pedido}: {e}") 
-            return None
-
-        # 4. Adicionar o pedido ao sistema e retornar
-        self.pedidos[novo_pedido.id_pedido] = novo_pedido
+        # As travas dos produtos do carrinho ficam adquiridas da verificação até o registro do pedido,
+        # então nenhum outro checkout pode consumir o mesmo estoque entre as duas etapas
+        with self._travar_produtos(produto.id_produto for produto in itens_carrinho):
+            for produto, quantidade in itens_carrinho.items(): 
+                produto_catalogo = self.buscar_produto_por_id(produto.id_produto) # Busca o produto no catálogo
+                if not produto_catalogo: # Verifica se o produto existe no catálogo
+                    print(f"Erro: Produto '{produto.nome}' (ID: {produto.id_produto}) não encontrado no catálogo.")
+                    return None 
+                # Com reservas, o disponível desconta o que outros carrinhos estão segurando
+                disponivel = produto_catalogo.quantidade_estoque if self.reservas is None else self.reservas.disponivel(produto_catalogo, carrinho.id_carrinho)
+                if not produto_catalogo.verificar_disponibilidade(quantidade) or disponivel < quantidade: # Verifica se o produto está disponível em estoque
+                    print(f"Erro: Estoque insuficiente para '{produto.nome}' (ID: {produto.id_produto}). Pedido: {quantidade}, Disponível: {disponivel}.")
+                    return None 
+
+            # 2. Criar a instância do Pedido (se estoque OK)
+            try:
+                novo_pedido = Pedido(id_cliente, carrinho, endereco_entrega, metodo_pagamento)
+            except ValueError as e: # Se houver erro na criação do pedido, dados inválidos
+                print(f"Erro ao instanciar Pedido: {e}")
+                return None
+
+            with self._transacao(): # baixa de estoque e gravação do pedido num único commit
+                # 3. Decrementar o estoque dos produtos (tudo ou nada)
+                baixados: List[Tuple[Produto, int]] = []
+                try:
+                    for produto, quantidade in itens_carrinho.items():
+                        produto_catalogo = self.buscar_produto_por_id(produto.id_produto)
+                        produto_catalogo.atualizar_estoque(-quantidade) # Remove do estoque
+                        baixados.append((produto_catalogo, quantidade))
+                        print(f"Estoque do produto '{produto_catalogo.nome}' atualizado para {produto_catalogo.quantidade_estoque}.")
+                except ValueError as e: # Se houver erro ao atualizar o estoque, estoque negativo)
+                    print(f"Erro CRÍTICO ao atualizar estoque para o pedido {novo_pedido.id_pedido}: {e}") 
+                    for produto_catalogo, quantidade in baixados: # devolve o que já tinha sido baixado
+                        produto_catalogo.atualizar_estoque(quantidade)
+                    return None
+
+                # 4. Adicionar o pedido ao sistema e retornar
+                self._registrar_pedido(novo_pedido)
+                if self.reservas is not None: # o estoque reservado acabou de ser baixado
+                    self.reservas.consumir(carrinho.id_carrinho)
         print(f"Pedido {novo_pedido.id_pedido} criado com sucesso e adicionado ao sistema.")
         # Limpar o carrinho após criar o pedido
         carrinho.limpar_carrinho()
         print("Carrinho esvaziado.")
         return novo_pedido
 
-    def buscar_pedido_por_id(self, id_pedido: str) -> Optional[Pedido]: 
-        return self.pedidos.get(id_pedido)
+    def criar_pedidos_em_lote(self, solicitacoes: Iterable[Tuple[str, Carrinho, Dict[str, str], str]]) -> List[Tuple[Optional[Pedido], Optional[str]]]:
+        # Cria vários pedidos (id_cliente, carrinho, endereço, método) de uma vez. Cada pedido é atômico:
+        # entra inteiro ou é rejeitado com o motivo. As travas de todos os produtos envolvidos são
+        # adquiridas uma única vez, a demanda é validada contra um saldo corrente por produto e o
+        # estoque de cada produto é gravado uma única vez no final.
+        solicitacoes = list(solicitacoes)
+        resultados: List[Tuple[Optional[Pedido], Optional[str]]] = []
+        ids_envolvidos = {produto.id_produto for _, carrinho, _, _ in solicitacoes for produto in carrinho.obter_itens()}
+        with self._travar_produtos(ids_envolvidos):
+            produtos = {id_produto: self.produtos.get(id_produto) for id_produto in ids_envolvidos}
+            saldo = {id_produto: produto.quantidade_estoque for id_produto, produto in produtos.items() if produto}
+            reservado = {id_produto: self.reservas.quantidade_reservada(id_produto) for id_produto in saldo} if self.reservas else {}
+            aceitos: List[Tuple[Pedido, Carrinho]] = []
+
+            for id_cliente, carrinho, endereco_entrega, metodo_pagamento in solicitacoes:
+                itens = carrinho.obter_itens()
+                proprio = {produto.id_produto: self.reservas.quantidade_reservada(produto.id_produto, carrinho.id_carrinho)
+                           for produto in itens} if self.reservas else {}
+                motivo = None if itens else "Carrinho está vazio."
+                for produto, quantidade in itens.items():
+                    if produtos[produto.id_produto] is None:
+                        motivo = f"Produto '{produto.nome}' (ID: {produto.id_produto}) não encontrado no catálogo."
+                        break
+                    disponivel = saldo[produto.id_produto] - (reservado.get(produto.id_produto, 0) - proprio.get(produto.id_produto, 0))
+                    if disponivel < quantidade:
+                        motivo = f"Estoque insuficiente para '{produto.nome}' (ID: {produto.id_produto}). Pedido: {quantidade}, Disponível: {max(disponivel, 0)}."
+                        break
+                if motivo is None:
+                    try:
+                        pedido = Pedido(id_cliente, carrinho, endereco_entrega, metodo_pagamento)
+                    except ValueError as e:
+                        motivo = f"Erro ao instanciar Pedido: {e}"
+                if motivo is not None:
+                    resultados.append((None, motivo))
+                    continue
+                for produto, quantidade in itens.items():
+                    saldo[produto.id_produto] -= quantidade
+                for id_produto, quantidade in proprio.items(): # as reservas do carrinho passam a ser estoque baixado
+                    reservado[id_produto] -= quantidade
+                aceitos.append((pedido, carrinho))
+                resultados.append((pedido, None))
+
+            with self._transacao():
+                for id_produto, quantidade in saldo.items():
+                    if produtos[id_produto].quantidade_estoque != quantidade:
+                        produtos[id_produto].quantidade_estoque = quantidade # uma única notificação por produto
+                for pedido, carrinho in aceitos:
+                    self._registrar_pedido(pedido)
+                    if self.reservas is not None:
+                        self.reservas.consumir(carrinho.id_carrinho)
+        for _, carrinho in aceitos:
+            carrinho.limpar_carrinho()
+        print(f"Lote de pedidos processado: {len(aceitos)} criado(s), {len(resultados) - len(aceitos)} rejeitado(s).")
+        return resultados
+
+    def _trava_do_produto(self, id_produto: int) -> threading.Lock:
+        trava = self._travas_produtos.get(id_produto)
+        if trava is None:
+            trava = self._travas_produtos.setdefault(id_produto, threading.Lock()) # setdefault é atômico
+        return trava
+
+    @contextmanager
+    def _travar_produtos(self, ids_produtos):
+        # Adquire as travas em ordem crescente de id: dois checkouts com os mesmos produtos
+        # nunca esperam um pelo outro em ordem inversa, então não há deadlock
+        travas = [self._trava_do_produto(id_produto) for id_produto in sorted(set(ids_produtos))]
+        adquiridas = []
+        with self._operacao():
+            try:
+                for trava in travas:
+                    trava.acquire()
+                    adquiridas.append(trava)
+                yield
+            finally:
+                for trava in reversed(adquiridas):
+                    trava.release()
+
+    @contextmanager
+    def _operacao(self):
+        # Marca a thread como dentro de uma operação com travas; ao sair da mais externa, salva o snapshot adiado
+        self._local.profundidade = getattr(self._local, "profundidade", 0) + 1
+        try:
+            yield
+        finally:
+            self._local.profundidade -= 1
+            if self._local.profundidade == 0 and self._snapshot_pendente:
+                self._salvar_snapshot_pendente()
+
+    def _registrar_pedido(self, pedido: Pedido): # adiciona o pedido ao sistema e às ordenações usadas na paginação
+        self.pedidos[pedido.id_pedido] = pedido
+        self._indexar_pedido(pedido)
+        self._registrar_evento("pedido_criado", pedido.para_dados())
+
+    def _indexar_pedido(self, pedido: Pedido): # ordenações, índices e agregados de um pedido já armazenado
+        with self._trava_indices:
+            self._sequencia_pedidos[pedido.id_pedido] = len(self._ordem_pedidos)
+            self._ordem_pedidos.append(pedido.id_pedido)
+            self._pedidos_por_cliente.setdefault(pedido.id_cliente, []).append(pedido.id_pedido)
+            self._agregados_vendas.adicionar_pedido(pedido)
+            self._indice_data_criacao.adicionar(pedido.data_criacao, pedido.id_pedido)
+            if pedido.data_pagamento:
+                self._indice_data_pagamento.adicionar(pedido.data_pagamento, pedido.id_pedido)
+            pedido.adicionar_ouvinte(self._ao_alterar_pedido)
+
+    def _desregistrar_pedido(self, pedido: Pedido): # desfaz _registrar_pedido (remoção de pedidos)
+        with self._trava_indices:
+            sequencia = self._sequencia_pedidos.pop(pedido.id_pedido, None)
+            if sequencia is None:
+                return
+            pedido.remover_ouvinte(self._ao_alterar_pedido)
+            self._agregados_vendas.remover_pedido(pedido)
+            self._indice_data_criacao.remover(pedido.data_criacao, pedido.id_pedido)
+            if pedido.data_pagamento:
+                self._indice_data_pagamento.remover(pedido.data_pagamento, pedido.id_pedido)
+            self._ordem_pedidos[sequencia] = None # mantém as posições dos demais pedidos
+            ids_cliente = self._pedidos_por_cliente.get(pedido.id_cliente, [])
+            if pedido.id_pedido in ids_cliente:
+                ids_cliente.remove(pedido.id_pedido)
+            if not ids_cliente:
+                self._pedidos_por_cliente.pop(pedido.id_cliente, None)
+
+    def _ao_alterar_pedido(self, pedido: Pedido, campo: str, valor_anterior): # chamado pelo Pedido a cada mudança de status/pagamento
+        with self._operacao(), self._trava_indices:
+            self._agregados_vendas.ao_alterar_pedido(pedido, campo, valor_anterior)
+            if campo == "status" and pedido.status == StatusPedido.PAGO and pedido.data_pagamento:
+                # data_pagamento só é preenchida na primeira vez que o pedido chega a PAGO
+                self._indice_data_pagamento.remover(pedido.data_pagamento, pedido.id_pedido)
+                self._indice_data_pagamento.adicionar(pedido.data_pagamento, pedido.id_pedido)
+            if campo == "status":
+                self._registrar_evento("pedido_status", {
+                    "id_pedido": pedido.id_pedido, "status": pedido.status.name,
+                    "data_pagamento": pedido.data_pagamento.isoformat() if pedido.data_pagamento else None,
+                    "data_envio": pedido.data_envio.isoformat() if pedido.data_envio else None,
+                    "data_entrega": pedido.data_entrega.isoformat() if pedido.data_entrega else None,
+                })
+            elif campo == "pagamento":
+                self._registrar_evento("pedido_pagamento", {
+                    "id_pedido": pedido.id_pedido, "id_transacao": pedido.id_transacao_pagamento,
+                    "valor_total": str(pedido.valor_total), "num_parcelas": pedido.num_parcelas,
+                    "valor_parcela": str(pedido.valor_parcela) if pedido.valor_parcela is not None else None,
+                })
 
-    def listar_pedidos_por_cliente(self, id_cliente: str) -> List[Pedido]: 
-        return [p for p in self.pedidos.values() if p.id_cliente == id_cliente] # lista de pedidos que pertencem ao cliente especificado
+    def buscar_pedido_por_id(self, id_pedido: str) -> Optional[Pedido]: 
+        pedido = self.pedidos.get(id_pedido)
+        if pedido is None and self.arquivo is not None:
+            pedido = self.arquivo.buscar(id_pedido, self.produtos) # lido do disco a cada busca, sem voltar para a memória
+        return pedido
+
+    def iterar_pedidos_por_cliente(self, id_cliente: str, apos: Optional[str] = None, limite: Optional[int] = None,
+                                   mais_recentes_primeiro: bool = False, status: Optional[Any] = None) -> Iterator[Pedido]:
+        # Pedidos do cliente pelo índice id_cliente -> ids (ordem de criação), a partir do cursor `apos`
+        # (id do último pedido visto). status aceita um StatusPedido ou uma coleção deles.
+        ids_cliente = self._pedidos_por_cliente.get(id_cliente, [])
+        status_aceitos = None if status is None else ({status} if isinstance(status, StatusPedido) else set(status))
+        if apos is None:
+            inicio = len(ids_cliente) - 1 if mais_recentes_primeiro else 0
+        else:
+            if apos not in self._sequencia_pedidos:
+                raise ValueError(f"Cursor inválido: pedido {apos} não encontrado.")
+            sequencia = self._sequencia_pedidos[apos]
+            if mais_recentes_primeiro:
+                inicio = bisect_left(ids_cliente, sequencia, key=self._sequencia_pedidos.__getitem__) - 1
+            else:
+                inicio = bisect_right(ids_cliente, sequencia, key=self._sequencia_pedidos.__getitem__)
+        posicoes = range(inicio, -1, -1) if mais_recentes_primeiro else range(inicio, len(ids_cliente))
+
+        entregues = 0
+        for posicao in posicoes:
+            if limite is not None and entregues >= limite:
+                return
+            if posicao >= len(ids_cliente): # a lista pode encolher se um pedido for removido durante a iteração
+                return
+            pedido = self.buscar_pedido_por_id(ids_cliente[posicao])
+            if pedido is None or (status_aceitos is not None and pedido.status not in status_aceitos):
+                continue
+            yield pedido
+            entregues += 1
+
+    def paginar_pedidos_por_cliente(self, id_cliente: str, cursor: Optional[str] = None, tamanho_pagina: int = 20,
+                                    mais_recentes_primeiro: bool = False, status: Optional[Any] = None) -> Tuple[List[Pedido], Optional[str]]:
+        # Retorna (página, próximo cursor); o próximo cursor é None na última página
+        if tamanho_pagina <= 0:
+            raise ValueError("O tamanho da página deve ser positivo.")
+        iterador = self.iterar_pedidos_por_cliente(id_cliente, cursor, tamanho_pagina + 1, mais_recentes_primeiro, status)
+        pagina = list(iterador)
+        if len(pagina) <= tamanho_pagina:
+            return pagina, None
+        pagina.pop() # o item extra só indica que existe próxima página
+        return pagina, pagina[-1].id_pedido
+
+    def listar_pedidos_por_cliente(self, id_cliente: str, mais_recentes_primeiro: bool = False, status: Optional[Any] = None) -> List[Pedido]: 
+        # Usa o índice por cliente: o custo depende dos pedidos do cliente, não do total de pedidos
+        return list(self.iterar_pedidos_por_cliente(id_cliente, mais_recentes_primeiro=mais_recentes_primeiro, status=status))
+
+    def iterar_pedidos_por_periodo(self, inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                                   campo: str = "criacao", status: Optional[Any] = None) -> Iterator[Pedido]:
+        # Pedidos com inicio <= data < fim em ordem cronológica; campo = "criacao" ou "pagamento"
+        indices = {"criacao": self._indice_data_criacao, "pagamento": self._indice_data_pagamento}
+        if campo not in indices:
+            raise ValueError(f"Campo de data inválido: {campo}. Use 'criacao' ou 'pagamento'.")
+        status_aceitos = None if status is None else ({status} if isinstance(status, StatusPedido) else set(status))
+        for id_pedido in indices[campo].buscar(inicio, fim):
+            pedido = self.buscar_pedido_por_id(id_pedido)
+            if pedido is not None and (status_aceitos is None or pedido.status in status_aceitos):
+                yield pedido
+
+    def buscar_pedidos_por_periodo(self, inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                                   campo: str = "criacao", status: Optional[Any] = None) -> List[Pedido]:
+        return list(self.iterar_pedidos_por_periodo(inicio, fim, campo, status))
+
+    def remover_pedido(self, id_pedido: str) -> bool: # remove o pedido do sistema e dos índices de pedidos
+        pedido = self.pedidos.pop(id_pedido, None)
+        evento = {"id_pedido": id_pedido}
+        if not pedido and self.arquivo is not None:
+            pedido = self.arquivo.buscar(id_pedido, self.produtos)
+            if pedido:
+                self.arquivo.remover(id_pedido)
+                evento["dados"] = pedido.para_dados() # o replay não encontra mais o pedido no arquivo
+        if not pedido:
+            print(f"Erro: Pedido com ID {id_pedido} não encontrado.")
+            return False
+        self._desregistrar_pedido(pedido)
+        self._registrar_evento("pedido_removido", evento)
+        print(f"Pedido {id_pedido} removido do sistema.")
+        return True
+
+    def arquivar_pedidos(self, idade_minima: timedelta, agora: Optional[datetime] = None) -> int:
+        # Move para o arquivo os pedidos ENTREGUE/CANCELADO criados há mais de `idade_minima`
+        if self.arquivo is None:
+            raise ValueError("Sistema sem arquivo de pedidos configurado.")
+        limite = (agora or datetime.now()) - idade_minima
+        candidatos = []
+        for id_pedido in self._indice_data_criacao.buscar(fim=limite):
+            pedido = self.pedidos.get(id_pedido)
+            if pedido is not None and pedido.status in self.STATUS_TERMINAIS:
+                candidatos.append(pedido)
+        ids_arquivados = self.arquivo.arquivar(candidatos)
+        with self._transacao():
+            for id_pedido in ids_arquivados:
+                self._descarregar_pedido_arquivado(self.pedidos.pop(id_pedido))
+        if ids_arquivados:
+            self._registrar_evento("pedidos_arquivados", {"ids": ids_arquivados})
+        print(f"{len(ids_arquivados)} pedido(s) arquivado(s).")
+        return len(ids_arquivados)
+
+    def _descarregar_pedido_arquivado(self, pedido: Pedido):
+        # Índices e agregados continuam contando o pedido; só o objeto sai da memória. O que fica (id na ordem,
+        # na sequência, no índice por cliente e no temporal) custa ~250 B por pedido arquivado (benchmark_memoria)
+        pedido.remover_ouvinte(self._ao_alterar_pedido)
+
+    def _indexar_pedidos_arquivados(self):
+        for dados in self.arquivo.iterar_dados():
+            pedido = Pedido.restaurar(dados, self.produtos)
+            self._indexar_pedido(pedido)
+            self._descarregar_pedido_arquivado(pedido)
 
     # --- Processamento de Pagamento --- 
 
-    def processar_pagamento_pedido(self, id_pedido: str, dados_pagamento: Dict[str, Any]) -> bool: 
+    # processar_pagamento_pedido é dividido em etapas para que a fachada assíncrona (SistemaEcommerceAsync)
+    # reutilize tudo, trocando apenas a chamada ao SistemaPagamento pela versão aguardável.
+
+    def _iniciar_pagamento(self, id_pedido: str) -> Optional[Pedido]:
         pedido = self.buscar_pedido_por_id(id_pedido) 
         if not pedido: # Verifica se o pedido existe
             print(f"Erro: Pedido com ID {id_pedido} não encontrado.")
-            return False
+            return None
 
         # Verifica se o pedido está em um status que permite pagamento
         if pedido.status not in [StatusPedido.PENDENTE, StatusPedido.FALHA_PAGAMENTO]:
@@ -98,52 +599,82 @@ class SistemaEcommerce:
 
         print(f"\n--- Processando pagamento para o pedido {id_pedido} via {pedido.metodo_pagamento} ---")
         pedido.atualizar_status(StatusPedido.PROCESSANDO_PAGAMENTO)  
-        sucesso = False
-        mensagem = "Método de pagamento não suportado ou erro interno."
+        return pedido
+
+    def _requisicao_pagamento(self, pedido: Pedido, dados_pagamento: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        # Argumentos da chamada ao SistemaPagamento: ("cartao", num_parcelas, dados_cartao), ("pix",) ou None (não suportado)
+        if pedido.metodo_pagamento == "Cartão de Crédito":
+            num_parcelas = dados_pagamento.get('num_parcelas', 1) 
+            dados_cartao = dados_pagamento.get('dados_cartao', {}) 
+            if not isinstance(num_parcelas, int) or num_parcelas < 1: #número de parcelas é válido
+                 raise ValueError("Número de parcelas inválido.")
+            return ("cartao", num_parcelas, dados_cartao)
+        elif pedido.metodo_pagamento == "PIX":
+            return ("pix",)
+        print(f"Erro: Método de pagamento '{pedido.metodo_pagamento}' não suportado.")
+        pedido.atualizar_status(StatusPedido.FALHA_PAGAMENTO) 
+        return None
+
+    def _concluir_pagamento(self, pedido: Pedido, requisicao: Tuple[Any, ...], resultado: Tuple[Any, ...]) -> bool:
+        # Registra no pedido o resultado devolvido por processar_cartao_credito/processar_pix
         id_transacao = None
-        valor_pago_final = Decimal('0.0')
         num_parcelas_final = None
         valor_parcela_final = None
+        if requisicao[0] == "cartao":
+            sucesso, mensagem, valor_pago_final, valor_parcela_final = resultado
+            if sucesso:
+                num_parcelas_final = requisicao[1] 
+                id_transacao = f"cc_{str(uuid.uuid4())[:8]}" #ID de transação de cartão de crédito
+        else:
+            sucesso, mensagem, valor_pago_final = resultado
+            if sucesso:
+                id_transacao = f"pix_{str(uuid.uuid4())[:8]}"
+
+        # Registra o resultado do pagamento no pedido
+        print(f"Resultado do processamento: {mensagem}")
+        pedido.registrar_pagamento(sucesso, id_transacao, valor_pago_final, num_parcelas_final, valor_parcela_final)
+        return sucesso
+
+    def _falha_inesperada_pagamento(self, pedido: Pedido, erro: Exception) -> bool:
+        print(f"Erro inesperado durante o processamento do pagamento para o pedido {pedido.id_pedido}: {erro}")
+        if isinstance(erro, ResultadoIncerto): # a cobrança pode ter passado: conferir no gateway antes de cobrar de novo
+            print(f"AVISO: Resultado do pagamento do pedido {pedido.id_pedido} é incerto; confirme com o gateway antes de repetir.")
+        pedido.registrar_pagamento(False, None, Decimal('0.0'))
+        return False
+
+    def processar_pagamento_pedido(self, id_pedido: str, dados_pagamento: Dict[str, Any], chave_idempotencia: Optional[str] = None) -> bool: 
+        # Com chave_idempotencia, repetições devolvem o resultado da primeira tentativa sem chamar o gateway
+        if chave_idempotencia is not None:
+            return self.idempotencia.executar(chave_idempotencia, id_pedido,
+                                              lambda: self._processar_pagamento_pedido(id_pedido, dados_pagamento))
+        return self._processar_pagamento_pedido(id_pedido, dados_pagamento)
+
+    def _processar_pagamento_pedido(self, id_pedido: str, dados_pagamento: Dict[str, Any]) -> bool: 
+        pedido = self._iniciar_pagamento(id_pedido)
+        if not pedido:
+            return False
 
         try:
             # Processa o pagamento de acordo com o método escolhido
-            if pedido.metodo_pagamento == "Cartão de Crédito":
-                num_parcelas = dados_pagamento.get('num_parcelas', 1) 
-                dados_cartao = dados_pagamento.get('dados_cartao', {}) 
-                if not isinstance(num_parcelas, int) or num_parcelas < 1: #número de parcelas é válido
-                     raise ValueError("Número de parcelas inválido.")
-
-                sucesso, mensagem, valor_pago_final, valor_parcela_final = self.sistema_pagamento.processar_cartao_credito(
+            requisicao = self._requisicao_pagamento(pedido, dados_pagamento)
+            if requisicao is None:
+                return False
+            if requisicao[0] == "cartao":
+                resultado = self.sistema_pagamento.processar_cartao_credito(
                     float(pedido.valor_total), #valor total calculado no pedido (itens+frete)
-                    num_parcelas, 
-                    dados_cartao
-                )
-                if sucesso:
-                    num_parcelas_final = num_parcelas 
-                    id_transacao = f"cc_{str(uuid.uuid4())[:8]}" #ID de transação de cartão de crédito
-
-            elif pedido.metodo_pagamento == "PIX":
-                sucesso, mensagem, valor_pago_final = self.sistema_pagamento.processar_pix(
-                    float(pedido.valor_total) # valor total original para aplicar desconto
+                    requisicao[1], 
+                    requisicao[2],
+                    id_cliente=pedido.id_cliente # velocidade por cliente no antifraude
                 )
-                if sucesso:
-                    id_transacao = f"pix_{str(uuid.uuid4())[:8]}"
-
             else:
-                print(f"Erro: Método de pagamento '{pedido.metodo_pagamento}' não suportado.")
-                pedido.atualizar_status(StatusPedido.FALHA_PAGAMENTO) 
-                return False
-
-            # Registra o resultado do pagamento no pedido
-            print(f"Resultado do processamento: {mensagem}")
-            pedido.registrar_pagamento(sucesso, id_transacao, valor_pago_final, num_parcelas_final, valor_parcela_final)
+                resultado = self.sistema_pagamento.processar_pix(
+                    float(pedido.valor_total), # valor total original para aplicar desconto
+                    id_cliente=pedido.id_cliente
+                )
+            return self._concluir_pagamento(pedido, requisicao, resultado)
 
         except Exception as e: # Captura qualquer exceção inesperada durante o processamento
-            print(f"Erro inesperado durante o processamento do pagamento para o pedido {id_pedido}: {e}")
-            pedido.registrar_pagamento(False, None, Decimal('0.0'))
-            sucesso = False
-
-        return sucesso
+            return self._falha_inesperada_pagamento(pedido, e)
 
     # --- Cancelamento e Reabastecimento ---
 
@@ -165,13 +696,14 @@ class SistemaEcommerce:
             # Se o cancelamento foi bem-sucedido, reabastecer o estoque
             print(f"Pedido {id_pedido} cancelado. Reabastecendo estoque...")
             try:
-                for produto_pedido, quantidade in pedido.itens.items():
-                    produto_catalogo = self.buscar_produto_por_id(produto_pedido.id_produto)
-                    if produto_catalogo:
-                        produto_catalogo.atualizar_estoque(quantidade) # Adiciona de volta ao estoque
-                        print(f"Estoque do produto '{produto_catalogo.nome}' reabastecido para {produto_catalogo.quantidade_estoque}.")
-                    else:
-                        print(f"AVISO: Produto {produto_pedido.id_produto} do pedido cancelado não encontrado no catálogo para reabastecimento!")
+                with self._travar_produtos(produto.id_produto for produto in pedido.itens):
+                    for produto_pedido, quantidade in pedido.itens.items():
+                        produto_catalogo = self.buscar_produto_por_id(produto_pedido.id_produto)
+                        if produto_catalogo:
+                            produto_catalogo.atualizar_estoque(quantidade) # Adiciona de volta ao estoque
+                            print(f"Estoque do produto '{produto_catalogo.nome}' reabastecido para {produto_catalogo.quantidade_estoque}.")
+                        else:
+                            print(f"AVISO: Produto {produto_pedido.id_produto} do pedido cancelado não encontrado no catálogo para reabastecimento!")
                 if pedido.data_pagamento and pedido.id_transacao_pagamento: 
                     print(f"Atenção: Pedido {id_pedido} estava pago. É necessário processar o reembolso para a transação {pedido.id_transacao_pagamento}.") 
                 return True
@@ -182,22 +714,177 @@ class SistemaEcommerce:
             print(f"Falha ao atualizar status para CANCELADO para o pedido {id_pedido}.")
             return False
 
+    # --- Persistência (diário de eventos e repositório SQLite) ---
+
+    def _transacao(self):
+        return self.repositorio.transacao() if self.repositorio is not None else nullcontext()
+
+    def _carregar_do_repositorio(self):
+        # Produtos ficam todos em memória; pedidos são lidos em blocos só para montar índices e agregados,
+        # e os objetos carregados depois pelo cache recebem o ouvinte do sistema em ao_carregar
+        self._indexar_produtos_em_lote(list(self.produtos.values()))
+        self._consolidar_indices()
+        for dados in self.pedidos.iterar_dados():
+            self._indexar_pedido(Pedido.restaurar(dados, self.produtos))
+        self.pedidos.ao_carregar = lambda pedido: pedido.adicionar_ouvinte(self._ao_alterar_pedido)
+        print(f"Estado carregado do repositório: {len(self.produtos)} produto(s), {len(self._sequencia_pedidos)} pedido(s).")
+
+    def _registrar_evento(self, tipo: str, dados: Dict[str, Any]):
+        # Sempre chamado depois de a alteração ser aplicada, então um snapshot nunca fica atrás do diário.
+        # O snapshot automático não roda com travas de produto/índices seguras por esta thread: fica
+        # pendente até a operação mais externa terminar (_operacao)
+        if self.diario is None:
+            return
+        self.diario.registrar(tipo, dados)
+        if self.diario.precisa_snapshot():
+            self._snapshot_pendente = True
+            if not getattr(self._local, "profundidade", 0):
+                self._salvar_snapshot_pendente()
+
+    def _salvar_snapshot_pendente(self):
+        self._snapshot_pendente = False
+        if self.diario.precisa_snapshot(): # outra thread pode ter salvo o snapshot neste meio-tempo
+            self.salvar_snapshot()
+
+    def _estado_para_snapshot(self) -> Dict[str, Any]:
+        # Pedidos arquivados entram só como referência (id -> localização no arquivo), sem reler os blocos do disco
+        ordem_pedidos = [id_pedido for id_pedido in self._ordem_pedidos if id_pedido is not None]
+        pedidos = [pedido.para_dados() for pedido in map(self.pedidos.get, ordem_pedidos) if pedido is not None]
+        arquivados = {}
+        if self.arquivo is not None: # percorre o índice do arquivo em disco, sem copiá-lo para a memória antes
+            arquivados = {id_pedido: list(localizacao) for id_pedido, localizacao in self.arquivo.iterar_localizacoes()
+                          if id_pedido in self._sequencia_pedidos and id_pedido not in self.pedidos}
+        return {
+            # .get: um produto pode estar indexado e ainda não publicado (importar_catalogo) ou saindo do catálogo
+            "produtos": [produto.obter_informacoes() for produto in map(self.produtos.get, self._ids_produtos_ordenados) if produto is not None],
+            "ordem_pedidos": ordem_pedidos,
+            "pedidos": pedidos,
+            "arquivados": arquivados,
+        }
+
+    def salvar_snapshot(self):
+        if self.diario is None:
+            raise ValueError("Sistema sem diário de eventos configurado.")
+        # Corte consistente: com a trava dos índices e a do diário, o estado é lido com a sequência do último
+        # evento fixada. Toda alteração até essa sequência já está no estado; alterações de outras threads
+        # cujo evento vem depois podem estar também, e o replay as reaplica sem duplicar (_aplicar_evento)
+        with self._trava_indices:
+            self.diario.salvar_snapshot(self._estado_para_snapshot)
+        print("Snapshot do sistema salvo.")
+
+    def _recuperar_do_diario(self, diario: DiarioEventos):
+        # Carrega o último snapshot e reaplica apenas os eventos posteriores a ele
+        estado, eventos = diario.carregar()
+        if estado is not None:
+            produtos = [Produto(**dados) for dados in estado["produtos"]]
+            self.produtos.update((produto.id_produto, produto) for produto in produtos)
+            self._indexar_produtos_em_lote(produtos)
+            self._consolidar_indices()
+            self._restaurar_pedidos_do_snapshot(estado)
+        total_eventos = 0
+        for evento in eventos:
+            self._aplicar_evento(evento["tipo"], evento["dados"])
+            total_eventos += 1
+        print(f"Estado recuperado do diário: {len(self.produtos)} produto(s), {len(self.pedidos)} pedido(s), {total_eventos} evento(s) reaplicado(s).")
+
+    def _restaurar_pedidos_do_snapshot(self, estado: Dict[str, Any]):
+        # Pedidos em memória voltam completos; os arquivados são lidos pela localização só para montar
+        # índices e agregados e continuam fora de self.pedidos
+        pedidos = {dados["id_pedido"]: dados for dados in estado["pedidos"]}
+        arquivados = estado["arquivados"]
+        if arquivados and self.arquivo is None:
+            raise ValueError("O snapshot referencia pedidos arquivados, mas o sistema não tem arquivo de pedidos configurado.")
+        for id_pedido in estado["ordem_pedidos"]:
+            if id_pedido in pedidos:
+                self._registrar_pedido(Pedido.restaurar(pedidos[id_pedido], self.produtos))
+            elif id_pedido in arquivados:
+                pedido = Pedido.restaurar(self.arquivo.ler_dados(tuple(arquivados[id_pedido])), self.produtos)
+                self._indexar_pedido(pedido)
+                self._descarregar_pedido_arquivado(pedido)
+
+    def _aplicar_evento(self, tipo: str, dados: Dict[str, Any]):
+        # Eventos posteriores ao snapshot podem já estar refletidos nele (corte em salvar_snapshot): criações
+        # já presentes são ignoradas e os demais eventos gravam valores absolutos, então reaplicar é seguro
+        if tipo == "produto_adicionado":
+            if dados["id_produto"] in self.produtos:
+                return
+            produto = Produto(**dados)
+            self.produtos[produto.id_produto] = produto
+            self._indexar_produto(produto)
+        elif tipo == "produto_removido":
+            produto = self.produtos.pop(dados["id_produto"], None)
+            if produto:
+                self._desindexar_produto(produto)
+        elif tipo == "produto_alterado":
+            setattr(self.produtos[dados["id_produto"]], dados["campo"], dados["valor"])
+        elif tipo == "pedido_criado":
+            if dados["id_pedido"] in self._sequencia_pedidos:
+                return
+            self._registrar_pedido(Pedido.restaurar(dados, self.produtos))
+        elif tipo == "pedido_status":
+            datas = [datetime.fromisoformat(dados[c]) if dados[c] else None for c in ("data_pagamento", "data_envio", "data_entrega")]
+            self.pedidos[dados["id_pedido"]]._aplicar_status_registrado(StatusPedido[dados["status"]], *datas)
+        elif tipo == "pedido_pagamento":
+            valor_parcela = Decimal(dados["valor_parcela"]) if dados["valor_parcela"] is not None else None
+            self.pedidos[dados["id_pedido"]]._aplicar_pagamento_registrado(
+                dados["id_transacao"], Decimal(dados["valor_total"]), dados["num_parcelas"], valor_parcela)
+        elif tipo == "pedido_removido":
+            pedido = self.pedidos.pop(dados["id_pedido"], None)
+            if pedido is None and "dados" in dados: # pedido que estava arquivado
+                pedido = Pedido.restaurar(dados["dados"], self.produtos)
+            if pedido:
+                self._desregistrar_pedido(pedido)
+        elif tipo == "pedidos_arquivados": # os pedidos já estão no arquivo; só saem da memória
+            for id_pedido in dados["ids"]:
+                pedido = self.pedidos.pop(id_pedido, None)
+                if pedido:
+                    self._descarregar_pedido_arquivado(pedido)
+        else:
+            raise ValueError(f"Tipo de evento desconhecido no diário: {tipo}.")
+
     # --- Outras Funcionalidades  ---
 
+    def resumo_vendas(self) -> Dict[str, Any]: # O(1): lido dos agregados mantidos incrementalmente
+        return self._agregados_vendas.resumo()
+
+    def iterar_linhas_relatorio_vendas(self) -> Iterator[str]:
+        # Detalhamento do relatório linha a linha, sem montar o texto inteiro em memória
+        for pedido in self._iterar_pedidos():
+            if pedido.status in STATUS_VENDA:
+                yield formatar_linha_pedido(pedido)
+
+    def _iterar_pedidos(self) -> Iterator[Pedido]: # todos os pedidos em ordem de criação
+        for id_pedido in self._ordem_pedidos:
+            pedido = self.buscar_pedido_por_id(id_pedido) if id_pedido is not None else None
+            if pedido is not None:
+                yield pedido
+
+    def iterar_relatorio_vendas(self, formato: str = "texto", status: Optional[Any] = None,
+                                data_inicio: Optional[datetime] = None, data_fim: Optional[datetime] = None) -> Iterator[str]:
+        # Relatório em streaming ("texto" ou "csv"); por padrão inclui só pedidos pagos/concluídos
+        if data_inicio is None and data_fim is None:
+            pedidos = self._iterar_pedidos()
+        else: # com período, percorre só a fatia do índice de data_criacao
+            pedidos = self.iterar_pedidos_por_periodo(data_inicio, data_fim)
+        pedidos = filtrar_pedidos(pedidos, status, data_inicio, data_fim)
+        return iterar_relatorio_vendas(pedidos, formato)
+
+    def exportar_relatorio_vendas(self, destino: Any, formato: str = "texto", status: Optional[Any] = None,
+                                  data_inicio: Optional[datetime] = None, data_fim: Optional[datetime] = None) -> int:
+        # destino: caminho (".gz" = gzip), arquivo ou socket; a memória usada não depende do número de pedidos
+        linhas = self.iterar_relatorio_vendas(formato, status, data_inicio, data_fim)
+        total = escrever_relatorio(linhas, destino)
+        print(f"Relatório de vendas ({formato}) exportado: {total} caractere(s).")
+        return total
+
     def gerar_relatorio_vendas(self) -> str: 
-        relatorio = "--- Relatório de Vendas ---\n"
-        total_vendido = Decimal('0.0') 
-        pedidos_pagos = 0 # Contador de pedidos pagos ou concluídos
-        for pedido in self.pedidos.values(): 
-            if pedido.status == StatusPedido.PAGO or pedido.status == StatusPedido.EM_SEPARACAO or pedido.status == StatusPedido.ENVIADO or pedido.status == StatusPedido.ENTREGUE:
-                relatorio += f"- Pedido: {pedido.id_pedido}, Cliente: {pedido.id_cliente}, Valor: R$ {pedido.valor_total:.2f}, Status: {pedido.status.name}\n"
-                total_vendido += pedido.valor_total # Adiciona o valor total do pedido ao total vendido
-                pedidos_pagos += 1
-
-        relatorio += f"\nTotal de Pedidos Pagos/Concluídos: {pedidos_pagos}\n"
-        relatorio += f"Valor Total Vendido: R$ {total_vendido:.2f}\n"
-        relatorio += "--------------------------\n"
-        return relatorio 
+        resumo = self.resumo_vendas()
+        partes = ["--- Relatório de Vendas ---\n"]
+        partes.extend(self.iterar_linhas_relatorio_vendas())
+        partes.append(f"\nTotal de Pedidos Pagos/Concluídos: {resumo['pedidos_pagos']}\n")
+        partes.append(f"Valor Total Vendido: R$ {resumo['total_vendido']:.2f}\n")
+        partes.append("--------------------------\n")
+        return "".join(partes) # join evita o custo quadrático de concatenar com +=
 
 if __name__ == '__main__':
     # 1. Inicializa o sistema
@@ -1,9 +1,22 @@
-import random
+import asyncio
+import math
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from decimal import Decimal, ROUND_HALF_UP
+from .fraude import MotorFraude
+from .gateway import GatewayAleatorio, GatewayPagamento
+from .parcelamento import MotorParcelamento
+from .resiliencia import ResilienciaGateway
 
 class SistemaPagamento: 
-    def __init__(self, taxa_juros_parcelamento: float = 2.0, percentual_desconto_pix: float = 5.0):
+    # Disjuntores das chamadas ao gateway que não são autorizações (estas usam um por método de pagamento)
+    DISJUNTOR_FRAUDE = "Antifraude"
+    DISJUNTOR_REEMBOLSO = "Reembolso"
+
+    def __init__(self, taxa_juros_parcelamento: float = 2.0, percentual_desconto_pix: float = 5.0,
+                 resiliencia: ResilienciaGateway | None = None, gateway: GatewayPagamento | None = None,
+                 motor_fraude: MotorFraude | None = None):
         # Validação das taxas
         if not 0 <= taxa_juros_parcelamento <= 100: 
             raise ValueError("A taxa de juros deve estar entre 0 e 100.")
@@ -13,10 +26,20 @@ class SistemaPagamento:
         # Define as taxas como Decimal
         self.taxa_juros_parcelamento = Decimal(str(taxa_juros_parcelamento)) / Decimal('100.0')  
         self.percentual_desconto_pix = Decimal(str(percentual_desconto_pix)) / Decimal('100.0')
+        # Novas tentativas, timeout e disjuntor nas chamadas ao gateway (None = chamada direta, sem repetição)
+        self.resiliencia = resiliencia
+        # Autorização, fraude e reembolso são delegados ao gateway (padrão: respostas sorteadas na hora)
+        self.gateway = gateway if gateway else GatewayAleatorio()
+        # Fatores de amortização por (taxa, n) em cache; invalidado por configurar_taxas
+        self.parcelamento = MotorParcelamento()
+        # Regras de fraude e velocidade por cliente/cartão, avaliadas localmente antes da consulta ao gateway
+        self.motor_fraude = motor_fraude if motor_fraude else MotorFraude()
 
-    def _autorizar_pagamento(self, valor: Decimal, metodo: str) -> bool:
+    def _autorizar_pagamento(self, valor: Decimal, metodo: str, **opcoes) -> bool:
         print(f"Tentando autorizar pagamento de R$ {valor:.2f} via {metodo}...")
-        autorizado = random.random() < 0.9 # 90% de chance de sucesso
+        return self._resultado_autorizacao(self.gateway.autorizar(valor, metodo, **opcoes))
+
+    def _resultado_autorizacao(self, autorizado: bool) -> bool:
         if autorizado: 
             print("Pagamento autorizado.")
         else:
@@ -25,9 +48,19 @@ class SistemaPagamento:
 
     def _verificar_fraude(self, dados_pagamento: dict) -> bool: 
         print("Verificando possível fraude...")
-        # chance baixa (5%) de detectar fraude
-        suspeita_fraude = random.random() < 0.05
-        if suspeita_fraude:
+        if not self.motor_fraude.aprovar(dados_pagamento): # bloqueado pelas regras locais: o gateway nem é consultado
+            return self._resultado_fraude(False)
+        # Consulta sem efeito colateral: pode ser repetida mesmo depois de um timeout
+        return self._resultado_fraude(self._chamar_gateway(self.DISJUNTOR_FRAUDE, self.gateway.verificar_fraude, dados_pagamento, idempotente=True))
+
+    @staticmethod
+    def _dados_fraude(valor: Decimal, metodo: str, id_cliente: str | None, num_parcelas: int = 1, dados_cartao: dict | None = None) -> dict:
+        return {"valor": valor, "metodo": metodo, "num_parcelas": num_parcelas, "id_cliente": id_cliente,
+                "cartao": dados_cartao.get("numero") if dados_cartao else None,
+                "token_cartao": dados_cartao.get("token") if dados_cartao else None} # token/impressão digital do gateway
+
+    def _resultado_fraude(self, sem_fraude: bool) -> bool:
+        if not sem_fraude:
             print("Alerta: Suspeita de fraude detectada!")
             return False
         else:
@@ -35,47 +68,48 @@ class SistemaPagamento:
             return True
 
     def calcular_valor_parcela(self, valor_total: Decimal, num_parcelas: int) -> Decimal: # com base no valor total e no número de parcelas.
-        if num_parcelas <= 0: 
-            raise ValueError("O número de parcelas deve ser positivo.")
+        # juros compostos (Tabela Price): M = C * (1 + i)^n * i / ((1 + i)^n - 1), arredondado para 2 casas decimais
+        return self.parcelamento.valor_parcela(valor_total, num_parcelas, self.taxa_juros_parcelamento)
 
-        valor_total_decimal = Decimal(str(valor_total)) 
+    def tabela_parcelamento(self, valores_totais, max_parcelas: int = 24) -> list[list[tuple[int, Decimal, Decimal]]]:
+        # Tabela de parcelamento (n, valor da parcela, total a pagar) de 1x a max_parcelas x para vários preços de uma vez
+        return self.parcelamento.tabela(valores_totais, self.taxa_juros_parcelamento, max_parcelas)
 
-        if num_parcelas == 1:
-            # Pagamento à vista, sem juros
-            return valor_total_decimal.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    def _opcoes_idempotencia(self) -> dict:
+        # Uma chave nova por operação, repetida em todas as tentativas, para gateways que deduplicam por chave
+        if getattr(self.gateway, "aceita_chave_idempotencia", False):
+            return {"chave_idempotencia": str(uuid.uuid4())}
+        return {}
 
-        if self.taxa_juros_parcelamento == 0:
-            # Parcelamento sem juros
-            valor_parcela = valor_total_decimal / Decimal(num_parcelas)
-        else:
-            # juros compostos 
-            # M = C * (1 + i)^n * i / ((1 + i)^n - 1)
-            taxa = self.taxa_juros_parcelamento
-            n = Decimal(num_parcelas)
-            fator = (Decimal('1.0') + taxa) ** n
-            if fator == Decimal('1.0'): # Evita divisão por zero se taxa for 0 e n > 1 
-                 valor_parcela = valor_total_decimal / n
-            else:
-                valor_parcela = valor_total_decimal * fator * taxa / (fator - Decimal('1.0'))
+    def _chamar_gateway(self, disjuntor: str, funcao, *args, idempotente: bool = False):
+        # Chamada ao gateway passando pela camada de resiliência, se configurada
+        if self.resiliencia is None:
+            return funcao(*args)
+        return self.resiliencia.executar(disjuntor, funcao, *args, idempotente=idempotente)
 
-        # Arredonda para 2 casas decimais
-        return valor_parcela.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    async def _chamar_gateway_async(self, disjuntor: str, funcao, *args, idempotente: bool = False):
+        if self.resiliencia is None:
+            return await funcao(*args)
+        return await self.resiliencia.executar_async(disjuntor, funcao, *args, idempotente=idempotente)
 
-    def processar_cartao_credito(self, valor_total: float, num_parcelas: int, dados_cartao: dict) -> tuple[bool, str, Decimal, Decimal | None]:
-        valor_total_decimal = Decimal(str(valor_total)) 
-        if num_parcelas < 1:
-            return False, "Número de parcelas inválido.", Decimal('0.0'), None
+    def _autorizar(self, valor: Decimal, metodo: str) -> bool:
+        # Autorização com um disjuntor por método; após um timeout só é repetida se o gateway recebeu a chave
+        opcoes = self._opcoes_idempotencia()
+        return self._chamar_gateway(metodo, partial(self._autorizar_pagamento, **opcoes), valor, metodo, idempotente=bool(opcoes))
+
+    # As etapas de cálculo e de montagem do resultado são compartilhadas pelas versões síncronas e
+    # assíncronas (sufixo _async); só as chamadas ao gateway (fraude, autorização, reembolso) mudam.
 
+    def _preparar_cartao(self, valor_total: float, num_parcelas: int) -> tuple[Decimal, Decimal] | None:
+        if num_parcelas < 1:
+            return None
         # Calcula o valor da parcela e o valor total com juros se houver
-        valor_parcela = self.calcular_valor_parcela(valor_total_decimal, num_parcelas)
+        valor_parcela = self.calcular_valor_parcela(Decimal(str(valor_total)), num_parcelas)
         valor_total_pagar = (valor_parcela * Decimal(num_parcelas)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return valor_parcela, valor_total_pagar
 
-        #  verificação de fraude
-        if not self._verificar_fraude({"valor": valor_total_pagar, "metodo": "Cartão de Crédito"}):
-            return False, "Pagamento bloqueado por suspeita de fraude.", Decimal('0.0'), None
-
-        #  autorização do pagamento
-        if self._autorizar_pagamento(valor_total_pagar, "Cartão de Crédito"):
+    def _resultado_cartao(self, autorizado: bool, num_parcelas: int, valor_parcela: Decimal, valor_total_pagar: Decimal) -> tuple[bool, str, Decimal, Decimal | None]:
+        if autorizado:
             comprovante = self._gerar_comprovante(valor_total_pagar, "Cartão de Crédito", num_parcelas, valor_parcela)
             print(f"Comprovante gerado: {comprovante}")
             valor_parcela_retorno = valor_parcela if num_parcelas > 1 else None
@@ -83,33 +117,60 @@ class SistemaPagamento:
         else:
             return False, "Pagamento com cartão de crédito recusado.", Decimal('0.0'), None
 
-    def processar_pix(self, valor_total: float) -> tuple[bool, str, Decimal]:
+    def processar_cartao_credito(self, valor_total: float, num_parcelas: int, dados_cartao: dict, id_cliente: str | None = None) -> tuple[bool, str, Decimal, Decimal | None]:
+        valores = self._preparar_cartao(valor_total, num_parcelas)
+        if valores is None:
+            return False, "Número de parcelas inválido.", Decimal('0.0'), None
+        valor_parcela, valor_total_pagar = valores
+
+        #  verificação de fraude
+        if not self._verificar_fraude(self._dados_fraude(valor_total_pagar, "Cartão de Crédito", id_cliente, num_parcelas, dados_cartao)):
+            return False, "Pagamento bloqueado por suspeita de fraude.", Decimal('0.0'), None
+
+        #  autorização do pagamento
+        autorizado = self._autorizar(valor_total_pagar, "Cartão de Crédito")
+        return self._resultado_cartao(autorizado, num_parcelas, valor_parcela, valor_total_pagar)
+
+    def _valores_pix(self, valor_total: float) -> tuple[Decimal, Decimal, Decimal]:
         valor_total_decimal = Decimal(str(valor_total)) 
 
         # Calcula o valor do desconto
         desconto = (valor_total_decimal * self.percentual_desconto_pix).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
         valor_a_pagar = (valor_total_decimal - desconto).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return valor_total_decimal, desconto, valor_a_pagar
+
+    def _preparar_pix(self, valor_total: float) -> Decimal:
+        valor_total_decimal, desconto, valor_a_pagar = self._valores_pix(valor_total)
 
         print(f"Valor original: R$ {valor_total_decimal:.2f}")
         print(f"Desconto PIX ({self.percentual_desconto_pix * 100:.1f}%): R$ {desconto:.2f}")
         print(f"Valor a pagar com PIX: R$ {valor_a_pagar:.2f}")
+        return valor_a_pagar
 
-        # verificação de fraude menos comum em PIX, mantido por consistência
-        if not self._verificar_fraude({"valor": valor_a_pagar, "metodo": "PIX"}):
-            return False, "Pagamento bloqueado por suspeita de fraude.", Decimal('0.0')
-
-        # autorização/confirmação do PIX
-        if self._autorizar_pagamento(valor_a_pagar, "PIX"):
+    def _resultado_pix(self, autorizado: bool, valor_a_pagar: Decimal) -> tuple[bool, str, Decimal]:
+        if autorizado:
             comprovante = self._gerar_comprovante(valor_a_pagar, "PIX")
             print(f"Comprovante gerado: {comprovante}")
             return True, "Pagamento PIX confirmado.", valor_a_pagar
         else:
             return False, "Falha ao confirmar pagamento PIX.", Decimal('0.0')
 
-    def processar_reembolso(self, id_transacao_original: str, valor: float) -> bool:
-        valor_decimal = Decimal(str(valor)) 
-        print(f"Processando reembolso de R$ {valor_decimal:.2f} para transação {id_transacao_original}...")
-        reembolso_ok = random.random() < 0.95 #chance alta de sucesso
+    def processar_pix(self, valor_total: float, id_cliente: str | None = None) -> tuple[bool, str, Decimal]:
+        valor_a_pagar = self._preparar_pix(valor_total)
+
+        # verificação de fraude menos comum em PIX, mantido por consistência
+        if not self._verificar_fraude(self._dados_fraude(valor_a_pagar, "PIX", id_cliente)):
+            return False, "Pagamento bloqueado por suspeita de fraude.", Decimal('0.0')
+
+        # autorização/confirmação do PIX
+        return self._resultado_pix(self._autorizar(valor_a_pagar, "PIX"), valor_a_pagar)
+
+    def _reembolsar(self, id_transacao_original: str, valor: Decimal) -> bool:
+        opcoes = self._opcoes_idempotencia()
+        reembolsar = partial(self.gateway.reembolsar, **opcoes)
+        return self._resultado_reembolso(self._chamar_gateway(self.DISJUNTOR_REEMBOLSO, reembolsar, id_transacao_original, valor, idempotente=bool(opcoes)))
+
+    def _resultado_reembolso(self, reembolso_ok: bool) -> bool:
         if reembolso_ok:
             print("Reembolso processado com sucesso.")
             return True
@@ -117,6 +178,194 @@ class SistemaPagamento:
             print("Falha ao processar reembolso.")
             return False
 
+    def processar_reembolso(self, id_transacao_original: str, valor: float) -> bool:
+        valor_decimal = Decimal(str(valor)) 
+        print(f"Processando reembolso de R$ {valor_decimal:.2f} para transação {id_transacao_original}...")
+        return self._reembolsar(id_transacao_original, valor_decimal)
+
+    # --- Versões assíncronas ---
+    # Os ganchos _async aguardam as versões assíncronas do gateway quando ele as oferece (ex.: cliente
+    # HTTP assíncrono ou GatewayLocalSimulado), sem threads; caso contrário rodam as síncronas numa thread
+    # (asyncio.to_thread), para que um gateway bloqueante não pare o event loop.
+
+    async def _verificar_fraude_async(self, dados_pagamento: dict) -> bool:
+        verificar_fraude_async = getattr(self.gateway, "verificar_fraude_async", None)
+        if verificar_fraude_async is None:
+            return await asyncio.to_thread(self._verificar_fraude, dados_pagamento)
+        print("Verificando possível fraude...")
+        if not self.motor_fraude.aprovar(dados_pagamento):
+            return self._resultado_fraude(False)
+        return self._resultado_fraude(await self._chamar_gateway_async(self.DISJUNTOR_FRAUDE, verificar_fraude_async, dados_pagamento, idempotente=True))
+
+    async def _autorizar_pagamento_async(self, valor: Decimal, metodo: str, **opcoes) -> bool:
+        autorizar_async = getattr(self.gateway, "autorizar_async", None)
+        if autorizar_async is None:
+            return await asyncio.to_thread(self._autorizar_pagamento, valor, metodo, **opcoes)
+        print(f"Tentando autorizar pagamento de R$ {valor:.2f} via {metodo}...")
+        return self._resultado_autorizacao(await autorizar_async(valor, metodo, **opcoes))
+
+    async def _reembolsar_async(self, id_transacao_original: str, valor: Decimal) -> bool:
+        reembolsar_async = getattr(self.gateway, "reembolsar_async", None)
+        if reembolsar_async is None:
+            return await asyncio.to_thread(self._reembolsar, id_transacao_original, valor)
+        opcoes = self._opcoes_idempotencia()
+        reembolsar = partial(reembolsar_async, **opcoes)
+        return self._resultado_reembolso(await self._chamar_gateway_async(self.DISJUNTOR_REEMBOLSO, reembolsar, id_transacao_original, valor, idempotente=bool(opcoes)))
+
+    async def _autorizar_async(self, valor: Decimal, metodo: str) -> bool:
+        opcoes = self._opcoes_idempotencia()
+        return await self._chamar_gateway_async(metodo, partial(self._autorizar_pagamento_async, **opcoes), valor, metodo, idempotente=bool(opcoes))
+
+    async def processar_cartao_credito_async(self, valor_total: float, num_parcelas: int, dados_cartao: dict, id_cliente: str | None = None) -> tuple[bool, str, Decimal, Decimal | None]:
+        valores = self._preparar_cartao(valor_total, num_parcelas)
+        if valores is None:
+            return False, "Número de parcelas inválido.", Decimal('0.0'), None
+        valor_parcela, valor_total_pagar = valores
+        if not await self._verificar_fraude_async(self._dados_fraude(valor_total_pagar, "Cartão de Crédito", id_cliente, num_parcelas, dados_cartao)):
+            return False, "Pagamento bloqueado por suspeita de fraude.", Decimal('0.0'), None
+        autorizado = await self._autorizar_async(valor_total_pagar, "Cartão de Crédito")
+        return self._resultado_cartao(autorizado, num_parcelas, valor_parcela, valor_total_pagar)
+
+    async def processar_pix_async(self, valor_total: float, id_cliente: str | None = None) -> tuple[bool, str, Decimal]:
+        valor_a_pagar = self._preparar_pix(valor_total)
+        if not await self._verificar_fraude_async(self._dados_fraude(valor_a_pagar, "PIX", id_cliente)):
+            return False, "Pagamento bloqueado por suspeita de fraude.", Decimal('0.0')
+        return self._resultado_pix(await self._autorizar_async(valor_a_pagar, "PIX"), valor_a_pagar)
+
+    async def processar_reembolso_async(self, id_transacao_original: str, valor: float) -> bool:
+        valor_decimal = Decimal(str(valor)) 
+        print(f"Processando reembolso de R$ {valor_decimal:.2f} para transação {id_transacao_original}...")
+        return await self._reembolsar_async(id_transacao_original, valor_decimal)
+
+    # --- Processamento em lote ---
+    # Cada solicitação é um dicionário {"metodo": "PIX" | "Cartão de Crédito", "valor": float} e, para
+    # cartão, "num_parcelas" (padrão 1) e "dados_cartao"; "id_cliente" é opcional. A fraude é verificada numa chamada só para o
+    # lote (gateways com verificar_fraude_lote; nos demais, em chamadas concorrentes). As autorizações
+    # seguem em grupos de `tamanho_lote` (gateways com autorizar_lote) ou em chamadas individuais
+    # concorrentes, sempre com até `max_concorrencia` em voo; cada grupo tem um único método e passa
+    # pelo disjuntor desse método. No lugar do comprovante impresso por pagamento, um resumo do lote; os
+    # ids de transação seguem o padrão do checkout (cc_/pix_) com um identificador comum ao lote.
+
+    def _preparar_item_lote(self, solicitacao: dict) -> tuple[str, Decimal, Decimal | None, int] | str:
+        # (metodo, valor a cobrar, valor da parcela, num_parcelas) ou a mensagem de erro da solicitação
+        metodo = solicitacao.get("metodo")
+        if metodo not in ("PIX", "Cartão de Crédito"):
+            return f"Método de pagamento inválido: {metodo}."
+        valor = solicitacao.get("valor")
+        if isinstance(valor, bool) or not isinstance(valor, (int, float, Decimal)) or not math.isfinite(valor) or valor <= 0:
+            return "Valor do pagamento inválido."
+        if metodo == "PIX":
+            return metodo, self._valores_pix(valor)[2], None, 1
+        num_parcelas = solicitacao.get("num_parcelas", 1)
+        if isinstance(num_parcelas, bool) or not isinstance(num_parcelas, int):
+            return "Número de parcelas inválido."
+        valores = self._preparar_cartao(valor, num_parcelas)
+        if valores is None:
+            return "Número de parcelas inválido."
+        valor_parcela, valor_total_pagar = valores
+        return metodo, valor_total_pagar, valor_parcela if num_parcelas > 1 else None, num_parcelas
+
+    @staticmethod
+    def _mapear(funcao, itens: list, max_concorrencia: int) -> list:
+        # map() com até max_concorrencia chamadas em voo (as chamadas ao gateway esperam rede, não CPU)
+        if len(itens) > 1 and max_concorrencia > 1:
+            with ThreadPoolExecutor(max_workers=min(max_concorrencia, len(itens))) as executor:
+                return list(executor.map(funcao, itens))
+        return [funcao(item) for item in itens]
+
+    def _verificar_fraude_lote(self, dados_pagamentos: list[dict], max_concorrencia: int) -> list[bool]:
+        # Regras locais item a item; só os aprovados por elas seguem para o gateway
+        sem_fraude = [self.motor_fraude.aprovar(dados) for dados in dados_pagamentos]
+        pendentes = [posicao for posicao, ok in enumerate(sem_fraude) if ok]
+        if not pendentes:
+            return sem_fraude
+        dados_pendentes = [dados_pagamentos[posicao] for posicao in pendentes]
+        verificar_fraude_lote = getattr(self.gateway, "verificar_fraude_lote", None)
+        if verificar_fraude_lote is None:
+            verificar = partial(self._chamar_gateway, self.DISJUNTOR_FRAUDE, self.gateway.verificar_fraude, idempotente=True)
+            respostas = self._mapear(verificar, dados_pendentes, max_concorrencia)
+        else:
+            respostas = self._chamar_gateway(self.DISJUNTOR_FRAUDE, verificar_fraude_lote, dados_pendentes, idempotente=True)
+        for posicao, ok in zip(pendentes, respostas):
+            sem_fraude[posicao] = ok
+        return sem_fraude
+
+    def _autorizar_grupo(self, metodo: str, itens: list[tuple[Decimal, str]]) -> list[bool]:
+        # Uma chamada ao gateway (autorizar_lote para vários itens ou autorizar para um só), sempre com
+        # itens de um único método: falhas do grupo contam só no disjuntor desse método
+        opcoes = self._opcoes_idempotencia()
+        autorizar_lote = getattr(self.gateway, "autorizar_lote", None)
+        if autorizar_lote is not None:
+            return self._chamar_gateway(metodo, partial(autorizar_lote, **opcoes), itens, idempotente=bool(opcoes))
+        valor, _ = itens[0]
+        return [self._chamar_gateway(metodo, partial(self.gateway.autorizar, **opcoes), valor, metodo, idempotente=bool(opcoes))]
+
+    def processar_lote(self, solicitacoes: list[dict], max_concorrencia: int = 16, tamanho_lote: int = 100) -> list[dict]:
+        # Retorna, na ordem das solicitações, {"sucesso", "mensagem", "metodo", "valor_pago", "valor_parcela",
+        # "num_parcelas", "id_transacao"} de cada pagamento
+        if max_concorrencia <= 0 or tamanho_lote <= 0:
+            raise ValueError("max_concorrencia e tamanho_lote devem ser positivos.")
+        resultados: list[dict] = []
+        preparados = []
+        for indice, solicitacao in enumerate(solicitacoes):
+            item = self._preparar_item_lote(solicitacao)
+            if isinstance(item, str):
+                resultados.append({"sucesso": False, "mensagem": item, "metodo": solicitacao.get("metodo"), "valor_pago": Decimal('0.0'),
+                                   "valor_parcela": None, "num_parcelas": None, "id_transacao": None})
+                continue
+            metodo, valor_cobrado, valor_parcela, num_parcelas = item
+            resultados.append({"sucesso": False, "mensagem": "", "metodo": metodo, "valor_pago": Decimal('0.0'),
+                               "valor_parcela": None, "num_parcelas": num_parcelas, "id_transacao": None})
+            preparados.append((indice, metodo, valor_cobrado, valor_parcela))
+
+        # Fraude: uma verificação para o lote inteiro
+        try:
+            dados_fraude = [self._dados_fraude(valor, metodo, solicitacoes[indice].get("id_cliente"), resultados[indice]["num_parcelas"],
+                                               solicitacoes[indice].get("dados_cartao")) for indice, metodo, valor, _ in preparados]
+            sem_fraude = self._verificar_fraude_lote(dados_fraude, max_concorrencia)
+        except Exception as e:
+            for indice, *_ in preparados:
+                resultados[indice]["mensagem"] = f"Erro na comunicação com o gateway: {e}"
+            preparados, sem_fraude = [], []
+        liberados = []
+        for item, ok in zip(preparados, sem_fraude):
+            if ok:
+                liberados.append(item)
+            else:
+                resultados[item[0]]["mensagem"] = "Pagamento bloqueado por suspeita de fraude."
+
+        # Autorização: grupos de tamanho_lote por método (gateway com autorizar_lote) ou um item por chamada
+        tamanho_grupo = tamanho_lote if getattr(self.gateway, "autorizar_lote", None) is not None else 1
+        grupos = []
+        for metodo in ("PIX", "Cartão de Crédito"):
+            do_metodo = [item for item in liberados if item[1] == metodo]
+            grupos.extend(do_metodo[i:i + tamanho_grupo] for i in range(0, len(do_metodo), tamanho_grupo))
+
+        def autorizar(grupo):
+            try:
+                return self._autorizar_grupo(grupo[0][1], [(valor, metodo) for _, metodo, valor, _ in grupo]), None
+            except Exception as e: # timeout, circuito aberto...: só os itens do grupo falham
+                return None, e
+
+        respostas = self._mapear(autorizar, grupos, max_concorrencia)
+
+        id_lote = str(uuid.uuid4())[:8]
+        aprovados = 0
+        for grupo, (autorizacoes, erro) in zip(grupos, respostas):
+            for posicao, (indice, metodo, valor_cobrado, valor_parcela) in enumerate(grupo):
+                resultado = resultados[indice]
+                if erro is not None:
+                    resultado["mensagem"] = f"Erro na comunicação com o gateway: {erro}"
+                elif autorizacoes[posicao]:
+                    aprovados += 1
+                    prefixo = "pix" if metodo == "PIX" else "cc"
+                    resultado.update(sucesso=True, valor_pago=valor_cobrado, valor_parcela=valor_parcela, id_transacao=f"{prefixo}_{id_lote}-{indice}",
+                                     mensagem="Pagamento PIX confirmado." if metodo == "PIX" else "Pagamento com cartão de crédito aprovado.")
+                else:
+                    resultado["mensagem"] = "Falha ao confirmar pagamento PIX." if metodo == "PIX" else "Pagamento com cartão de crédito recusado."
+        print(f"Lote {id_lote}: {len(resultados)} pagamento(s), {aprovados} aprovado(s), {len(resultados) - aprovados} recusado(s).")
+        return resultados
+
     def _gerar_comprovante(self, valor_pago: Decimal, metodo: str, num_parcelas: int | None = None, valor_parcela: Decimal | None = None) -> str:
         # Gera um ID único para simular o comprovante/ID da transação
         id_transacao = str(uuid.uuid4())
@@ -135,6 +384,7 @@ class SistemaPagamento:
             if not 0 <= taxa_juros <= 100: # Verifica se a taxa de juros está entre 0 e 100
                 raise ValueError("A taxa de juros deve estar entre 0 e 100.") # Lança um erro se a taxa for inválida
             self.taxa_juros_parcelamento = Decimal(str(taxa_juros)) / Decimal('100.0')
+            self.parcelamento.invalidar() # fatores da taxa anterior não serão mais usados
             print(f"Taxa de juros atualizada para {taxa_juros:.2f}%.")
 
         if desconto_pix is not None:
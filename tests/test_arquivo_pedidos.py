@@ -0,0 +1,106 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.pedido import StatusPedido
+from ecommerce.arquivo_pedidos import ArquivoPedidos
+from ecommerce.diario_eventos import DiarioEventos
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+
+# --- Fixtures ---
+
+def criar_pedido(sistema, id_cliente):
+    carrinho = Carrinho()
+    carrinho.adicionar_item(sistema.buscar_produto_por_id(1), 1)
+    return sistema.criar_pedido(id_cliente, carrinho, {"rua": "Rua A, 1"}, "PIX")
+
+def entregar(pedido):
+    pedido.atualizar_status(StatusPedido.PROCESSANDO_PAGAMENTO)
+    pedido.registrar_pagamento(True, "TX", pedido.valor_total)
+    for status in (StatusPedido.EM_SEPARACAO, StatusPedido.ENVIADO, StatusPedido.ENTREGUE):
+        pedido.atualizar_status(status)
+
+def popular(sistema):
+    sistema.adicionar_produto(Produto(1, "Notebook", "", 3000.0, 100, "Informática"))
+    entregue, cancelado, pendente = (criar_pedido(sistema, cliente) for cliente in ("ana", "ana", "bia"))
+    entregar(entregue)
+    cancelado.atualizar_status(StatusPedido.CANCELADO)
+    return entregue, cancelado, pendente
+
+@pytest.fixture
+def sistema(tmp_path):
+    return SistemaEcommerce(arquivo=ArquivoPedidos(str(tmp_path / "arquivo"), pedidos_por_bloco=1, fsync=False))
+
+def test_arquiva_apenas_pedidos_terminais_antigos(sistema):
+    entregue, cancelado, pendente = popular(sistema)
+    resumo_antes = sistema.resumo_vendas()
+
+    assert sistema.arquivar_pedidos(timedelta(days=1)) == 0 # ainda recentes
+    assert sistema.arquivar_pedidos(timedelta(days=1), agora=datetime.now() + timedelta(days=2)) == 2
+
+    assert set(sistema.pedidos) == {pendente.id_pedido}
+    assert len(sistema.arquivo) == 2
+    # Leitura transparente: busca, listagem por cliente, períodos e agregados continuam iguais
+    arquivado = sistema.buscar_pedido_por_id(entregue.id_pedido)
+    assert arquivado.status == StatusPedido.ENTREGUE and arquivado.data_entrega == entregue.data_entrega
+    assert [p.id_pedido for p in sistema.listar_pedidos_por_cliente("ana")] == [entregue.id_pedido, cancelado.id_pedido]
+    assert len(sistema.buscar_pedidos_por_periodo()) == 3
+    assert sistema.resumo_vendas() == resumo_antes
+    assert entregue.id_pedido in sistema.gerar_relatorio_vendas()
+
+def test_arquivo_sobrevive_a_reinicio(tmp_path):
+    diretorio = str(tmp_path / "arquivo")
+    sistema = SistemaEcommerce(arquivo=ArquivoPedidos(diretorio, fsync=False))
+    entregue, _, _ = popular(sistema)
+    sistema.arquivar_pedidos(timedelta(0), agora=datetime.now() + timedelta(seconds=1))
+
+    # Um sistema novo indexa os pedidos arquivados, mesmo sem o produto no catálogo
+    reiniciado = SistemaEcommerce(arquivo=ArquivoPedidos(diretorio, fsync=False))
+    assert reiniciado.resumo_vendas()["pedidos_pagos"] == 1
+    pedido = reiniciado.buscar_pedido_por_id(entregue.id_pedido)
+    assert next(iter(pedido.itens)).nome == "Notebook"
+
+def test_remover_pedido_arquivado(sistema):
+    entregue, cancelado, _ = popular(sistema)
+    sistema.arquivar_pedidos(timedelta(0), agora=datetime.now() + timedelta(seconds=1))
+
+    assert sistema.remover_pedido(entregue.id_pedido)
+    assert sistema.buscar_pedido_por_id(entregue.id_pedido) is None
+    assert sistema.resumo_vendas()["pedidos_pagos"] == 0
+
+    # A remoção fica gravada no índice em disco: reabrir o arquivo não traz o pedido de volta
+    reaberto = ArquivoPedidos(sistema.arquivo.diretorio, fsync=False)
+    assert entregue.id_pedido not in reaberto and len(reaberto) == 1
+    assert [dados["id_pedido"] for dados in reaberto.iterar_dados()] == [cancelado.id_pedido]
+    reaberto.fechar()
+
+def test_arquivamento_com_diario(tmp_path):
+    def abrir():
+        return SistemaEcommerce(diario=DiarioEventos(str(tmp_path / "diario"), fsync=False),
+                                arquivo=ArquivoPedidos(str(tmp_path / "arquivo"), fsync=False))
+    sistema = abrir()
+    entregue, cancelado, pendente = popular(sistema)
+    sistema.arquivar_pedidos(timedelta(0), agora=datetime.now() + timedelta(seconds=1))
+    sistema.salvar_snapshot()
+    sistema.diario.fechar()
+
+    # O snapshot guarda só a localização dos pedidos arquivados, não os dados
+    diario = DiarioEventos(str(tmp_path / "diario"), fsync=False)
+    estado, _ = diario.carregar()
+    diario.fechar()
+    assert [dados["id_pedido"] for dados in estado["pedidos"]] == [pendente.id_pedido]
+    assert set(estado["arquivados"]) == {entregue.id_pedido, cancelado.id_pedido}
+
+    recuperado = abrir()
+    assert set(recuperado.pedidos) == {pendente.id_pedido}
+    assert recuperado.buscar_pedido_por_id(entregue.id_pedido).status == StatusPedido.ENTREGUE
+    assert recuperado.resumo_vendas()["pedidos_pagos"] == 1
+    assert [p.id_pedido for p in recuperado.listar_pedidos_por_cliente("ana")] == [entregue.id_pedido, cancelado.id_pedido]
+
+def test_arquivar_sem_arquivo_configurado():
+    with pytest.raises(ValueError):
+        SistemaEcommerce().arquivar_pedidos(timedelta(days=30))
@@ -0,0 +1,75 @@
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.catalogo_colunar import CatalogoColunar
+from ecommerce.produto import Produto
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+
+# --- Fixtures ---
+
+@pytest.fixture
+def sistema():
+    sistema = SistemaEcommerce(catalogo_colunar=True)
+    sistema.adicionar_produto(Produto(1, "Monitor", "", 1000.0, 2, "Monitores"))
+    sistema.adicionar_produto(Produto(2, "Mouse", "", 50.0, 10, "Periféricos"))
+    sistema.adicionar_produto(Produto(3, "Teclado", "", 200.0, 0, "Periféricos"))
+    return sistema
+
+def test_agregacoes_do_catalogo_colunar(sistema):
+    colunar = sistema.catalogo_colunar
+
+    assert len(colunar) == 3
+    assert colunar.estoque_total() == 12
+    assert colunar.valor_total_estoque() == pytest.approx(2500.0)
+    assert colunar.quantidade_sem_estoque() == 1
+    assert colunar.preco_medio() == pytest.approx(1250.0 / 3)
+    assert colunar.produtos_por_categoria() == {"Monitores": 1, "Periféricos": 2}
+    assert colunar.estoque_por_categoria() == {"Monitores": 2, "Periféricos": 10}
+    assert colunar.valor_estoque_por_categoria() == pytest.approx({"Monitores": 2000.0, "Periféricos": 500.0})
+
+def test_catalogo_colunar_acompanha_alteracoes(sistema):
+    colunar = sistema.catalogo_colunar
+
+    sistema.buscar_produto_por_id(2).atualizar_estoque(-4)
+    sistema.atualizar_produto(3, quantidade_estoque=5, categoria="Teclados")
+    sistema.remover_produto(1)
+
+    assert len(colunar) == 2
+    assert colunar.estoque_total() == 11
+    assert colunar.valor_total_estoque() == pytest.approx(6 * 50.0 + 5 * 200.0)
+    assert colunar.estoque_por_categoria() == {"Periféricos": 6, "Teclados": 5}
+    assert colunar.quantidade_sem_estoque() == 0
+
+def test_catalogo_colunar_e_opcional():
+    assert SistemaEcommerce().catalogo_colunar is None
+
+def test_falha_ao_adicionar_nao_desalinha_colunas():
+    # Estoque fora do intervalo do typecode "q" falha depois que ids e preços já receberam o valor
+    colunar = CatalogoColunar()
+    colunar.adicionar(Produto(1, "Monitor", "", 1000.0, 2, "Monitores"))
+    with pytest.raises(OverflowError):
+        colunar.adicionar(Produto(2, "Mouse", "", 50.0, 2 ** 70, "Periféricos"))
+
+    assert len(colunar) == 1
+    assert 2 not in colunar._linhas
+    assert {len(c) for c in (colunar._ids, colunar._precos, colunar._estoques, colunar._categorias)} == {1}
+    colunar.adicionar(Produto(2, "Mouse", "", 50.0, 10, "Periféricos"))
+    assert colunar.valor_total_estoque() == pytest.approx(2500.0)
+
+def test_visao_numpy_viva_nao_desalinha_colunas():
+    # Com uma visão NumPy exportada sobre uma coluna, o append nela levanta BufferError
+    pytest.importorskip("numpy")
+    colunar = CatalogoColunar()
+    colunar.adicionar(Produto(1, "Monitor", "", 1000.0, 2, "Monitores"))
+    visao = colunar._vetor(colunar._estoques)
+    with pytest.raises(BufferError):
+        colunar.adicionar(Produto(2, "Mouse", "", 50.0, 10, "Periféricos"))
+
+    assert 2 not in colunar._linhas
+    assert {len(c) for c in (colunar._ids, colunar._precos, colunar._estoques, colunar._categorias)} == {1}
+    del visao
+    colunar.adicionar(Produto(2, "Mouse", "", 50.0, 10, "Periféricos"))
+    assert colunar._linhas == {1: 0, 2: 1}
+    assert colunar.estoque_total() == 12
@@ -0,0 +1,81 @@
+import contextlib
+import io
+import random
+import threading
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+
+NUM_THREADS = 8
+TENTATIVAS_POR_THREAD = 50
+
+# --- Fixtures ---
+
+@pytest.fixture
+def sistema():
+    sistema = SistemaEcommerce()
+    for id_produto in range(1, 6):
+        sistema.adicionar_produto(Produto(id_produto, f"Produto {id_produto}", "", 10.0, 40, "Estresse"))
+    return sistema
+
+def executar_em_threads(alvo, num_threads=NUM_THREADS):
+    barreira = threading.Barrier(num_threads)
+    def iniciar(indice):
+        barreira.wait() # todas as threads começam juntas para maximizar a disputa
+        alvo(indice)
+    threads = [threading.Thread(target=iniciar, args=(i,)) for i in range(num_threads)]
+    with contextlib.redirect_stdout(io.StringIO()): # o sistema imprime a cada operação
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+    assert not any(thread.is_alive() for thread in threads), "possível deadlock entre checkouts"
+
+def test_checkouts_concorrentes_nao_vendem_alem_do_estoque(sistema):
+    pedidos, trava_pedidos = [], threading.Lock()
+
+    def comprar(indice):
+        aleatorio = random.Random(indice)
+        for _ in range(TENTATIVAS_POR_THREAD):
+            carrinho = Carrinho()
+            # Carrinhos com vários produtos em ordens diferentes exercitam a ordem de aquisição das travas
+            for id_produto in aleatorio.sample(range(1, 6), 3):
+                try:
+                    carrinho.adicionar_item(sistema.buscar_produto_por_id(id_produto), 1)
+                except ValueError: # produto já esgotado; o checkout revalida sob as travas
+                    pass
+            if not len(carrinho):
+                continue
+            pedido = sistema.criar_pedido(f"cliente_{indice}", carrinho, {"rua": "Rua A, 1"}, "PIX")
+            if pedido:
+                with trava_pedidos:
+                    pedidos.append(pedido)
+
+    executar_em_threads(comprar)
+
+    for id_produto in range(1, 6):
+        vendidos = sum(quantidade for pedido in pedidos for produto, quantidade in pedido.itens.items() if produto.id_produto == id_produto)
+        produto = sistema.buscar_produto_por_id(id_produto)
+        assert produto.quantidade_estoque >= 0
+        assert vendidos + produto.quantidade_estoque == 40
+    # Índices e agregados compartilhados continuam consistentes
+    assert len(sistema.buscar_pedidos_por_periodo()) == len(pedidos)
+    assert sum(len(sistema.listar_pedidos_por_cliente(f"cliente_{i}")) for i in range(NUM_THREADS)) == len(pedidos)
+
+def test_cancelamentos_concorrentes_devolvem_estoque(sistema):
+    carrinhos = []
+    for _ in range(NUM_THREADS):
+        carrinho = Carrinho()
+        carrinho.adicionar_item(sistema.buscar_produto_por_id(1), 2)
+        carrinhos.append(carrinho)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pedidos = [sistema.criar_pedido("cliente", carrinho, {"rua": "Rua A, 1"}, "PIX") for carrinho in carrinhos]
+    assert sistema.buscar_produto_por_id(1).quantidade_estoque == 40 - 2 * NUM_THREADS
+
+    executar_em_threads(lambda indice: sistema.cancelar_pedido(pedidos[indice].id_pedido))
+    assert sistema.buscar_produto_por_id(1).quantidade_estoque == 40
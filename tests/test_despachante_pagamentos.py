@@ -0,0 +1,133 @@
+import contextlib
+import io
+import threading
+import time
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.pedido import StatusPedido
+from ecommerce.sistema_pagamento import SistemaPagamento
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+from ecommerce.despachante_pagamentos import DespachantePagamentos
+
+class PagamentoLento(SistemaPagamento):
+    def __init__(self, latencia=0.0, liberar=None):
+        super().__init__()
+        self.latencia = latencia
+        self.liberar = liberar # threading.Event que segura o gateway até ser acionado
+
+    def _verificar_fraude(self, dados_pagamento):
+        return True
+
+    def _autorizar_pagamento(self, valor, metodo):
+        if self.liberar is not None:
+            self.liberar.wait(5)
+        time.sleep(self.latencia)
+        return True
+
+# --- Fixtures ---
+
+@pytest.fixture(autouse=True)
+def silenciar_saida():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def criar_sistema(pagamento, quantidade_pedidos):
+    sistema = SistemaEcommerce(sistema_pagamento=pagamento)
+    sistema.adicionar_produto(Produto(1, "Mouse", "", 50.0, 1000, "Periféricos"))
+    pedidos = []
+    for i in range(quantidade_pedidos):
+        carrinho = Carrinho()
+        carrinho.adicionar_item(sistema.buscar_produto_por_id(1), 1)
+        pedidos.append(sistema.criar_pedido(f"cliente_{i}", carrinho, {"rua": "Rua A, 1"}, "PIX"))
+    return sistema, pedidos
+
+def test_envio_nao_espera_o_gateway():
+    sistema, pedidos = criar_sistema(PagamentoLento(latencia=0.05), 8)
+    with DespachantePagamentos(sistema, num_trabalhadores=8) as despachante:
+        inicio = time.perf_counter()
+        futuros = [despachante.enviar(pedido.id_pedido, {}) for pedido in pedidos]
+        assert time.perf_counter() - inicio < 0.05 # o envio retorna antes da primeira autorização
+        assert all(futuro.result(timeout=5) for futuro in futuros)
+
+    assert all(pedido.status == StatusPedido.PAGO for pedido in pedidos)
+    metricas = despachante.metricas()
+    assert metricas["aprovados"] == 8 and metricas["profundidade_fila"] == 0
+    assert metricas["latencia_media"] >= 0.05
+
+def test_fila_cheia_sinaliza_contrapressao():
+    liberar = threading.Event()
+    sistema, pedidos = criar_sistema(PagamentoLento(liberar=liberar), 4)
+    with DespachantePagamentos(sistema, num_trabalhadores=1, capacidade_fila=2) as despachante:
+        primeiro = despachante.enviar(pedidos[0].id_pedido, {})
+        while despachante.metricas()["profundidade_fila"]: # espera o trabalhador pegar o primeiro pedido
+            time.sleep(0.001)
+        enfileirados = [despachante.enviar(pedido.id_pedido, {}) for pedido in pedidos[1:3]]
+        assert despachante.enviar(pedidos[3].id_pedido, {}) is None
+        assert pedidos[3].status == StatusPedido.PENDENTE
+        liberar.set()
+        assert primeiro.result(timeout=5) and all(futuro.result(timeout=5) for futuro in enfileirados)
+
+    metricas = despachante.metricas()
+    assert metricas["rejeitados"] == 1 and metricas["enviados"] == 3
+    assert metricas["espera_p95"] > 0
+
+def test_envio_valida_status_e_duplicidade():
+    liberar = threading.Event()
+    sistema, pedidos = criar_sistema(PagamentoLento(liberar=liberar), 2)
+    pedidos[1].atualizar_status(StatusPedido.CANCELADO)
+    with DespachantePagamentos(sistema, num_trabalhadores=1) as despachante:
+        futuro = despachante.enviar(pedidos[0].id_pedido, {})
+        with pytest.raises(ValueError):
+            despachante.enviar(pedidos[0].id_pedido, {}) # já em processamento
+        with pytest.raises(ValueError):
+            despachante.enviar(pedidos[1].id_pedido, {})
+        liberar.set()
+        assert futuro.result(timeout=5)
+
+def test_reenvio_com_chave_idempotencia_devolve_resultado_anterior():
+    sistema, pedidos = criar_sistema(PagamentoLento(), 1)
+    id_pedido = pedidos[0].id_pedido
+    with DespachantePagamentos(sistema, num_trabalhadores=1) as despachante:
+        assert despachante.enviar(id_pedido, {}, chave_idempotencia="chave-1").result(timeout=5)
+        assert pedidos[0].status == StatusPedido.PAGO
+
+        # O pedido já está pago, mas a repetição com a mesma chave devolve o resultado guardado
+        repeticao = despachante.enviar(id_pedido, {}, chave_idempotencia="chave-1")
+        assert repeticao.done() and repeticao.result() is True
+        with pytest.raises(ValueError):
+            despachante.enviar(id_pedido, {}) # sem chave continua valendo a checagem de status
+
+    assert despachante.metricas()["enviados"] == 1
+    assert sistema.idempotencia.execucoes == 1
+
+def test_reenvio_com_chave_enquanto_pedido_esta_na_fila():
+    # A chave é reservada no envio: a repetição recebe o mesmo Future antes de um trabalhador pegar o pedido
+    liberar = threading.Event()
+    sistema, pedidos = criar_sistema(PagamentoLento(liberar=liberar), 2)
+    with DespachantePagamentos(sistema, num_trabalhadores=1) as despachante:
+        ocupado = despachante.enviar(pedidos[0].id_pedido, {})
+        while despachante.metricas()["profundidade_fila"]: # o único trabalhador fica preso no primeiro pedido
+            time.sleep(0.001)
+        original = despachante.enviar(pedidos[1].id_pedido, {}, chave_idempotencia="chave-2")
+        assert despachante.metricas()["profundidade_fila"] == 1
+        assert despachante.enviar(pedidos[1].id_pedido, {}, chave_idempotencia="chave-2") is original
+        with pytest.raises(ValueError):
+            despachante.enviar(pedidos[0].id_pedido, {}, chave_idempotencia="chave-2") # chave de outro pedido
+        liberar.set()
+        assert ocupado.result(timeout=5) and original.result(timeout=5)
+
+    assert despachante.metricas()["enviados"] == 2
+    assert sistema.idempotencia.execucoes == 1
+
+def test_envio_recusado_libera_a_chave():
+    sistema, pedidos = criar_sistema(PagamentoLento(), 1)
+    pedidos[0].atualizar_status(StatusPedido.CANCELADO)
+    with DespachantePagamentos(sistema, num_trabalhadores=1) as despachante:
+        with pytest.raises(ValueError):
+            despachante.enviar(pedidos[0].id_pedido, {}, chave_idempotencia="chave-3")
+    assert len(sistema.idempotencia) == 0
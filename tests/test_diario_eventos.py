@@ -0,0 +1,118 @@
+import pytest
+import sys
+import time
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.pedido import StatusPedido
+from ecommerce.diario_eventos import DiarioEventos
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+
+# --- Fixtures ---
+
+def abrir_sistema(diretorio, **opcoes):
+    return SistemaEcommerce(diario=DiarioEventos(str(diretorio), fsync=False, **opcoes))
+
+def popular(sistema):
+    sistema.adicionar_produto(Produto(1, "Notebook", "", 3000.0, 10, "Informática"))
+    sistema.adicionar_produto(Produto(2, "Mouse", "", 50.0, 100, "Periféricos"))
+    carrinho = Carrinho()
+    carrinho.adicionar_item(sistema.buscar_produto_por_id(1), 1)
+    carrinho.adicionar_item(sistema.buscar_produto_por_id(2), 2)
+    pedido = sistema.criar_pedido("cliente7", carrinho, {"rua": "Rua A, 1"}, "cartao_credito")
+    pedido.atualizar_status(StatusPedido.PROCESSANDO_PAGAMENTO)
+    pedido.registrar_pagamento(True, "TX-1", pedido.valor_total)
+    sistema.atualizar_produto(2, preco=45.0)
+    sistema.atualizar_produto(1, descricao="Tela de 15 polegadas")
+    return pedido
+
+def assert_estado_recuperado(sistema, pedido):
+    assert sistema.buscar_produto_por_id(1).quantidade_estoque == 9
+    assert sistema.buscar_produto_por_id(2).quantidade_estoque == 98
+    assert sistema.buscar_produto_por_id(2).preco == 45.0
+    assert sistema.buscar_produto_por_id(1).descricao == "Tela de 15 polegadas"
+    recuperado = sistema.buscar_pedido_por_id(pedido.id_pedido)
+    assert recuperado.status == StatusPedido.PAGO
+    assert recuperado.id_transacao_pagamento == "TX-1"
+    assert recuperado.valor_total == pedido.valor_total
+    assert recuperado.data_pagamento == pedido.data_pagamento
+    # Índices e agregados são reconstruídos junto com o estado
+    assert sistema.listar_pedidos_por_cliente("cliente7") == [recuperado]
+    assert sistema.buscar_produtos_por_nome("note") == [sistema.buscar_produto_por_id(1)]
+    assert sistema.resumo_vendas()["pedidos_pagos"] == 1
+
+def test_recupera_estado_reaplicando_diario(tmp_path):
+    sistema = abrir_sistema(tmp_path)
+    pedido = popular(sistema)
+    sistema.diario.fechar()
+
+    assert_estado_recuperado(abrir_sistema(tmp_path), pedido)
+
+def test_snapshot_mais_cauda_do_diario(tmp_path):
+    sistema = abrir_sistema(tmp_path, eventos_por_snapshot=3)
+    pedido = popular(sistema)
+    sistema.remover_produto(1)
+    sistema.diario.fechar()
+
+    assert os.path.exists(tmp_path / DiarioEventos.ARQUIVO_SNAPSHOT)
+    recuperado = abrir_sistema(tmp_path)
+    assert recuperado.buscar_produto_por_id(1) is None
+    assert recuperado.buscar_pedido_por_id(pedido.id_pedido).status == StatusPedido.PAGO
+
+def test_snapshot_automatico_espera_travas_da_operacao(tmp_path):
+    sistema = abrir_sistema(tmp_path, eventos_por_snapshot=1)
+    salvar_original = sistema.diario.salvar_snapshot
+    travas_seguradas = []
+    def salvar(gerar_estado):
+        travas_seguradas.append(sistema._trava_do_produto(1).locked())
+        salvar_original(gerar_estado)
+    sistema.diario.salvar_snapshot = salvar
+
+    pedido = popular(sistema)
+    sistema.diario.fechar()
+
+    assert travas_seguradas and not any(travas_seguradas) # nenhum snapshot dentro do checkout
+    assert_estado_recuperado(abrir_sistema(tmp_path), pedido)
+
+def test_replay_nao_duplica_eventos_ja_no_snapshot(tmp_path):
+    sistema = abrir_sistema(tmp_path)
+    pedido = popular(sistema)
+    sistema.salvar_snapshot()
+    # Alteração que entrou no snapshot, mas cujo evento foi gravado depois do corte
+    sistema.diario.registrar("pedido_criado", pedido.para_dados())
+    sistema.diario.registrar("produto_adicionado", sistema.buscar_produto_por_id(1).obter_informacoes())
+    sistema.diario.fechar()
+
+    assert_estado_recuperado(abrir_sistema(tmp_path), pedido)
+
+def test_linha_incompleta_e_descartada(tmp_path):
+    sistema = abrir_sistema(tmp_path)
+    sistema.adicionar_produto(Produto(1, "Notebook", "", 3000.0, 10, "Informática"))
+    sistema.diario.fechar()
+    with open(tmp_path / DiarioEventos.ARQUIVO_DIARIO, "a", encoding="utf-8") as arquivo:
+        arquivo.write('{"seq":2,"tipo":"produto_adicionado","dad') # queda no meio da escrita
+
+    recuperado = abrir_sistema(tmp_path)
+    assert list(recuperado.produtos) == [1]
+    recuperado.adicionar_produto(Produto(2, "Mouse", "", 50.0, 100, "Periféricos"))
+    recuperado.diario.fechar()
+    assert sorted(abrir_sistema(tmp_path).produtos) == [1, 2]
+
+def test_buffer_e_gravado_sem_novos_eventos(tmp_path):
+    # Um evento isolado não espera o próximo: o temporizador grava o buffer ao fim de intervalo_fsync
+    diario = DiarioEventos(str(tmp_path), eventos_por_lote=100, intervalo_fsync=0.05, fsync=False)
+    diario.descarregar() # zera o relógio da última gravação para o evento abaixo ficar no buffer
+    diario.registrar("produto_alterado", {"id_produto": 1, "campo": "descricao", "valor": "Nova"})
+    caminho = tmp_path / DiarioEventos.ARQUIVO_DIARIO
+    assert caminho.read_text(encoding="utf-8") == ""
+    limite = time.monotonic() + 2
+    while not caminho.read_text(encoding="utf-8") and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert '"valor":"Nova"' in caminho.read_text(encoding="utf-8")
+    diario.fechar()
+
+def test_salvar_snapshot_sem_diario():
+    with pytest.raises(ValueError):
+        SistemaEcommerce().salvar_snapshot()
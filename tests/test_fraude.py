@@ -0,0 +1,150 @@
+import contextlib
+import io
+import time
+import pytest
+from decimal import Decimal
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.pedido import StatusPedido
+from ecommerce.sistema_pagamento import SistemaPagamento
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+from ecommerce.gateway import GatewayAleatorio
+from ecommerce.fraude import JanelaDeslizante, MotorFraude
+
+class RelogioFalso:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+class GatewayAprovaTudo(GatewayAleatorio):
+    def __init__(self):
+        super().__init__(taxa_aprovacao=1.0)
+        self.verificacoes = 0
+
+    def verificar_fraude(self, dados_pagamento):
+        self.verificacoes += 1
+        return True
+
+@pytest.fixture(autouse=True)
+def silenciar_saida():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+# --- Janela deslizante ---
+
+def test_janela_descarta_baldes_antigos():
+    janela = JanelaDeslizante(janela=60, baldes=6)
+    janela.registrar("c1", 10.0, agora=0)
+    janela.registrar("c1", 20.0, agora=25)
+    assert janela.consultar("c1", agora=59) == (2, 30.0)
+    assert janela.consultar("c1", agora=61) == (1, 20.0) # o balde de 0-10 s saiu da janela
+    assert janela.registrar("c1", 5.0, agora=500) == (1, 5.0) # janela inteira vencida
+    assert janela.consultar("desconhecido", agora=0) == (0, 0.0)
+
+def test_memoria_limitada_por_lru():
+    janela = JanelaDeslizante(max_chaves=3)
+    for chave in ("a", "b", "c"):
+        janela.registrar(chave, 1.0, agora=0)
+    janela.registrar("a", 1.0, agora=1) # "a" passa a ser a mais recente
+    janela.registrar("d", 1.0, agora=2)
+    assert len(janela) == 3
+    assert janela.consultar("b", agora=2) == (0, 0.0)
+    assert janela.consultar("a", agora=2) == (2, 2.0)
+
+# --- Regras ---
+
+def test_regras_de_valor_e_parcelas():
+    motor = MotorFraude()
+    assert motor.avaliar({"valor": Decimal('100.00'), "metodo": "PIX"}) == (0, [])
+    assert motor.avaliar({"valor": Decimal('15000.00'), "metodo": "PIX"})[1] == ["valor alto"]
+    assert not motor.aprovar({"valor": Decimal('60000.00'), "metodo": "PIX"})
+    pontuacao, motivos = motor.avaliar({"valor": Decimal('15000.00'), "metodo": "Cartão de Crédito", "num_parcelas": 18})
+    assert pontuacao == 70 and "parcelas acima do usual" in motivos
+    assert motor.avaliar({"valor": Decimal('30.00'), "metodo": "Cartão de Crédito", "num_parcelas": 12})[1] == ["parcela muito pequena"]
+    assert motor.metricas()["bloqueios"] == 2
+
+def test_velocidade_por_cliente_e_por_cartao():
+    relogio = RelogioFalso()
+    motor = MotorFraude(max_transacoes_cliente=3, max_transacoes_cartao=2, janela=60, relogio=relogio)
+    for _ in range(3):
+        assert motor.aprovar({"valor": 10, "id_cliente": "c1"})
+    assert motor.avaliar({"valor": 10, "id_cliente": "c1"})[1] == ["muitas transações do cliente"]
+    relogio.agora = 120 # a janela do cliente esvaziou
+    assert motor.avaliar({"valor": 10, "id_cliente": "c1"})[0] == 0
+
+    for id_cliente in ("c2", "c3"):
+        motor.avaliar({"valor": 10, "id_cliente": id_cliente, "cartao": "4111111111111111"})
+    assert "muitas transações do cartão" in motor.avaliar({"valor": 10, "id_cliente": "c4", "cartao": "4111111111111111"})[1]
+    assert "4111111111111111" not in motor.por_cartao._contadores # só o hash do número fica guardado
+    # Espaços e hífens não mudam o cartão
+    assert "muitas transações do cartão" in motor.avaliar({"valor": 10, "cartao": "4111 1111-1111 1111"})[1]
+
+def test_cartao_mascarado_fica_fora_da_velocidade():
+    # Números mascarados de cartões diferentes não podem dividir uma mesma janela
+    motor = MotorFraude(max_transacoes_cartao=1)
+    for final in ("1234", "1234", "5678"):
+        assert motor.avaliar({"valor": 10, "cartao": f"**** **** **** {final}"})[1] == []
+    assert len(motor.por_cartao) == 0
+
+def test_chave_do_cartao_por_token_e_chave_hash():
+    # O token do gateway identifica o cartão mesmo sem o número; com a mesma chave_hash o resumo é o mesmo em
+    # qualquer processo (hash() do Python muda a cada execução)
+    motor = MotorFraude(max_transacoes_cartao=1, chave_hash=b"segredo")
+    motor.avaliar({"valor": 10, "token_cartao": "tok_abc", "cartao": "**** 1234"})
+    assert "muitas transações do cartão" in motor.avaliar({"valor": 10, "token_cartao": "tok_abc"})[1]
+    outro = MotorFraude(chave_hash=b"segredo")
+    assert outro._chave_cartao({"cartao": "4111111111111111"}) == motor._chave_cartao({"cartao": "4111111111111111"})
+    assert MotorFraude()._chave_cartao({"cartao": "4111111111111111"}) != motor._chave_cartao({"cartao": "4111111111111111"})
+
+def test_valor_acumulado_bloqueia():
+    motor = MotorFraude(max_valor_cliente=1000, valor_alto=10_000, limiar_bloqueio=40)
+    assert motor.aprovar({"valor": 600, "id_cliente": "c1"})
+    assert not motor.aprovar({"valor": 600, "id_cliente": "c1"})
+
+def test_custo_por_avaliacao():
+    motor = MotorFraude()
+    dados = [{"valor": Decimal('99.90'), "metodo": "Cartão de Crédito", "num_parcelas": 3,
+              "id_cliente": f"cliente_{i % 5000}", "cartao": f"4000{i % 7000:012d}"} for i in range(20_000)]
+    inicio = time.perf_counter()
+    for dados_pagamento in dados:
+        motor.avaliar(dados_pagamento)
+    assert (time.perf_counter() - inicio) / len(dados) < 50e-6 # dezenas de microssegundos, com folga
+
+# --- Integração com o pagamento ---
+
+def test_bloqueio_local_nao_consulta_o_gateway():
+    gateway = GatewayAprovaTudo()
+    pagamento = SistemaPagamento(gateway=gateway, motor_fraude=MotorFraude(max_transacoes_cartao=2))
+    cartao = {"numero": "5500000000000004"}
+    assert pagamento.processar_cartao_credito(100.0, 1, cartao, id_cliente="c1")[0]
+    assert pagamento.processar_cartao_credito(100.0, 1, cartao, id_cliente="c2")[0]
+    sucesso, mensagem, _, _ = pagamento.processar_cartao_credito(100.0, 1, cartao, id_cliente="c3")
+    assert not sucesso and mensagem == "Pagamento bloqueado por suspeita de fraude."
+    assert gateway.verificacoes == 2
+
+def test_checkout_envia_o_cliente_ao_motor_de_fraude():
+    motor = MotorFraude(max_transacoes_cliente=2)
+    sistema = SistemaEcommerce(sistema_pagamento=SistemaPagamento(gateway=GatewayAprovaTudo(), motor_fraude=motor))
+    sistema.adicionar_produto(Produto(1, "Mouse", "", 50.0, 10, "Periféricos"))
+    pedidos = []
+    for _ in range(3):
+        carrinho = Carrinho()
+        carrinho.adicionar_item(sistema.buscar_produto_por_id(1), 1)
+        pedidos.append(sistema.criar_pedido("cliente_1", carrinho, {"rua": "Rua A, 1"}, "PIX"))
+    resultados = [sistema.processar_pagamento_pedido(pedido.id_pedido, {}) for pedido in pedidos]
+    assert resultados == [True, True, False]
+    assert pedidos[2].status == StatusPedido.FALHA_PAGAMENTO
+
+def test_lote_aplica_as_regras_locais():
+    pagamento = SistemaPagamento(gateway=GatewayAprovaTudo())
+    resultados = pagamento.processar_lote([{"metodo": "PIX", "valor": 100.0, "id_cliente": "c1"},
+                                           {"metodo": "PIX", "valor": 90_000.0, "id_cliente": "c1"}])
+    assert [resultado["sucesso"] for resultado in resultados] == [True, False]
+    assert resultados[1]["mensagem"] == "Pagamento bloqueado por suspeita de fraude."
+    assert pagamento.gateway.verificacoes == 1
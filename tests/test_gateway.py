@@ -0,0 +1,116 @@
+import asyncio
+import contextlib
+import io
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.pedido import StatusPedido
+from ecommerce.sistema_pagamento import SistemaPagamento
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+from ecommerce.sistema_async import SistemaEcommerceAsync
+from ecommerce.gateway import GatewayAleatorio, GatewayLocalSimulado, GatewayPagamento
+from ecommerce.resiliencia import ResilienciaGateway
+
+@pytest.fixture(autouse=True)
+def silenciar_saida():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def simulado(**parametros):
+    esperas = []
+    return GatewayLocalSimulado(dormir=esperas.append, **parametros), esperas
+
+# --- Protocolo e delegação ---
+
+def test_gateways_seguem_o_protocolo():
+    assert isinstance(GatewayAleatorio(), GatewayPagamento)
+    assert isinstance(GatewayLocalSimulado(), GatewayPagamento)
+
+def test_sistema_pagamento_delega_ao_gateway():
+    gateway, _ = simulado(latencia=0, taxa_falha=1.0)
+    pagamento = SistemaPagamento(gateway=gateway)
+    sucesso, mensagem, valor = pagamento.processar_pix(100.0)
+    assert not sucesso and "Falha" in mensagem
+    assert gateway.chamadas == 2 # fraude + autorização
+    assert not pagamento.processar_reembolso("tx", 10.0)
+
+def test_gateway_aleatorio_com_semente_e_reprodutivel():
+    gateway_a, gateway_b = GatewayAleatorio(semente=7), GatewayAleatorio(semente=7)
+    assert [gateway_a.autorizar(1, "PIX") for _ in range(50)] == [gateway_b.autorizar(1, "PIX") for _ in range(50)]
+
+# --- Simulação ---
+
+def test_latencias_por_distribuicao():
+    fixa, esperas_fixa = simulado(distribuicao="fixa", latencia=0.02)
+    for _ in range(5):
+        fixa.autorizar(1, "PIX")
+    assert esperas_fixa == [0.02] * 5
+
+    picos, esperas_picos = simulado(distribuicao="picos", latencia=0.01, prob_pico=0.2, fator_pico=50, semente=1)
+    for _ in range(500):
+        picos.autorizar(1, "PIX")
+    assert set(esperas_picos) == {0.01, 0.5}
+    assert 50 < esperas_picos.count(0.5) < 150
+
+    lognormal, esperas_lognormal = simulado(distribuicao="lognormal", latencia=0.05, sigma=0.8, semente=1)
+    for _ in range(1001):
+        lognormal.autorizar(1, "PIX")
+    mediana = sorted(esperas_lognormal)[500]
+    assert 0.04 < mediana < 0.06
+    assert max(esperas_lognormal) > 4 * mediana # cauda longa
+
+def test_mesma_semente_gera_a_mesma_sequencia():
+    def executar():
+        gateway, esperas = simulado(distribuicao="lognormal", taxa_falha=0.3, taxa_timeout=0.1, semente=123)
+        respostas = []
+        for _ in range(200):
+            try:
+                respostas.append(gateway.autorizar(1, "PIX"))
+            except TimeoutError:
+                respostas.append("timeout")
+        return respostas, esperas
+    assert executar() == executar()
+
+def test_timeout_simulado_e_repetido_pela_camada_de_resiliencia():
+    gateway, esperas = simulado(latencia=0.01, taxa_timeout=1.0, timeout=0.5)
+    with pytest.raises(TimeoutError):
+        gateway.autorizar(1, "PIX")
+    assert esperas == [0.5] and gateway.timeouts == 1
+
+    gateway, _ = simulado(latencia=0.01, taxa_timeout=0.5, semente=3)
+    resiliencia = ResilienciaGateway(max_tentativas=10, limiar_falhas=100, timeout=None, dormir=lambda _: None)
+    pagamento = SistemaPagamento(gateway=gateway, resiliencia=resiliencia)
+    assert all(pagamento._autorizar(1, "PIX") for _ in range(20))
+    assert resiliencia.metricas()["PIX"]["novas_tentativas"] == gateway.timeouts > 0
+
+def test_parametros_invalidos():
+    with pytest.raises(ValueError):
+        GatewayLocalSimulado(distribuicao="uniforme")
+    with pytest.raises(ValueError):
+        GatewayLocalSimulado(taxa_falha=1.5)
+
+# --- Checkout de ponta a ponta ---
+
+def test_checkout_assincrono_com_gateway_simulado():
+    gateway = GatewayLocalSimulado(latencia=0.05, semente=1)
+    sistema = SistemaEcommerce(sistema_pagamento=SistemaPagamento(gateway=gateway))
+    sistema.adicionar_produto(Produto(1, "Mouse", "", 50.0, 100, "Periféricos"))
+    pedidos = []
+    for i in range(50):
+        carrinho = Carrinho()
+        carrinho.adicionar_item(sistema.buscar_produto_por_id(1), 1)
+        pedidos.append(sistema.criar_pedido(f"cliente_{i}", carrinho, {"rua": "Rua A, 1"}, "PIX"))
+    fachada = SistemaEcommerceAsync(sistema)
+
+    async def pagar_todos():
+        inicio = asyncio.get_running_loop().time()
+        resultados = await fachada.processar_pagamentos((pedido.id_pedido, {}) for pedido in pedidos)
+        return resultados, asyncio.get_running_loop().time() - inicio
+
+    resultados, duracao = asyncio.run(pagar_todos())
+    assert all(resultados) and all(pedido.status == StatusPedido.PAGO for pedido in pedidos)
+    assert duracao < 1.0 # 50 pagamentos de 2 x 50 ms aguardados em paralelo, não em série (5 s)
@@ -0,0 +1,147 @@
+import asyncio
+import contextlib
+import io
+import threading
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.pedido import StatusPedido
+from ecommerce.sistema_pagamento import SistemaPagamento
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+from ecommerce.sistema_async import SistemaEcommerceAsync
+from ecommerce.idempotencia import CacheIdempotencia
+
+class PagamentoContado(SistemaPagamento):
+    def __init__(self, liberar=None):
+        super().__init__()
+        self.autorizacoes = 0
+        self.liberar = liberar # threading.Event que segura o gateway até ser acionado
+
+    def _verificar_fraude(self, dados_pagamento):
+        return True
+
+    def _autorizar_pagamento(self, valor, metodo):
+        self.autorizacoes += 1
+        if self.liberar is not None:
+            self.liberar.wait(5)
+        return True
+
+class RelogioFalso:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+# --- Fixtures ---
+
+@pytest.fixture(autouse=True)
+def silenciar_saida():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def criar_sistema(pagamento, quantidade_pedidos=1, idempotencia=None):
+    sistema = SistemaEcommerce(sistema_pagamento=pagamento, idempotencia=idempotencia)
+    sistema.adicionar_produto(Produto(1, "Mouse", "", 50.0, 100, "Periféricos"))
+    pedidos = []
+    for i in range(quantidade_pedidos):
+        carrinho = Carrinho()
+        carrinho.adicionar_item(sistema.buscar_produto_por_id(1), 1)
+        pedidos.append(sistema.criar_pedido(f"cliente_{i}", carrinho, {"rua": "Rua A, 1"}, "PIX"))
+    return sistema, pedidos
+
+# --- Pagamentos com chave ---
+
+def test_repeticao_devolve_resultado_sem_chamar_o_gateway():
+    pagamento = PagamentoContado()
+    sistema, (pedido,) = criar_sistema(pagamento)
+
+    assert sistema.processar_pagamento_pedido(pedido.id_pedido, {}, chave_idempotencia="chave-1")
+    id_transacao = pedido.id_transacao_pagamento
+    assert sistema.processar_pagamento_pedido(pedido.id_pedido, {}, chave_idempotencia="chave-1")
+
+    assert pagamento.autorizacoes == 1
+    assert pedido.status == StatusPedido.PAGO and pedido.id_transacao_pagamento == id_transacao
+    assert sistema.idempotencia.acertos == 1
+
+def test_duplicata_concorrente_aguarda_a_tentativa_em_andamento():
+    liberar = threading.Event()
+    pagamento = PagamentoContado(liberar)
+    sistema, (pedido,) = criar_sistema(pagamento)
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(
+        sistema.processar_pagamento_pedido(pedido.id_pedido, {}, chave_idempotencia="chave-1"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while sistema.idempotencia.acertos < 4: # todas as duplicatas chegaram e estão esperando
+        threading.Event().wait(0.001)
+    liberar.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert resultados == [True] * 5
+    assert pagamento.autorizacoes == 1
+
+def test_chave_reutilizada_em_outro_pedido_e_recusada():
+    sistema, (pedido_a, pedido_b) = criar_sistema(PagamentoContado(), 2)
+    sistema.processar_pagamento_pedido(pedido_a.id_pedido, {}, chave_idempotencia="chave-1")
+    with pytest.raises(ValueError):
+        sistema.processar_pagamento_pedido(pedido_b.id_pedido, {}, chave_idempotencia="chave-1")
+    assert pedido_b.status == StatusPedido.PENDENTE
+
+def test_duplicata_assincrona_compartilha_a_execucao():
+    pagamento = PagamentoContado()
+    sistema, (pedido,) = criar_sistema(pagamento)
+    fachada = SistemaEcommerceAsync(sistema)
+
+    async def pagar_duas_vezes():
+        return await asyncio.gather(*(fachada.processar_pagamento_pedido(pedido.id_pedido, {}, chave_idempotencia="chave-1")
+                                      for _ in range(2)))
+
+    assert asyncio.run(pagar_duas_vezes()) == [True, True]
+    assert pagamento.autorizacoes == 1
+    # o cache é o mesmo do sistema síncrono
+    assert sistema.processar_pagamento_pedido(pedido.id_pedido, {}, chave_idempotencia="chave-1")
+    assert pagamento.autorizacoes == 1
+
+# --- Cache ---
+
+def test_entradas_expiram_pelo_ttl():
+    relogio = RelogioFalso()
+    cache = CacheIdempotencia(ttl=10, relogio=relogio)
+    chamadas = []
+    assert cache.executar("chave", "pedido", lambda: chamadas.append(1) or "primeira") == "primeira"
+    relogio.agora = 9
+    assert cache.executar("chave", "pedido", lambda: "segunda") == "primeira"
+    relogio.agora = 10
+    assert cache.executar("chave", "pedido", lambda: "segunda") == "segunda"
+    assert cache.execucoes == 2
+
+def test_capacidade_descarta_as_mais_antigas():
+    cache = CacheIdempotencia(capacidade=3)
+    for i in range(5):
+        cache.executar(f"chave-{i}", i, lambda: i)
+    cache.executar("chave-5", 5, lambda: 5) # a limpeza acontece na próxima reserva
+    assert len(cache) <= 4
+    assert cache.executar("chave-0", 0, lambda: "nova") == "nova"
+
+def test_excecoes_nao_sao_guardadas():
+    cache = CacheIdempotencia()
+
+    def falhar():
+        raise RuntimeError("gateway fora do ar")
+
+    with pytest.raises(RuntimeError):
+        cache.executar("chave", "pedido", falhar)
+    assert cache.executar("chave", "pedido", lambda: "ok") == "ok"
+    assert cache.execucoes == 2
+
+def test_parametros_invalidos():
+    with pytest.raises(ValueError):
+        CacheIdempotencia(capacidade=0)
+    with pytest.raises(ValueError):
+        CacheIdempotencia(ttl=0)
@@ -0,0 +1,140 @@
+import json
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+
+# --- Fixtures ---
+
+@pytest.fixture
+def sistema():
+    sistema = SistemaEcommerce()
+    sistema.adicionar_produto(Produto(1, "Existente", "", 10.0, 1, "Base"))
+    return sistema
+
+@pytest.fixture
+def arquivo_csv(tmp_path):
+    caminho = tmp_path / "catalogo.csv"
+    caminho.write_text(
+        "id_produto,nome,descricao,preco,quantidade_estoque,categoria\n"
+        "10,Monitor Gamer,Tela 27,1500.00,5,Monitores\n"
+        "11,Mouse,,abc,3,Periféricos\n"        # preço inválido
+        "1,Duplicado,,10.0,1,Base\n"           # ID já existe no catálogo
+        "12,Teclado Mecânico,,350.0,0,Periféricos\n"
+        "13,Cabo,,-1,5,Acessórios\n",          # preço negativo
+        encoding="utf-8")
+    return str(caminho)
+
+def test_importacao_csv_com_rejeicoes(sistema, arquivo_csv):
+    resultado = sistema.importar_catalogo(arquivo_csv, tamanho_lote=2)
+
+    assert resultado["importados"] == 2
+    assert resultado["rejeitados"] == 3
+    assert [linha for linha, _ in resultado["rejeicoes"]] == [3, 4, 6]
+    assert "já existe" in resultado["rejeicoes"][1][1]
+    assert sistema.buscar_produto_por_id(10).categoria == "Monitores"
+    assert sistema.buscar_produto_por_id(1).nome == "Existente"
+
+def test_importacao_constroi_indices(sistema, arquivo_csv):
+    sistema.importar_catalogo(arquivo_csv)
+
+    assert sistema.buscar_produtos_por_nome("mecanico") == [sistema.buscar_produto_por_id(12)]
+    assert sistema.listar_produtos_mais_caros(1) == [sistema.buscar_produto_por_id(10)]
+    assert len(sistema.listar_produtos_por_categoria("Periféricos")) == 1
+    assert sistema.buscar_produtos_facetado(em_estoque=False)["produtos"] == [sistema.buscar_produto_por_id(12)]
+
+    # Produtos importados também mantêm os índices atualizados após a carga
+    sistema.buscar_produto_por_id(12).atualizar_estoque(2)
+    assert sistema.buscar_produtos_facetado(em_estoque=False)["produtos"] == []
+
+def test_importacao_jsonl(sistema, tmp_path):
+    caminho = tmp_path / "catalogo.jsonl"
+    linhas = [
+        json.dumps({"id_produto": 20, "nome": "SSD", "preco": 600.0, "quantidade_estoque": 30, "categoria": "Componentes"}),
+        "{invalido",
+        "",
+        json.dumps({"id_produto": 21, "preco": 10.0, "quantidade_estoque": 1}),
+    ]
+    caminho.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+
+    resultado = sistema.importar_catalogo(str(caminho), max_rejeicoes_detalhadas=1)
+
+    assert resultado["importados"] == 1
+    assert resultado["rejeitados"] == 2
+    assert resultado["rejeicoes"][0][0] == 2
+    assert sistema.buscar_produto_por_id(20).nome == "SSD"
+
+def test_importacao_formato_desconhecido(sistema, tmp_path):
+    with pytest.raises(ValueError):
+        sistema.importar_catalogo(str(tmp_path / "catalogo.xml"))
+
+def test_importacao_rejeita_precos_nao_finitos(sistema, tmp_path):
+    caminho = tmp_path / "catalogo.csv"
+    caminho.write_text(
+        "id_produto,nome,descricao,preco,quantidade_estoque,categoria\n"
+        "30,A,,nan,1,X\n"
+        "31,B,,inf,1,X\n"
+        "32,C,,1e400,1,X\n"
+        "33,D,,99.9,1,X\n",
+        encoding="utf-8")
+
+    resultado = sistema.importar_catalogo(str(caminho))
+
+    assert resultado["importados"] == 1
+    assert [linha for linha, _ in resultado["rejeicoes"]] == [2, 3, 4]
+    assert sistema.listar_produtos_por_categoria("X") == [sistema.buscar_produto_por_id(33)]
+
+def test_importacao_falha_na_indexacao_nao_publica_lote(sistema, arquivo_csv, monkeypatch):
+    def falhar(produtos):
+        raise RuntimeError("falha simulada")
+    monkeypatch.setattr(sistema._indice_precos, "adicionar_lote", falhar)
+
+    with pytest.raises(RuntimeError):
+        sistema.importar_catalogo(arquivo_csv)
+
+    # Nada do lote ficou visível nem pela metade nos índices
+    assert sistema.buscar_produto_por_id(10) is None
+    assert sistema.buscar_produtos_por_nome("monitor") == []
+    assert sistema.listar_produtos_por_categoria("Monitores") == []
+
+def test_importacao_em_lotes_escala_como_carga_unica(tmp_path):
+    # Lotes pequenos não podem reordenar os índices inteiros a cada lote (custo quadrático no tamanho do catálogo)
+    import random
+    import time
+    aleatorio = random.Random(7)
+    caminho = tmp_path / "grande.csv"
+    linhas = ["id_produto,nome,descricao,preco,quantidade_estoque,categoria"]
+    linhas += [f"{i},Produto {aleatorio.randrange(10**9)} modelo{i},,{aleatorio.uniform(1, 2000):.2f},5,Cat{i % 20}"
+               for i in range(1, 30001)]
+    caminho.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+
+    def medir(tamanho_lote):
+        sistema = SistemaEcommerce()
+        inicio = time.perf_counter()
+        sistema.importar_catalogo(str(caminho), tamanho_lote=tamanho_lote)
+        return time.perf_counter() - inicio, sistema
+
+    tempo_unico, _ = medir(30000)
+    tempo_lotes, sistema = medir(50)
+
+    assert tempo_lotes < tempo_unico * 3
+    # Ao final da importação tudo está consolidado e visível nas buscas ordenadas
+    assert len(sistema.buscar_produtos_por_preco()) == 30000
+    assert len(sistema.buscar_produtos_por_nome("modelo29999")) == 1
+    precos = [p.preco for p in sistema.buscar_produtos_por_preco(categoria="Cat3")]
+    assert precos == sorted(precos) and len(precos) == 1500
+
+def test_remocao_de_produto_com_lote_pendente(sistema):
+    # O segundo lote é menor que o índice já ordenado e fica pendente; remover um produto dele consolida antes
+    lote = [Produto(50, "Cadeira Gamer", "", 900.0, 2, "Móveis"), Produto(51, "Cadeira Simples", "", 90.0, 2, "Móveis")]
+    sistema._indexar_produtos_em_lote(lote[:1] + [Produto(52, "Mesa", "", 300.0, 1, "Móveis")])
+    sistema._indexar_produtos_em_lote(lote[1:])
+    sistema.produtos.update({p.id_produto: p for p in lote})
+
+    sistema.remover_produto(51)
+
+    assert [p.id_produto for p in sistema.buscar_produtos_por_nome("cadeira")] == [50]
+    assert [p.id_produto for p in sistema.buscar_produtos_por_preco(categoria="Móveis")] == [52, 50]
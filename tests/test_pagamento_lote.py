@@ -0,0 +1,122 @@
+import contextlib
+import io
+import time
+import pytest
+from decimal import Decimal
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.sistema_pagamento import SistemaPagamento
+from ecommerce.gateway import GatewayAleatorio, GatewayLocalSimulado
+from ecommerce.resiliencia import EstadoCircuito, ResilienciaGateway
+
+class GatewayIndividual:
+    # Sem operações em lote: processar_lote faz uma chamada concorrente por item
+    def __init__(self, latencia=0.0, recusar=()):
+        self.latencia = latencia
+        self.recusar = set(recusar) # valores recusados
+        self.autorizacoes = 0
+        self.verificacoes = 0
+
+    def autorizar(self, valor, metodo):
+        self.autorizacoes += 1
+        time.sleep(self.latencia)
+        if valor in self.recusar:
+            return False
+        return True
+
+    def verificar_fraude(self, dados_pagamento):
+        self.verificacoes += 1
+        return dados_pagamento["valor"] != Decimal('666.00')
+
+    def reembolsar(self, id_transacao_original, valor):
+        return True
+
+@pytest.fixture(autouse=True)
+def silenciar_saida():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def test_resultados_por_item_na_ordem_das_solicitacoes():
+    pagamento = SistemaPagamento(gateway=GatewayIndividual(recusar={Decimal('200.00')}))
+    resultados = pagamento.processar_lote([
+        {"metodo": "PIX", "valor": 100.0},
+        {"metodo": "Cartão de Crédito", "valor": 200.0},
+        {"metodo": "Cartão de Crédito", "valor": 666.0},
+        {"metodo": "Cartão de Crédito", "valor": 1000.0, "num_parcelas": 3, "dados_cartao": {}},
+        {"metodo": "Cartão de Crédito", "valor": 50.0, "num_parcelas": 0},
+        {"metodo": "Boleto", "valor": 10.0},
+    ])
+
+    assert [resultado["sucesso"] for resultado in resultados] == [True, False, False, True, False, False]
+    assert resultados[0]["valor_pago"] == Decimal('95.00') and resultados[0]["mensagem"] == "Pagamento PIX confirmado."
+    assert resultados[1]["mensagem"] == "Pagamento com cartão de crédito recusado."
+    assert resultados[2]["mensagem"] == "Pagamento bloqueado por suspeita de fraude."
+    # mesmos valores da chamada individual
+    _, _, valor_pago, valor_parcela = SistemaPagamento(gateway=GatewayIndividual()).processar_cartao_credito(1000.0, 3, {})
+    assert (resultados[3]["valor_pago"], resultados[3]["valor_parcela"], resultados[3]["num_parcelas"]) == (valor_pago, valor_parcela, 3)
+    assert resultados[4]["mensagem"] == "Número de parcelas inválido."
+    assert "Método de pagamento inválido" in resultados[5]["mensagem"]
+    ids = [resultado["id_transacao"] for resultado in resultados if resultado["sucesso"]]
+    assert len(set(ids)) == 2
+    assert ids[0].startswith("pix_") and ids[1].startswith("cc_") # mesmo padrão do checkout
+
+def test_solicitacoes_com_valor_invalido_falham_sem_interromper_o_lote():
+    pagamento = SistemaPagamento(gateway=GatewayIndividual())
+    resultados = pagamento.processar_lote([
+        {"metodo": "PIX"},
+        {"metodo": "PIX", "valor": "abc"},
+        {"metodo": "Cartão de Crédito", "valor": float("nan")},
+        {"metodo": "Cartão de Crédito", "valor": -10.0},
+        {"metodo": "Cartão de Crédito", "valor": 10.0, "num_parcelas": "2"},
+        {"metodo": "PIX", "valor": 10.0},
+    ])
+    assert [resultado["sucesso"] for resultado in resultados] == [False] * 5 + [True]
+    assert all(resultado["mensagem"] == "Valor do pagamento inválido." for resultado in resultados[:4])
+    assert resultados[4]["mensagem"] == "Número de parcelas inválido."
+
+def test_disjuntor_por_metodo_no_lote():
+    class GatewayPixFora(GatewayIndividual):
+        def autorizar_lote(self, itens):
+            if itens[0][1] == "PIX":
+                raise ConnectionError("PIX fora do ar")
+            return [True] * len(itens)
+    resiliencia = ResilienciaGateway(max_tentativas=1, limiar_falhas=1, timeout=None)
+    pagamento = SistemaPagamento(gateway=GatewayPixFora(), resiliencia=resiliencia)
+    resultados = pagamento.processar_lote([{"metodo": "PIX", "valor": 10.0}, {"metodo": "Cartão de Crédito", "valor": 20.0}] * 3)
+
+    assert [resultado["sucesso"] for resultado in resultados] == [False, True] * 3
+    assert resiliencia.disjuntor("PIX").estado == EstadoCircuito.ABERTO
+    assert resiliencia.disjuntor("Cartão de Crédito").estado == EstadoCircuito.FECHADO
+
+def test_autorizacoes_individuais_sao_concorrentes():
+    gateway = GatewayIndividual(latencia=0.05)
+    pagamento = SistemaPagamento(gateway=gateway)
+    inicio = time.perf_counter()
+    resultados = pagamento.processar_lote([{"metodo": "PIX", "valor": 10.0 + i} for i in range(16)], max_concorrencia=16)
+    assert time.perf_counter() - inicio < 0.4 # 16 x 50 ms em série levariam 0,8 s
+    assert all(resultado["sucesso"] for resultado in resultados)
+    assert gateway.autorizacoes == 16 and gateway.verificacoes == 16
+
+def test_gateway_com_lote_recebe_grupos():
+    esperas = []
+    gateway = GatewayLocalSimulado(latencia=0.01, dormir=esperas.append, semente=1)
+    pagamento = SistemaPagamento(gateway=gateway)
+    resultados = pagamento.processar_lote([{"metodo": "PIX", "valor": 10.0} for _ in range(250)], tamanho_lote=100)
+    assert all(resultado["sucesso"] for resultado in resultados)
+    assert gateway.chamadas == 4 # 1 verificação de fraude + 3 grupos de autorização (100, 100, 50)
+
+def test_timeout_do_gateway_falha_so_o_grupo():
+    gateway = GatewayLocalSimulado(latencia=0, taxa_timeout=1.0, timeout=0, semente=1)
+    pagamento = SistemaPagamento(gateway=gateway)
+    resultados = pagamento.processar_lote([{"metodo": "PIX", "valor": 10.0}] * 3)
+    assert not any(resultado["sucesso"] for resultado in resultados)
+    assert all("gateway" in resultado["mensagem"] for resultado in resultados)
+
+def test_gateway_padrao_e_parametros_invalidos():
+    pagamento = SistemaPagamento(gateway=GatewayAleatorio(taxa_aprovacao=1.0, taxa_fraude=0.0))
+    assert all(resultado["sucesso"] for resultado in pagamento.processar_lote([{"metodo": "PIX", "valor": 1.0}] * 5))
+    assert pagamento.processar_lote([]) == []
+    with pytest.raises(ValueError):
+        pagamento.processar_lote([], max_concorrencia=0)
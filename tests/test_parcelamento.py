@@ -0,0 +1,77 @@
+import contextlib
+import io
+import random
+import pytest
+from decimal import Decimal, ROUND_HALF_UP
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.sistema_pagamento import SistemaPagamento
+from ecommerce.parcelamento import MotorParcelamento
+
+def parcela_referencia(valor_total, num_parcelas, taxa):
+    # Cálculo original de SistemaPagamento.calcular_valor_parcela, sem cache
+    valor_total_decimal = Decimal(str(valor_total))
+    if num_parcelas == 1:
+        return valor_total_decimal.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    if taxa == 0:
+        valor_parcela = valor_total_decimal / Decimal(num_parcelas)
+    else:
+        n = Decimal(num_parcelas)
+        fator = (Decimal('1.0') + taxa) ** n
+        if fator == Decimal('1.0'):
+            valor_parcela = valor_total_decimal / n
+        else:
+            valor_parcela = valor_total_decimal * fator * taxa / (fator - Decimal('1.0'))
+    return valor_parcela.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+@pytest.fixture(autouse=True)
+def silenciar_saida():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+@pytest.mark.parametrize("taxa_percentual", [0, 0.5, 1.99, 2.0, 3.75, 100])
+def test_identico_ao_calculo_original(taxa_percentual):
+    pagamento = SistemaPagamento(taxa_juros_parcelamento=taxa_percentual)
+    aleatorio = random.Random(taxa_percentual)
+    valores = [round(aleatorio.uniform(0.01, 50_000), 2) for _ in range(200)] + [0.01, 1, 99.99, 1234.5]
+    for valor in valores:
+        for n in range(1, 25):
+            calculado = pagamento.calcular_valor_parcela(valor, n)
+            esperado = parcela_referencia(valor, n, pagamento.taxa_juros_parcelamento)
+            assert calculado == esperado and calculado.as_tuple() == esperado.as_tuple()
+
+def test_fatores_sao_calculados_uma_vez_por_taxa_e_parcela():
+    pagamento = SistemaPagamento(taxa_juros_parcelamento=2.0)
+    for valor in (10, 20, 30):
+        for n in range(1, 13):
+            pagamento.calcular_valor_parcela(valor, n)
+    assert pagamento.parcelamento.calculos_fator == 11 # 2x..12x; à vista não usa fator
+
+def test_configurar_taxas_invalida_o_cache():
+    pagamento = SistemaPagamento(taxa_juros_parcelamento=2.0)
+    antes = pagamento.calcular_valor_parcela(1000, 12)
+    pagamento.configurar_taxas(taxa_juros=3.0)
+    depois = pagamento.calcular_valor_parcela(1000, 12)
+    assert depois > antes
+    assert depois == parcela_referencia(1000, 12, Decimal('0.03'))
+    assert pagamento.parcelamento.calculos_fator == 2
+
+def test_tabela_para_varios_precos():
+    pagamento = SistemaPagamento(taxa_juros_parcelamento=2.0)
+    tabelas = pagamento.tabela_parcelamento([100.0, 2599.9], max_parcelas=24)
+    assert len(tabelas) == 2 and all(len(tabela) == 24 for tabela in tabelas)
+    for valor, tabela in zip([100.0, 2599.9], tabelas):
+        for n, valor_parcela, valor_total in tabela:
+            assert valor_parcela == pagamento.calcular_valor_parcela(valor, n)
+            # mesmo total cobrado por processar_cartao_credito
+            assert (valor_parcela, valor_total) == pagamento._preparar_cartao(valor, n)
+    assert tabelas[0][0] == (1, Decimal('100.00'), Decimal('100.00'))
+
+def test_parcelas_invalidas():
+    motor = MotorParcelamento()
+    with pytest.raises(ValueError):
+        motor.valor_parcela(100, 0, Decimal('0.02'))
+    with pytest.raises(ValueError):
+        motor.tabela([100], Decimal('0.02'), max_parcelas=0)
@@ -63,6 +63,19 @@ class TestPedido(unittest.TestCase):
         self.assertIsNone(self.pedido.data_entrega)
         self.assertIsNone(self.pedido.id_transacao_pagamento)
 
+    def test_itens_e_frete_compactos(self):
+        # itens é uma visão somente leitura sobre os pares guardados no pedido
+        with self.assertRaises(TypeError):
+            self.pedido.itens[self.produto1] = 99
+        self.assertEqual(self.pedido.itens[self.produto1], 1)
+        self.assertEqual(dict(self.pedido.itens.items()), {self.produto1: 1, self.produto2: 2})
+        self.assertEqual(self.pedido.itens, {self.produto1: 1, self.produto2: 2})
+        # Pedidos com o mesmo frete compartilham o mesmo Decimal
+        with patch('builtins.print'):
+            pedidos = [Pedido(f"cliente_{i}", self.mock_carrinho, self.endereco, self.metodo_pagamento_pix) for i in range(2)]
+        self.assertEqual(pedidos[0].valor_frete, Decimal("15.00"))
+        self.assertIs(pedidos[0].valor_frete, pedidos[1].valor_frete)
+
     def test_transicao_status_valida_fluxo_sucesso(self):
         #Questão 5: A transição correta entre os diferentes estados do pedido
         
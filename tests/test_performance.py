@@ -161,4 +161,33 @@ class TestPerformanceVolumePedidos(unittest.TestCase):
 
         print(f"\n[Perf Volume] Total: {duration_total_ms:.2f} ms")
         print(f"[Perf Volume] Média por pedido: {tempo_medio_ms:.2f} ms")
-        self.assertLess(tempo_medio_ms, TEMPO_LIMITE_PEDIDO_MEDIO_MS)
\ No newline at end of file
+        self.assertLess(tempo_medio_ms, TEMPO_LIMITE_PEDIDO_MEDIO_MS)
+
+# --- Benchmark de memória (tracemalloc) ---
+
+NUM_INSTANCIAS_MEMORIA_PERF = 10000
+LIMITE_BYTES_POR_PRODUTO = 300
+LIMITE_BYTES_POR_PEDIDO = 600 # medido: ~560 B (itens em tupla e frete compartilhado)
+NUM_PEDIDOS_ARQUIVADOS_PERF = 5000 # acima do cache de blocos do arquivo (8 x 512 pedidos), que é custo fixo
+LIMITE_BYTES_POR_PEDIDO_ARQUIVADO = 400 # medido: ~225-260 B (ids nos índices e agregados; índice do arquivo em disco)
+
+def test_memoria_por_instancia_produto_e_pedido():
+    # Garante que Produto e Pedido continuam compactos (__slots__, interning, itens do pedido em tupla)
+    from benchmarks.benchmark_memoria import bytes_por_produto, bytes_por_pedido
+
+    bytes_produto = bytes_por_produto(NUM_INSTANCIAS_MEMORIA_PERF)
+    bytes_pedido = bytes_por_pedido(NUM_INSTANCIAS_MEMORIA_PERF)
+
+    print(f"\n[Perf Memória] Produto: {bytes_produto:.1f} B/instância, Pedido: {bytes_pedido:.1f} B/instância")
+    assert bytes_produto < LIMITE_BYTES_POR_PRODUTO
+    assert bytes_pedido < LIMITE_BYTES_POR_PEDIDO
+    assert not hasattr(Produto(1, "P", "", 1.0, 1, "C"), "__dict__")
+
+def test_memoria_por_pedido_arquivado():
+    # O sistema ainda guarda, por pedido arquivado, o id na ordem/sequência, no índice por cliente e no temporal;
+    # esse custo é linear e limitado aqui. O índice do ArquivoPedidos fica em SQLite e não entra na conta
+    from benchmarks.benchmark_memoria import bytes_por_pedido_arquivado
+
+    bytes_arquivado = bytes_por_pedido_arquivado(NUM_PEDIDOS_ARQUIVADOS_PERF)
+    print(f"\n[Perf Memória] Pedido arquivado: {bytes_arquivado:.1f} B/pedido")
+    assert bytes_arquivado < LIMITE_BYTES_POR_PEDIDO_ARQUIVADO
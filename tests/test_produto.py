@@ -28,6 +28,17 @@ def test_criacao_produto_preco_invalido():
         Produto(id_produto=2, nome="Preco Zero", descricao="", preco=0.0, quantidade_estoque=1, categoria="Erro")
     with pytest.raises(ValueError, match="O preço do produto deve ser positivo."):
         Produto(id_produto=3, nome="Preco Negativo", descricao="", preco=-5.0, quantidade_estoque=1, categoria="Erro")
+    with pytest.raises(ValueError, match="O preço do produto deve ser positivo."):
+        Produto(id_produto=5, nome="Preco NaN", descricao="", preco=float("nan"), quantidade_estoque=1, categoria="Erro")
+
+def test_alterar_preco_para_valor_invalido(produto_valido):
+    # O setter valida como o construtor: o preço antigo é mantido e os ouvintes não são avisados
+    avisos = []
+    produto_valido.adicionar_ouvinte(lambda produto, campo, anterior: avisos.append(campo))
+    for preco_invalido in (0.0, -1.0, float("nan"), float("inf")):
+        with pytest.raises(ValueError, match="O preço do produto deve ser positivo."):
+            produto_valido.preco = preco_invalido
+    assert produto_valido.preco == 10.0 and avisos == []
 
 def test_criacao_produto_estoque_invalido():
     # Questão 1: Verificação da criação de um produto com erro 
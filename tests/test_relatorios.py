@@ -0,0 +1,70 @@
+import csv
+import gzip
+import io
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.pedido import StatusPedido
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+
+# --- Fixtures ---
+
+@pytest.fixture
+def sistema_com_pedidos():
+    sistema = SistemaEcommerce()
+    produto = Produto(801, "Produto Relatório", "", 100.0, 10, "Relatorio")
+    sistema.adicionar_produto(produto)
+    pedidos = []
+    for _ in range(3):
+        carrinho = Carrinho()
+        carrinho.adicionar_item(produto, 1)
+        with patch("ecommerce.pedido.Pedido.calcular_frete", return_value=Decimal("0.00")):
+            pedidos.append(sistema.criar_pedido("cliente_relatorio", carrinho, {"cep": "80000-000"}, "PIX"))
+    for pedido in pedidos[:2]:
+        pedido.atualizar_status(StatusPedido.PROCESSANDO_PAGAMENTO)
+        pedido.registrar_pagamento(True, "pix_teste", Decimal("95.00"))
+    return sistema, pedidos
+
+def test_relatorio_texto_em_streaming(sistema_com_pedidos):
+    sistema, pedidos = sistema_com_pedidos
+    linhas = list(sistema.iterar_relatorio_vendas())
+
+    assert linhas[0] == "--- Relatório de Vendas ---\n"
+    assert len([l for l in linhas if l.startswith("- Pedido:")]) == 2
+    assert "\nTotal de Pedidos: 2\n" in linhas
+    assert "Valor Total: R$ 190.00\n" in linhas
+
+def test_relatorio_csv_com_filtros(sistema_com_pedidos):
+    sistema, pedidos = sistema_com_pedidos
+    destino = io.StringIO()
+    sistema.exportar_relatorio_vendas(destino, formato="csv", status=StatusPedido.PENDENTE)
+
+    registros = list(csv.DictReader(io.StringIO(destino.getvalue())))
+    assert [r["id_pedido"] for r in registros] == [pedidos[2].id_pedido]
+    assert registros[0]["valor_total"] == "100.00"
+
+    futuro = datetime.now() + timedelta(days=1)
+    linhas = list(sistema.iterar_relatorio_vendas("csv", data_inicio=futuro))
+    assert len(linhas) == 1 # só o cabeçalho
+
+def test_exportacao_para_gzip_e_destino_binario(sistema_com_pedidos, tmp_path):
+    sistema, pedidos = sistema_com_pedidos
+    caminho = str(tmp_path / "vendas.csv.gz")
+    sistema.exportar_relatorio_vendas(caminho, formato="csv")
+    with gzip.open(caminho, "rt", encoding="utf-8") as arquivo:
+        assert len(arquivo.read().splitlines()) == 3
+
+    binario = io.BytesIO()
+    sistema.exportar_relatorio_vendas(binario)
+    assert "Relatório de Vendas" in binario.getvalue().decode("utf-8")
+
+    with pytest.raises(ValueError):
+        list(sistema.iterar_relatorio_vendas(formato="xml"))
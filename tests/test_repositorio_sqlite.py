@@ -0,0 +1,120 @@
+import gc
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.pedido import StatusPedido
+from ecommerce.diario_eventos import DiarioEventos
+from ecommerce.repositorio_sqlite import RepositorioSQLite
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+
+# --- Fixtures ---
+
+@pytest.fixture
+def caminho_banco(tmp_path):
+    return str(tmp_path / "ecommerce.db")
+
+def criar_pedido(sistema, id_cliente, id_produto, quantidade=1):
+    carrinho = Carrinho()
+    carrinho.adicionar_item(sistema.buscar_produto_por_id(id_produto), quantidade)
+    return sistema.criar_pedido(id_cliente, carrinho, {"rua": "Rua A, 1"}, "PIX")
+
+def popular(sistema):
+    sistema.adicionar_produto(Produto(1, "Notebook", "", 3000.0, 10, "Informática"))
+    sistema.adicionar_produto(Produto(2, "Mouse", "", 50.0, 100, "Periféricos"))
+    pedido_pago = criar_pedido(sistema, "ana", 1)
+    pedido_pago.atualizar_status(StatusPedido.PROCESSANDO_PAGAMENTO)
+    pedido_pago.registrar_pagamento(True, "TX-1", pedido_pago.valor_total)
+    pedido_pendente = criar_pedido(sistema, "bia", 2, 3)
+    sistema.atualizar_produto(1, descricao="Tela de 15 polegadas")
+    return pedido_pago, pedido_pendente
+
+def test_estado_persiste_entre_execucoes(caminho_banco):
+    repositorio = RepositorioSQLite(caminho_banco)
+    pedido_pago, pedido_pendente = popular(SistemaEcommerce(repositorio=repositorio))
+    repositorio.fechar()
+
+    sistema = SistemaEcommerce(repositorio=RepositorioSQLite(caminho_banco))
+    assert sistema.buscar_produto_por_id(1).quantidade_estoque == 9
+    assert sistema.buscar_produto_por_id(2).quantidade_estoque == 97
+    assert sistema.buscar_produto_por_id(1).descricao == "Tela de 15 polegadas"
+    recuperado = sistema.buscar_pedido_por_id(pedido_pago.id_pedido)
+    assert recuperado.status == StatusPedido.PAGO
+    assert recuperado.id_transacao_pagamento == "TX-1"
+    assert sistema.listar_pedidos_por_cliente("bia")[0].id_pedido == pedido_pendente.id_pedido
+    assert sistema.resumo_vendas()["pedidos_pagos"] == 1
+    assert sistema.buscar_produtos_por_nome("mouse") == [sistema.buscar_produto_por_id(2)]
+
+    # Pedidos carregados do banco continuam atualizando índices e agregados
+    recuperado.atualizar_status(StatusPedido.CANCELADO)
+    assert sistema.resumo_vendas()["pedidos_pagos"] == 0
+
+def test_cache_de_identidade_evita_leituras(caminho_banco):
+    sistema = SistemaEcommerce(repositorio=RepositorioSQLite(caminho_banco, tamanho_cache_pedidos=1))
+    pedido_pago, pedido_pendente = popular(sistema)
+    pedidos = sistema.repositorio.pedidos
+
+    assert sistema.buscar_pedido_por_id(pedido_pendente.id_pedido) is pedido_pendente
+    assert pedidos.leituras_banco == 0
+
+    # Fora do LRU (tamanho 1), mas ainda referenciado: a busca devolve o mesmo objeto, nunca uma segunda cópia
+    assert sistema.buscar_pedido_por_id(pedido_pago.id_pedido) is pedido_pago
+    assert pedidos.leituras_banco == 0
+
+    # Sem referências fora do armazém, o pedido que saiu do LRU é liberado e relido do banco uma única vez
+    id_pago = pedido_pago.id_pedido
+    sistema.buscar_pedido_por_id(pedido_pendente.id_pedido)
+    del pedido_pago
+    gc.collect()
+    primeiro = sistema.buscar_pedido_por_id(id_pago)
+    assert primeiro.status == StatusPedido.PAGO
+    assert sistema.buscar_pedido_por_id(id_pago) is primeiro
+    assert pedidos.leituras_banco == 1
+
+def test_mapa_de_identidade_nao_duplica_pedido_fora_do_lru(caminho_banco):
+    # Alterações feitas por duas referências ao mesmo id chegam ao mesmo objeto e à mesma linha do banco
+    sistema = SistemaEcommerce(repositorio=RepositorioSQLite(caminho_banco, tamanho_cache_pedidos=1))
+    pedido_pago, pedido_pendente = popular(sistema)
+    pedidos = sistema.repositorio.pedidos
+    pedidos[pedido_pendente.id_pedido] # empurra o pendente de volta ao LRU
+    copia = pedidos[pedido_pago.id_pedido]
+    assert copia is pedido_pago
+    copia.atualizar_status(StatusPedido.EM_SEPARACAO)
+    assert pedido_pago.status == StatusPedido.EM_SEPARACAO
+
+def test_consultas_indexadas_e_remocao(caminho_banco):
+    sistema = SistemaEcommerce(repositorio=RepositorioSQLite(caminho_banco))
+    pedido_pago, pedido_pendente = popular(sistema)
+    pedidos = sistema.repositorio.pedidos
+
+    assert pedidos.buscar_ids(status=StatusPedido.PAGO) == [pedido_pago.id_pedido]
+    assert pedidos.buscar_ids(id_cliente="bia") == [pedido_pendente.id_pedido]
+    assert len(pedidos) == 2
+
+    sistema.remover_pedido(pedido_pendente.id_pedido)
+    sistema.remover_produto(2)
+    assert pedidos.buscar_ids() == [pedido_pago.id_pedido]
+    assert sorted(RepositorioSQLite(caminho_banco).produtos) == [1]
+
+def test_importacao_em_lote(caminho_banco, tmp_path):
+    arquivo = tmp_path / "catalogo.csv"
+    arquivo.write_text("id_produto,nome,descricao,preco,quantidade_estoque,categoria\n"
+                       + "".join(f"{i},Produto {i},,{10 + i}.0,5,Base\n" for i in range(1, 51)), encoding="utf-8")
+    sistema = SistemaEcommerce(repositorio=RepositorioSQLite(caminho_banco))
+    assert sistema.importar_catalogo(str(arquivo), tamanho_lote=20)["importados"] == 50
+    assert len(RepositorioSQLite(caminho_banco).produtos) == 50
+
+def test_transacao_desfeita_em_erro():
+    repositorio = RepositorioSQLite()
+    with pytest.raises(RuntimeError):
+        with repositorio.transacao():
+            repositorio.produtos[1] = Produto(1, "Notebook", "", 3000.0, 10, "Informática")
+            raise RuntimeError("falha no meio do lote")
+    assert repositorio.executar("SELECT COUNT(*) FROM produtos").fetchone()[0] == 0
+
+def test_diario_e_repositorio_sao_exclusivos(tmp_path):
+    with pytest.raises(ValueError):
+        SistemaEcommerce(diario=DiarioEventos(str(tmp_path), fsync=False), repositorio=RepositorioSQLite())
@@ -0,0 +1,102 @@
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.reservas import GerenciadorReservas
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+
+# --- Fixtures ---
+
+class RelogioFalso:
+    def __init__(self):
+        self.agora = 0.0
+    def __call__(self):
+        return self.agora
+
+@pytest.fixture
+def relogio():
+    return RelogioFalso()
+
+@pytest.fixture
+def reservas(relogio):
+    return GerenciadorReservas(ttl_padrao=60, relogio=relogio)
+
+@pytest.fixture
+def produto():
+    return Produto(1, "Notebook", "", 3000.0, 5, "Informática")
+
+def test_reserva_desconta_do_disponivel_de_outros_carrinhos(reservas, produto):
+    carrinho_a, carrinho_b = Carrinho(reservas), Carrinho(reservas)
+    carrinho_a.adicionar_item(produto, 4)
+
+    assert reservas.disponivel(produto) == 1
+    assert reservas.disponivel(produto, carrinho_a.id_carrinho) == 5 # a própria reserva conta como disponível
+    with pytest.raises(ValueError):
+        carrinho_b.adicionar_item(produto, 2)
+    carrinho_b.adicionar_item(produto, 1)
+    assert reservas.quantidade_reservada(1) == 5
+
+def test_alteracoes_no_carrinho_ajustam_a_reserva(reservas, produto):
+    carrinho = Carrinho(reservas)
+    carrinho.adicionar_item(produto, 2)
+    carrinho.adicionar_item(produto, 1)
+    assert reservas.quantidade_reservada(1, carrinho.id_carrinho) == 3
+    carrinho.remover_item(produto, 2)
+    assert reservas.quantidade_reservada(1) == 1
+    carrinho.atualizar_quantidade(produto, 5)
+    assert reservas.quantidade_reservada(1) == 5
+    carrinho.limpar_carrinho()
+    assert reservas.quantidade_reservada(1) == 0 and len(reservas) == 0
+
+def test_reservas_expiram_pelo_heap(reservas, relogio, produto):
+    carrinho_a, carrinho_b = Carrinho(reservas), Carrinho(reservas)
+    carrinho_a.adicionar_item(produto, 3)
+    relogio.agora = 30
+    carrinho_b.adicionar_item(produto, 2)
+
+    relogio.agora = 61 # só a reserva de A venceu
+    assert reservas.disponivel(produto) == 3
+    relogio.agora = 80
+    reservas.renovar(carrinho_b.id_carrinho) # B passa a vencer em 140
+    relogio.agora = 100
+    assert reservas.expirar() == 0
+    assert reservas.quantidade_reservada(1) == 2
+    relogio.agora = 140
+    assert reservas.expirar() == 1
+    assert reservas.disponivel(produto) == 5
+
+def test_checkout_respeita_e_consome_reservas(relogio):
+    sistema = SistemaEcommerce(reservas=GerenciadorReservas(ttl_padrao=60, relogio=relogio))
+    sistema.adicionar_produto(Produto(1, "Notebook", "", 3000.0, 2, "Informática"))
+    notebook = sistema.buscar_produto_por_id(1)
+    carrinho_reservado, carrinho_atrasado = sistema.criar_carrinho(), sistema.criar_carrinho()
+    carrinho_reservado.adicionar_item(notebook, 2)
+    carrinho_sem_reserva = Carrinho()
+    carrinho_sem_reserva.itens[notebook] = 1 # item adicionado antes da reserva do outro carrinho
+
+    assert sistema.criar_pedido("bia", carrinho_sem_reserva, {"rua": "Rua A, 1"}, "PIX") is None
+    assert sistema.criar_pedido("ana", carrinho_reservado, {"rua": "Rua A, 1"}, "PIX") is not None
+    assert notebook.quantidade_estoque == 0
+    assert sistema.reservas.quantidade_reservada(1) == 0
+    with pytest.raises(ValueError):
+        carrinho_atrasado.adicionar_item(notebook, 1)
+
+def test_lote_respeita_reservas(relogio):
+    sistema = SistemaEcommerce(reservas=GerenciadorReservas(ttl_padrao=60, relogio=relogio))
+    sistema.adicionar_produto(Produto(1, "Notebook", "", 3000.0, 3, "Informática"))
+    notebook = sistema.buscar_produto_por_id(1)
+    carrinho_sem_reserva = Carrinho()
+    carrinho_sem_reserva.adicionar_item(notebook, 2)
+    carrinho_reservado = sistema.criar_carrinho()
+    carrinho_reservado.adicionar_item(notebook, 2)
+
+    resultados = sistema.criar_pedidos_em_lote([
+        ("bia", carrinho_sem_reserva, {"rua": "Rua A, 1"}, "PIX"),  # só 1 unidade livre de reservas
+        ("ana", carrinho_reservado, {"rua": "Rua A, 1"}, "PIX"),
+    ])
+    assert resultados[0][0] is None and resultados[1][0] is not None
+    assert notebook.quantidade_estoque == 1
+    assert sistema.reservas.quantidade_reservada(1) == 0
@@ -0,0 +1,254 @@
+import asyncio
+import contextlib
+import io
+import threading
+import time
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.pedido import StatusPedido
+from ecommerce.sistema_pagamento import SistemaPagamento
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+from ecommerce.resiliencia import CircuitoAberto, DisjuntorCircuito, EstadoCircuito, ResilienciaGateway, ResultadoIncerto, TimeoutNaFila
+
+class RelogioFalso:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+class GatewayInstavel(SistemaPagamento):
+    # Levanta `erro` nas primeiras `falhas` autorizações e aprova as seguintes
+    def __init__(self, falhas, erro=ConnectionError, resiliencia=None):
+        super().__init__(resiliencia=resiliencia)
+        self.falhas = falhas
+        self.erro = erro
+        self.chamadas = 0
+
+    def _verificar_fraude(self, dados_pagamento):
+        return True
+
+    def _autorizar_pagamento(self, valor, metodo):
+        self.chamadas += 1
+        if self.chamadas <= self.falhas:
+            raise self.erro("gateway indisponível")
+        return True
+
+def criar_resiliencia(**parametros):
+    esperas = []
+    parametros.setdefault("timeout", None)
+    resiliencia = ResilienciaGateway(dormir=esperas.append, **parametros)
+    return resiliencia, esperas
+
+@pytest.fixture(autouse=True)
+def silenciar_saida():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+# --- Novas tentativas ---
+
+def test_falha_transitoria_e_repetida_com_espera_exponencial_limitada():
+    resiliencia, esperas = criar_resiliencia(max_tentativas=5, atraso_base=0.1, atraso_maximo=0.3, limiar_falhas=10)
+    pagamento = GatewayInstavel(falhas=4, resiliencia=resiliencia)
+
+    sucesso, _, valor = pagamento.processar_pix(100.0)
+
+    assert sucesso and valor > 0
+    assert pagamento.chamadas == 5
+    assert len(esperas) == 4
+    assert all(0 <= espera <= limite for espera, limite in zip(esperas, (0.1, 0.2, 0.3, 0.3)))
+    metricas = resiliencia.metricas()["PIX"]
+    assert metricas["tentativas"] == 5 and metricas["novas_tentativas"] == 4 and metricas["falhas"] == 0
+
+def test_recusa_do_gateway_nao_e_repetida():
+    resiliencia, esperas = criar_resiliencia()
+    pagamento = GatewayInstavel(falhas=0, resiliencia=resiliencia)
+    pagamento._autorizar_pagamento = lambda valor, metodo: False
+
+    sucesso, _, _, _ = pagamento.processar_cartao_credito(100.0, 1, {})
+
+    assert not sucesso and esperas == []
+    assert resiliencia.metricas()["Cartão de Crédito"]["estado"] == "Fechado"
+
+def test_tentativas_esgotadas_marcam_falha_de_pagamento():
+    resiliencia, _ = criar_resiliencia(max_tentativas=2)
+    sistema = SistemaEcommerce(sistema_pagamento=GatewayInstavel(falhas=10, resiliencia=resiliencia))
+    sistema.adicionar_produto(Produto(1, "Mouse", "", 50.0, 10, "Periféricos"))
+    carrinho = Carrinho()
+    carrinho.adicionar_item(sistema.buscar_produto_por_id(1), 1)
+    pedido = sistema.criar_pedido("cliente_1", carrinho, {"rua": "Rua A, 1"}, "PIX")
+
+    assert sistema.processar_pagamento_pedido(pedido.id_pedido, {}) is False
+    assert pedido.status == StatusPedido.FALHA_PAGAMENTO
+    assert resiliencia.metricas()["PIX"]["falhas"] == 1
+
+def test_timeout_por_chamada():
+    resiliencia = ResilienciaGateway(max_tentativas=1, timeout=0.05)
+    inicio = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        resiliencia.executar("PIX", time.sleep, 1)
+    assert time.perf_counter() - inicio < 0.5
+    assert resiliencia.metricas()["PIX"]["timeouts"] == 1
+    resiliencia.fechar()
+
+def test_timeout_com_chamada_em_andamento_tem_resultado_incerto():
+    # A autorização já começou quando o prazo acabou: sem chave de idempotência ela não é repetida
+    resiliencia = ResilienciaGateway(max_tentativas=3, atraso_base=0, atraso_maximo=0, timeout=0.05)
+    chamadas = []
+
+    def autorizar():
+        chamadas.append(1)
+        time.sleep(0.2)
+        return True
+
+    with pytest.raises(ResultadoIncerto):
+        resiliencia.executar("PIX", autorizar)
+    assert len(chamadas) == 1
+    resiliencia.fechar()
+
+def test_timeout_na_fila_cancela_a_chamada_e_permite_nova_tentativa():
+    # Com o pool ocupado, a chamada expira antes de começar: é cancelada, nunca chega ao gateway e pode ser repetida
+    resiliencia = ResilienciaGateway(max_tentativas=2, atraso_base=0, atraso_maximo=0, timeout=0.05, max_threads=1)
+    liberar = threading.Event()
+    resiliencia._chamar_com_timeout(lambda: None) # cria o pool
+    resiliencia._executor.submit(liberar.wait) # ocupa a única thread
+    chamadas = []
+
+    def autorizar():
+        chamadas.append(1)
+        return True
+
+    with pytest.raises(TimeoutNaFila):
+        resiliencia.executar("PIX", autorizar)
+    metricas = resiliencia.metricas()["PIX"]
+    assert metricas["tentativas"] == 2 and metricas["novas_tentativas"] == 1 # repetida mesmo sem idempotência
+    liberar.set()
+    resiliencia.fechar()
+    time.sleep(0.1)
+    assert chamadas == [] # as tentativas canceladas não rodaram depois
+
+# --- Disjuntor ---
+
+def test_circuito_abre_e_falha_rapido_por_metodo():
+    relogio = RelogioFalso()
+    resiliencia, _ = criar_resiliencia(max_tentativas=1, limiar_falhas=3, tempo_recuperacao=10, relogio=relogio)
+    pagamento = GatewayInstavel(falhas=3, resiliencia=resiliencia)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            pagamento.processar_pix(100.0)
+
+    with pytest.raises(CircuitoAberto):
+        pagamento.processar_pix(100.0)
+    assert pagamento.chamadas == 3 # a chamada rejeitada não chegou ao gateway
+    assert pagamento.processar_cartao_credito(100.0, 1, {})[0] # o circuito do cartão é independente
+
+    metricas = resiliencia.metricas()
+    assert metricas["PIX"]["estado"] == "Aberto" and metricas["PIX"]["rejeitadas"] == 1
+    assert metricas["Cartão de Crédito"]["estado"] == "Fechado"
+
+    relogio.agora = 10 # tempo de recuperação: a chamada de teste fecha o circuito
+    assert pagamento.processar_pix(100.0)[0]
+    assert resiliencia.metricas()["PIX"]["estado"] == "Fechado"
+
+def test_falha_no_semi_aberto_reabre_o_circuito():
+    relogio = RelogioFalso()
+    disjuntor = DisjuntorCircuito(limiar_falhas=2, tempo_recuperacao=5, relogio=relogio)
+    disjuntor.registrar_falha()
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == EstadoCircuito.ABERTO and not disjuntor.permitir()
+
+    relogio.agora = 5
+    assert disjuntor.permitir() # chamada de teste
+    assert not disjuntor.permitir() # só uma de cada vez
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == EstadoCircuito.ABERTO and disjuntor.aberturas == 2
+
+def test_versao_assincrona_repete_e_respeita_timeout():
+    resiliencia = ResilienciaGateway(max_tentativas=3, atraso_base=0, atraso_maximo=0, timeout=0.05, limiar_falhas=10)
+    chamadas = []
+
+    async def autorizar(valor):
+        chamadas.append(valor)
+        if len(chamadas) < 3:
+            await asyncio.sleep(1) # estoura o timeout
+        return True
+
+    assert asyncio.run(resiliencia.executar_async("PIX", autorizar, 10, idempotente=True))
+    metricas = resiliencia.metricas()["PIX"]
+    assert len(chamadas) == 3 and metricas["timeouts"] == 2
+
+    # Sem idempotência, o timeout não é repetido: o gateway pode ter processado a chamada
+    chamadas.clear()
+    with pytest.raises(ResultadoIncerto):
+        asyncio.run(resiliencia.executar_async("PIX", autorizar, 10))
+    assert len(chamadas) == 1
+
+# --- Timeouts, fraude e reembolso ---
+
+class GatewayLento:
+    # Estoura o timeout nas primeiras `timeouts` chamadas de cada operação
+    def __init__(self, timeouts, aceita_chave_idempotencia=False):
+        self.timeouts = timeouts
+        self.aceita_chave_idempotencia = aceita_chave_idempotencia
+        self.chamadas = {"autorizar": 0, "verificar_fraude": 0, "reembolsar": 0}
+        self.chaves = []
+
+    def _responder(self, operacao, chave_idempotencia=None):
+        self.chamadas[operacao] += 1
+        self.chaves.append(chave_idempotencia)
+        if self.chamadas[operacao] <= self.timeouts:
+            raise TimeoutError("gateway não respondeu")
+        return True
+
+    def autorizar(self, valor, metodo, **opcoes):
+        return self._responder("autorizar", **opcoes)
+
+    def verificar_fraude(self, dados_pagamento):
+        return self._responder("verificar_fraude")
+
+    def reembolsar(self, id_transacao_original, valor, **opcoes):
+        return self._responder("reembolsar", **opcoes)
+
+def test_timeout_so_e_repetido_com_chave_de_idempotencia():
+    resiliencia, _ = criar_resiliencia(max_tentativas=3, limiar_falhas=10)
+    gateway = GatewayLento(timeouts=1)
+    pagamento = SistemaPagamento(gateway=gateway, resiliencia=resiliencia)
+    with pytest.raises(TimeoutError):
+        pagamento.processar_pix(100.0)
+    assert gateway.chamadas["verificar_fraude"] == 2 # consulta sem efeito colateral: repetida
+    assert gateway.chamadas["autorizar"] == 1 # cobrança sem chave: não repetida
+
+    resiliencia, _ = criar_resiliencia(max_tentativas=3, limiar_falhas=10)
+    gateway = GatewayLento(timeouts=1, aceita_chave_idempotencia=True)
+    pagamento = SistemaPagamento(gateway=gateway, resiliencia=resiliencia)
+    assert pagamento.processar_pix(100.0)[0]
+    assert pagamento.processar_reembolso("TX-1", 95.0)
+    assert gateway.chamadas["autorizar"] == 2 and gateway.chamadas["reembolsar"] == 2
+    chaves = [chave for chave in gateway.chaves if chave is not None]
+    assert len(chaves) == 4 and chaves[0] == chaves[1] and chaves[2] == chaves[3] # mesma chave nas tentativas
+
+def test_fraude_e_reembolso_tem_disjuntores_proprios():
+    resiliencia, _ = criar_resiliencia(max_tentativas=1, limiar_falhas=1)
+    pagamento = SistemaPagamento(gateway=GatewayLento(timeouts=10), resiliencia=resiliencia)
+    with pytest.raises(TimeoutError):
+        pagamento.processar_reembolso("TX-1", 10.0)
+    with pytest.raises(TimeoutError):
+        pagamento.processar_pix(10.0)
+
+    metricas = resiliencia.metricas()
+    assert metricas[SistemaPagamento.DISJUNTOR_REEMBOLSO]["estado"] == "Aberto"
+    assert metricas[SistemaPagamento.DISJUNTOR_FRAUDE]["estado"] == "Aberto"
+    assert "PIX" not in metricas # bloqueado na fraude, antes da autorização
+
+def test_parametros_invalidos():
+    with pytest.raises(ValueError):
+        ResilienciaGateway(max_tentativas=0)
+    with pytest.raises(ValueError):
+        ResilienciaGateway(atraso_base=1, atraso_maximo=0.5)
+    with pytest.raises(ValueError):
+        DisjuntorCircuito(limiar_falhas=0)
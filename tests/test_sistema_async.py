@@ -0,0 +1,135 @@
+import asyncio
+import contextlib
+import io
+import time
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ecommerce.produto import Produto
+from ecommerce.carrinho import Carrinho
+from ecommerce.pedido import StatusPedido
+from ecommerce.sistema_pagamento import SistemaPagamento
+from ecommerce.sistema_ecommerce import SistemaEcommerce
+from ecommerce.sistema_async import SistemaEcommerceAsync
+
+LATENCIA_GATEWAY = 0.05
+
+class PagamentoComLatencia(SistemaPagamento):
+    # Gateway simulado: cada chamada espera no loop, como um cliente HTTP assíncrono
+    async def _verificar_fraude_async(self, dados_pagamento):
+        return True
+
+    async def _autorizar_pagamento_async(self, valor, metodo):
+        await asyncio.sleep(LATENCIA_GATEWAY)
+        return True
+
+    async def _reembolsar_async(self, id_transacao_original, valor):
+        await asyncio.sleep(LATENCIA_GATEWAY)
+        return True
+
+# --- Fixtures ---
+
+@pytest.fixture
+def sistema():
+    sistema = SistemaEcommerce(sistema_pagamento=PagamentoComLatencia())
+    sistema.adicionar_produto(Produto(1, "Mouse", "", 50.0, 1000, "Periféricos"))
+    return sistema
+
+async def criar_pedidos(fachada, quantidade, metodo="PIX"):
+    pedidos = []
+    for i in range(quantidade):
+        carrinho = Carrinho()
+        carrinho.adicionar_item(fachada.sistema.buscar_produto_por_id(1), 1)
+        pedidos.append(await fachada.criar_pedido(f"cliente_{i}", carrinho, {"rua": "Rua A, 1"}, metodo))
+    return pedidos
+
+def test_pagamentos_concorrentes_num_unico_loop(sistema):
+    fachada = SistemaEcommerceAsync(sistema, max_concorrencia=500)
+
+    async def cenario():
+        pedidos = await criar_pedidos(fachada, 200)
+        inicio = time.perf_counter()
+        resultados = await fachada.processar_pagamentos((pedido.id_pedido, {}) for pedido in pedidos)
+        return pedidos, resultados, time.perf_counter() - inicio
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pedidos, resultados, duracao = asyncio.run(cenario())
+    assert all(resultados)
+    assert all(pedido.status == StatusPedido.PAGO for pedido in pedidos)
+    assert fachada.pico_em_andamento == 200
+    assert duracao < 200 * LATENCIA_GATEWAY / 4 # em série levaria 10 s
+
+def test_concorrencia_limitada_pelo_semaforo(sistema):
+    fachada = SistemaEcommerceAsync(sistema, max_concorrencia=10)
+
+    async def cenario():
+        pedidos = await criar_pedidos(fachada, 30, metodo="Cartão de Crédito")
+        return await fachada.processar_pagamentos((pedido.id_pedido, {"num_parcelas": 3}) for pedido in pedidos)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert all(asyncio.run(cenario()))
+    assert fachada.pico_em_andamento == 10
+    assert fachada.em_andamento == 0
+
+def test_cancelamento_com_reembolso(sistema):
+    fachada = SistemaEcommerceAsync(sistema)
+
+    async def cenario():
+        pedido_pago, pedido_pendente = await criar_pedidos(fachada, 2)
+        await fachada.processar_pagamento_pedido(pedido_pago.id_pedido, {})
+        reembolsos = []
+        fachada.sistema.sistema_pagamento._reembolsar_async = lambda *args: _registrar(reembolsos, args)
+        cancelado_pago = await fachada.cancelar_pedido(pedido_pago.id_pedido)
+        cancelado_pendente = await fachada.cancelar_pedido(pedido_pendente.id_pedido)
+        return pedido_pago, reembolsos, cancelado_pago, cancelado_pendente
+
+    async def _registrar(reembolsos, args):
+        reembolsos.append(args)
+        return True
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pedido_pago, reembolsos, cancelado_pago, cancelado_pendente = asyncio.run(cenario())
+    assert cancelado_pago and cancelado_pendente
+    assert reembolsos == [(pedido_pago.id_transacao_pagamento, pedido_pago.valor_total)]
+    assert sistema.buscar_produto_por_id(1).quantidade_estoque == 1000
+
+def test_pagamento_de_pedido_inexistente(sistema):
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert asyncio.run(SistemaEcommerceAsync(sistema).processar_pagamento_pedido("nao-existe", {})) is False
+
+class GatewaySincronoLento:
+    # Só oferece a API síncrona e bloqueia a thread em cada chamada
+    def autorizar(self, valor, metodo):
+        time.sleep(0.2)
+        return True
+
+    def verificar_fraude(self, dados_pagamento):
+        return True
+
+    def reembolsar(self, id_transacao_original, valor):
+        time.sleep(0.2)
+        return True
+
+def test_gateway_sincrono_nao_bloqueia_o_loop():
+    # O fallback síncrono roda numa thread: outras corrotinas continuam andando durante a chamada
+    pagamento = SistemaPagamento(gateway=GatewaySincronoLento())
+
+    async def cenario():
+        batidas = 0
+        async def relogio():
+            nonlocal batidas
+            while True:
+                await asyncio.sleep(0.01)
+                batidas += 1
+        tarefa = asyncio.create_task(relogio())
+        resultado = await pagamento.processar_pix_async(100.0)
+        reembolso = await pagamento.processar_reembolso_async("TX-1", 95.0)
+        tarefa.cancel()
+        return resultado, reembolso, batidas
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado, reembolso, batidas = asyncio.run(cenario())
+    assert resultado[0] and reembolso
+    assert batidas >= 10 # bloqueando o loop, o relógio não andaria durante os 0,4 s de gateway
@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 from decimal import Decimal
 import sys
 import os
@@ -10,6 +11,7 @@ from ecommerce.carrinho import Carrinho
 from ecommerce.sistema_pagamento import SistemaPagamento
 from ecommerce.pedido import Pedido, StatusPedido
 from ecommerce.sistema_ecommerce import SistemaEcommerce
+from ecommerce.indices import faixa_de_preco
 
 class SistemaEcommerceTest(unittest.TestCase):
     def setUp(self):
@@ -139,5 +141,256 @@ class SistemaEcommerceTest(unittest.TestCase):
         self.assertEqual(self.produto2.quantidade_estoque, estoque_p2)
         self.assertEqual(pedido.status, StatusPedido.CANCELADO)
 
+    def test_busca_por_nome_ignora_acentos_e_maiusculas(self):
+        monitor = Produto(604, "Monitôr Ultrawide", "Desc", 900.0, 3, "Monitores")
+        self.sistema.adicionar_produto(monitor)
+
+        self.assertEqual(self.sistema.buscar_produtos_por_nome("monitor"), [monitor])
+        self.assertEqual(self.sistema.buscar_produtos_por_nome("MONIT"), [monitor])
+        self.assertEqual(self.sistema.buscar_produtos_por_nome("ultra"), [monitor])
+        self.assertEqual(self.sistema.buscar_produtos_por_nome("monitor sistema"), [])
+        self.assertEqual(len(self.sistema.buscar_produtos_por_nome("")), 4)
+
+    def test_busca_por_nome_no_meio_da_palavra(self):
+        monitor = Produto(604, "Monitôr Ultrawide", "Desc", 900.0, 3, "Monitores")
+        torre = Produto(605, "Torre Gamer", "Desc", 300.0, 3, "Gabinetes")
+        self.sistema.adicionar_produto(monitor)
+        self.sistema.adicionar_produto(torre)
+
+        # Sem palavra começando com o termo, o primeiro token casa no meio da palavra, como a busca antiga
+        self.assertEqual(self.sistema.buscar_produtos_por_nome("nitor"), [monitor])
+        self.assertEqual(self.sistema.buscar_produtos_por_nome("nitor ultra"), [monitor])
+        # Com alguma palavra começando com o termo, só os prefixos contam
+        self.assertEqual(self.sistema.buscar_produtos_por_nome("tor"), [torre])
+        # Tokens depois do primeiro precisam ser início de palavra
+        self.assertEqual(self.sistema.buscar_produtos_por_nome("monitor wide"), [])
+
+    def test_indice_de_nome_acompanha_atualizacao_e_remocao(self):
+        self.sistema.atualizar_produto(601, nome="Cadeira Ergonômica")
+
+        self.assertEqual(self.sistema.buscar_produtos_por_nome("ergonomica"), [self.produto1])
+        self.assertNotIn(self.produto1, self.sistema.buscar_produtos_por_nome("Sistema"))
+
+        self.produto2.nome = "Mesa Gamer" # alteração direta no produto também reindexa
+        self.assertEqual(self.sistema.buscar_produtos_por_nome("gamer"), [self.produto2])
+
+        self.assertTrue(self.sistema.remover_produto(601))
+        self.assertEqual(self.sistema.buscar_produtos_por_nome("cadeira"), [])
+        self.assertIsNone(self.sistema.buscar_produto_por_id(601))
+        self.assertFalse(self.sistema.remover_produto(601))
+
+        with self.assertRaises(ValueError):
+            self.sistema.atualizar_produto(602, preco=0)
+        for preco_invalido in (float("nan"), float("inf")): # NaN e infinito também não entram nos índices de preço
+            with self.assertRaises(ValueError):
+                self.sistema.atualizar_produto(602, preco=preco_invalido)
+        self.assertEqual(self.sistema.buscar_produto_por_id(602).preco, self.produto2.preco)
+
+    def test_busca_facetada_por_categoria_preco_e_estoque(self):
+        self.sistema.adicionar_produto(Produto(605, "Teclado", "Desc", 250.0, 4, "Periféricos"))
+
+        resultado = self.sistema.buscar_produtos_facetado(categoria="Sys")
+        self.assertEqual(len(resultado["produtos"]), 3)
+        self.assertEqual(resultado["facetas"]["categoria"], {"Sys": 3})
+        self.assertEqual(resultado["facetas"]["em_estoque"], {True: 2, False: 1})
+        self.assertEqual(resultado["facetas"]["faixa_preco"], {"ate_50": 3})
+
+        resultado = self.sistema.buscar_produtos_facetado(categoria="Sys", em_estoque=True)
+        self.assertCountEqual(resultado["produtos"], [self.produto1, self.produto2])
+
+        todos = self.sistema.buscar_produtos_facetado()
+        self.assertEqual(len(todos["produtos"]), 4)
+        self.assertEqual(todos["facetas"]["faixa_preco"], {"ate_50": 3, "100_a_500": 1})
+        self.assertEqual(len(self.sistema.listar_produtos_por_categoria("Periféricos")), 1)
+
+    def test_faceta_em_estoque_acompanha_atualizacao_de_estoque(self):
+        self.produto2.atualizar_estoque(-5)
+        self.assertEqual(self.sistema.buscar_produtos_facetado(em_estoque=True)["produtos"], [self.produto1])
+
+        self.produto_sem_estoque.atualizar_estoque(2)
+        em_estoque = self.sistema.buscar_produtos_facetado(em_estoque=True)["produtos"]
+        self.assertCountEqual(em_estoque, [self.produto1, self.produto_sem_estoque])
+
+        self.produto1.categoria = "Outra"
+        self.assertEqual(self.sistema.listar_produtos_por_categoria("Outra"), [self.produto1])
+        self.assertEqual(len(self.sistema.listar_produtos_por_categoria("Sys")), 2)
+
+    def test_faceta_faixa_preco_com_preco_nao_finito(self):
+        # O setter recusa preços não finitos; ainda assim a faixa não estoura o índice se um chegar até ela
+        with self.assertRaises(ValueError):
+            self.produto1.preco = float("inf")
+        self.assertEqual(self.sistema.buscar_produtos_facetado(faixa_preco="acima_1000")["produtos"], [])
+        self.assertEqual(faixa_de_preco(float("inf")), "acima_1000")
+        self.assertEqual(faixa_de_preco(float("nan")), "acima_1000")
+
+    def test_busca_por_faixa_de_preco_ordenada(self):
+        teclado = Produto(605, "Teclado", "Desc", 250.0, 4, "Periféricos")
+        mouse = Produto(606, "Mouse", "Desc", 15.0, 4, "Periféricos")
+        self.sistema.adicionar_produto(teclado)
+        self.sistema.adicionar_produto(mouse)
+
+        self.assertEqual(self.sistema.buscar_produtos_por_preco(10.0, 20.0), [self.produto_sem_estoque, mouse, self.produto1])
+        self.assertEqual(self.sistema.buscar_produtos_por_preco(10.0, 20.0, inicio=1, limite=1), [mouse])
+        self.assertEqual(self.sistema.buscar_produtos_por_preco(preco_min=15.0, categoria="Periféricos"), [mouse, teclado])
+        self.assertEqual(self.sistema.buscar_produtos_por_preco(decrescente=True, limite=2), [teclado, self.produto1])
+        self.assertEqual(self.sistema.listar_produtos_mais_baratos(2), [self.produto2, self.produto_sem_estoque])
+        self.assertEqual(self.sistema.listar_produtos_mais_caros(1, categoria="Sys"), [self.produto1])
+
+        self.sistema.atualizar_produto(606, preco=999.0) # reprecificação reposiciona o produto
+        self.assertEqual(self.sistema.listar_produtos_mais_caros(1), [mouse])
+        self.sistema.remover_produto(606)
+        self.assertEqual(self.sistema.listar_produtos_mais_caros(1), [teclado])
+
+    def test_paginacao_de_produtos_por_cursor(self):
+        for id_produto in range(610, 615):
+            self.sistema.adicionar_produto(Produto(id_produto, f"Extra {id_produto}", "", 1.0, 1, "Extra"))
+
+        pagina1, cursor = self.sistema.paginar_produtos(tamanho_pagina=3)
+        self.assertEqual([p.id_produto for p in pagina1], [601, 602, 603])
+        self.assertEqual(cursor, 603)
+
+        # Inserção concorrente antes do cursor não desloca a próxima página
+        self.sistema.adicionar_produto(Produto(600, "Novo", "", 1.0, 1, "Extra"))
+        pagina2, cursor = self.sistema.paginar_produtos(cursor, 3)
+        self.assertEqual([p.id_produto for p in pagina2], [610, 611, 612])
+
+        pagina3, cursor = self.sistema.paginar_produtos(cursor, 3)
+        self.assertEqual([p.id_produto for p in pagina3], [613, 614])
+        self.assertIsNone(cursor)
+
+        self.sistema.remover_produto(611)
+        ids = [p.id_produto for p in self.sistema.iterar_produtos(apos=602)]
+        self.assertEqual(ids, [603, 610, 612, 613, 614])
+
+    def test_paginacao_de_pedidos_por_cliente(self):
+        pedidos = []
+        for _ in range(5):
+            carrinho = Carrinho()
+            carrinho.adicionar_item(self.produto1, 1)
+            pedidos.append(self.sistema.criar_pedido(self.id_cliente, carrinho, self.endereco, "PIX"))
+        carrinho_outro = Carrinho()
+        carrinho_outro.adicionar_item(self.produto2, 1)
+        self.sistema.criar_pedido("outro_cliente", carrinho_outro, self.endereco, "PIX")
+
+        pagina1, cursor = self.sistema.paginar_pedidos_por_cliente(self.id_cliente, tamanho_pagina=2)
+        self.assertEqual(pagina1, pedidos[:2])
+        pagina2, cursor = self.sistema.paginar_pedidos_por_cliente(self.id_cliente, cursor, 2)
+        self.assertEqual(pagina2, pedidos[2:4])
+        pagina3, cursor = self.sistema.paginar_pedidos_por_cliente(self.id_cliente, cursor, 2)
+        self.assertEqual(pagina3, pedidos[4:])
+        self.assertIsNone(cursor)
+
+        self.assertEqual(list(self.sistema.iterar_pedidos_por_cliente("outro_cliente"))[0].id_cliente, "outro_cliente")
+        self.assertEqual(list(self.sistema.iterar_pedidos_por_cliente("sem_pedidos")), [])
+
+    def test_indice_de_pedidos_por_cliente(self):
+        pedidos = []
+        for _ in range(3):
+            carrinho = Carrinho()
+            carrinho.adicionar_item(self.produto1, 1)
+            pedidos.append(self.sistema.criar_pedido(self.id_cliente, carrinho, self.endereco, "Boleto"))
+        self.sistema.cancelar_pedido(pedidos[1].id_pedido)
+
+        self.assertEqual(self.sistema.listar_pedidos_por_cliente(self.id_cliente), pedidos)
+        self.assertEqual(self.sistema.listar_pedidos_por_cliente(self.id_cliente, mais_recentes_primeiro=True), pedidos[::-1])
+        self.assertEqual(self.sistema.listar_pedidos_por_cliente(self.id_cliente, status=StatusPedido.CANCELADO), [pedidos[1]])
+        self.assertEqual(self.sistema.listar_pedidos_por_cliente(self.id_cliente, mais_recentes_primeiro=True, status=StatusPedido.PENDENTE),
+                         [pedidos[2], pedidos[0]])
+
+        pagina, cursor = self.sistema.paginar_pedidos_por_cliente(self.id_cliente, tamanho_pagina=2, mais_recentes_primeiro=True)
+        self.assertEqual(pagina, [pedidos[2], pedidos[1]])
+        pagina, cursor = self.sistema.paginar_pedidos_por_cliente(self.id_cliente, cursor, 2, mais_recentes_primeiro=True)
+        self.assertEqual(pagina, [pedidos[0]])
+        self.assertIsNone(cursor)
+
+        self.assertTrue(self.sistema.remover_pedido(pedidos[0].id_pedido))
+        self.assertIsNone(self.sistema.buscar_pedido_por_id(pedidos[0].id_pedido))
+        self.assertEqual(self.sistema.listar_pedidos_por_cliente(self.id_cliente), pedidos[1:])
+        self.assertFalse(self.sistema.remover_pedido(pedidos[0].id_pedido))
+
+    @patch.object(SistemaPagamento, "_verificar_fraude", return_value=True)
+    @patch.object(SistemaPagamento, "_autorizar_pagamento", return_value=True)
+    def test_agregados_de_vendas_e_relatorio(self, mock_autorizar, mock_fraude):
+        pedidos = []
+        for _ in range(3):
+            carrinho = Carrinho()
+            carrinho.adicionar_item(self.produto1, 1)
+            with patch("ecommerce.pedido.Pedido.calcular_frete", return_value=Decimal("0.00")):
+                pedidos.append(self.sistema.criar_pedido(self.id_cliente, carrinho, self.endereco, "Cartão de Crédito"))
+
+        self.assertTrue(self.sistema.processar_pagamento_pedido(pedidos[0].id_pedido, {"num_parcelas": 1}))
+        self.assertTrue(self.sistema.processar_pagamento_pedido(pedidos[1].id_pedido, {"num_parcelas": 1}))
+        pedidos[1].atualizar_status(StatusPedido.EM_SEPARACAO)
+
+        resumo = self.sistema.resumo_vendas()
+        self.assertEqual(resumo["pedidos_pagos"], 2)
+        self.assertEqual(resumo["total_vendido"], Decimal("40.00"))
+        self.assertEqual(resumo["pedidos_por_status"]["PENDENTE"], 1)
+        self.assertEqual(resumo["pedidos_por_status"]["EM_SEPARACAO"], 1)
+
+        self.sistema.cancelar_pedido(pedidos[0].id_pedido) # sai dos status de venda
+        resumo = self.sistema.resumo_vendas()
+        self.assertEqual(resumo["pedidos_pagos"], 1)
+        self.assertEqual(resumo["total_vendido"], Decimal("20.00"))
+        self.assertEqual(resumo["pedidos_por_status"]["CANCELADO"], 1)
+
+        relatorio = self.sistema.gerar_relatorio_vendas()
+        self.assertIn(f"- Pedido: {pedidos[1].id_pedido}, Cliente: {self.id_cliente}, Valor: R$ 20.00, Status: EM_SEPARACAO", relatorio)
+        self.assertNotIn(pedidos[0].id_pedido, relatorio)
+        self.assertIn("Total de Pedidos Pagos/Concluídos: 1", relatorio)
+        self.assertIn("Valor Total Vendido: R$ 20.00", relatorio)
+        self.assertEqual(len(list(self.sistema.iterar_linhas_relatorio_vendas())), 1)
+
+    def test_busca_de_pedidos_por_periodo(self):
+        pedidos = []
+        for _ in range(4):
+            carrinho = Carrinho()
+            carrinho.adicionar_item(self.produto1, 1)
+            pedidos.append(self.sistema.criar_pedido(self.id_cliente, carrinho, self.endereco, "PIX"))
+
+        inicio, fim = pedidos[1].data_criacao, pedidos[3].data_criacao
+        self.assertEqual(self.sistema.buscar_pedidos_por_periodo(inicio, fim), [p for p in pedidos if inicio <= p.data_criacao < fim])
+        self.assertEqual(self.sistema.buscar_pedidos_por_periodo(), pedidos)
+        self.assertEqual(self.sistema.buscar_pedidos_por_periodo(campo="pagamento"), [])
+
+        pedidos[2].atualizar_status(StatusPedido.PROCESSANDO_PAGAMENTO)
+        pedidos[2].registrar_pagamento(True, "pix_teste", Decimal("20.00"))
+        pagos = self.sistema.buscar_pedidos_por_periodo(inicio=pedidos[2].data_pagamento, campo="pagamento")
+        self.assertEqual(pagos, [pedidos[2]])
+        self.assertEqual(self.sistema.buscar_pedidos_por_periodo(campo="criacao", status=StatusPedido.PAGO), [pedidos[2]])
+
+        self.sistema.remover_pedido(pedidos[0].id_pedido)
+        self.assertEqual(self.sistema.buscar_pedidos_por_periodo(), pedidos[1:])
+        with self.assertRaises(ValueError):
+            self.sistema.buscar_pedidos_por_periodo(campo="envio")
+
+    def test_criacao_de_pedidos_em_lote(self):
+        def carrinho_com(*itens):
+            carrinho = Carrinho()
+            for produto, quantidade in itens:
+                carrinho.adicionar_item(produto, quantidade)
+            return carrinho
+
+        solicitacoes = [
+            ("c1", carrinho_com((self.produto1, 6), (self.produto2, 2)), self.endereco, "PIX"),
+            ("c2", carrinho_com((self.produto1, 5)), self.endereco, "PIX"),                       # só restam 4
+            ("c3", carrinho_com((self.produto1, 4), (self.produto2, 3)), self.endereco, "PIX"),
+            ("c4", Carrinho(), self.endereco, "PIX"),
+            ("c5", carrinho_com((self.produto2, 1)), self.endereco, ""),                          # método inválido
+        ]
+        resultados = self.sistema.criar_pedidos_em_lote(solicitacoes)
+
+        self.assertEqual([pedido is not None for pedido, _ in resultados], [True, False, True, False, False])
+        self.assertIn("Estoque insuficiente", resultados[1][1])
+        self.assertIn("vazio", resultados[3][1])
+        self.assertIsNotNone(resultados[4][1])
+        # Pedidos rejeitados não consomem estoque e os aceitos ficam registrados e indexados
+        self.assertEqual(self.produto1.quantidade_estoque, 0)
+        self.assertEqual(self.produto2.quantidade_estoque, 0)
+        self.assertEqual(self.sistema.listar_pedidos_por_cliente("c3"), [resultados[2][0]])
+        self.assertEqual(len(solicitacoes[0][1]), 0)
+        self.assertEqual(len(solicitacoes[1][1]), 1)
+        self.assertEqual(self.sistema.buscar_produtos_facetado(categoria="Sys", em_estoque=True)["produtos"], [])
+
 if __name__ == '__main__':
     unittest.main()